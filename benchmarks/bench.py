@@ -0,0 +1,198 @@
+"""
+Micro-benchmarks for every parsing and rendering stage.
+
+Usage:
+    python benchmarks/bench.py run [--output results.json] [--filter NAME]
+    python benchmarks/bench.py compare baseline.json results.json [--threshold 0.1]
+
+Only the standard library is used, so the suite runs offline. The inline
+cache is disabled so every call parses its input; cases named "[<size>,cached]"
+run with the default cache size and time repeated text served from the cache.
+
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import timeit
+from typing import Callable
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from inline_cache import DEFAULT_SIZE, configure_inline_cache, inline_cache  # noqa: E402
+from inputs import (  # noqa: E402
+    SIZES,
+    code_block,
+    document,
+    heading_block,
+    inline_text,
+    olist_block,
+    paragraph_block,
+    quote_block,
+    ulist_block,
+)
+from markdown_handler import (  # noqa: E402
+    block_to_block_type,
+    code_to_html_node,
+    heading_to_html_node,
+    markdown_to_blocks,
+    markdown_to_html_node,
+    olist_to_html_node,
+    paragraph_to_html_node,
+    quote_to_html_node,
+    text_to_textnodes,
+    ulist_to_html_node,
+)
+from pages import extract_title  # noqa: E402
+
+CACHED_SUFFIX = ",cached]"
+
+
+def _block_types(blocks: list[str]) -> None:
+    for block in blocks:
+        block_to_block_type(block)
+
+
+def benchmarks() -> dict[str, Callable[[], object]]:
+    """
+    Builds the benchmark cases. Inputs are generated up front so only the
+    measured function is timed.
+
+    Returns: benchmark functions keyed by name
+
+    """
+    cases: dict[str, Callable[[], object]] = {}
+
+    for label, size in SIZES.items():
+        doc = document(size)
+        blocks = markdown_to_blocks(doc)
+        text = inline_text(size)
+        paragraph = paragraph_block(size)
+        heading = heading_block(size)
+        code = code_block(size)
+        quote = quote_block(size)
+        ulist = ulist_block(size)
+        olist = olist_block(size)
+        tree = markdown_to_html_node(doc)
+        untitled = doc.replace("# Benchmark document", "") + "\n# Title"
+
+        cases[f"markdown_to_blocks[{label}]"] = lambda doc=doc: markdown_to_blocks(doc)
+        cases[f"block_to_block_type[{label}]"] = lambda blocks=blocks: _block_types(blocks)
+        cases[f"text_to_textnodes[{label}]"] = lambda text=text: text_to_textnodes(text)
+        cases[f"paragraph_to_html_node[{label}]"] = lambda b=paragraph: paragraph_to_html_node(b)
+        cases[f"heading_to_html_node[{label}]"] = lambda b=heading: heading_to_html_node(b)
+        cases[f"code_to_html_node[{label}]"] = lambda b=code: code_to_html_node(b)
+        cases[f"quote_to_html_node[{label}]"] = lambda b=quote: quote_to_html_node(b)
+        cases[f"ulist_to_html_node[{label}]"] = lambda b=ulist: ulist_to_html_node(b)
+        cases[f"olist_to_html_node[{label}]"] = lambda b=olist: olist_to_html_node(b)
+        cases[f"markdown_to_html_node[{label}]"] = lambda doc=doc: markdown_to_html_node(doc)
+        cases[f"ParentNode.to_html[{label}]"] = tree.to_html
+        cases[f"extract_title[{label}]"] = lambda doc=untitled: extract_title(doc)
+
+        for name in ("paragraph_to_html_node", "markdown_to_html_node"):
+            cases[f"{name}[{label}{CACHED_SUFFIX}"] = cases[f"{name}[{label}]"]
+
+    return cases
+
+
+def measure(func: Callable[[], object], repeat: int) -> dict[str, float]:
+    """
+    Times the given function. The number of calls per sample is picked so a
+    sample takes at least 0.2 seconds.
+
+    Args:
+        func: function to time
+        repeat: number of samples
+
+    Returns: best and median seconds per call and the calls per sample
+
+    """
+    timer = timeit.Timer(func)
+    calls, _ = timer.autorange()
+    samples = [total / calls for total in timer.repeat(repeat, calls)]
+
+    return {
+        "best": min(samples),
+        "median": statistics.median(samples),
+        "calls": calls,
+    }
+
+
+def run(args: argparse.Namespace) -> int:
+    results = {}
+
+    for name, func in benchmarks().items():
+        if args.filter and args.filter not in name:
+            continue
+
+        inline_cache.clear()
+        configure_inline_cache(DEFAULT_SIZE if name.endswith(CACHED_SUFFIX) else 0)
+        results[name] = measure(func, args.repeat)
+        print(f"{name:40} {results[name]['best'] * 1e6:12.2f} us")
+
+    data = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "results": results,
+    }
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(data, file, indent=1, sort_keys=True)
+
+    return 0
+
+
+def compare(args: argparse.Namespace) -> int:
+    with open(args.baseline, "r", encoding="utf-8") as file:
+        baseline = json.load(file)["results"]
+    with open(args.current, "r", encoding="utf-8") as file:
+        current = json.load(file)["results"]
+
+    regressions = 0
+
+    for name in sorted(baseline.keys() & current.keys()):
+        ratio = current[name]["best"] / baseline[name]["best"]
+        status = ""
+
+        if ratio > 1 + args.threshold:
+            status = "REGRESSION"
+            regressions += 1
+        elif ratio < 1 - args.threshold:
+            status = "improved"
+
+        print(f"{name:40} {ratio:6.2f}x {status}")
+
+    print(f"{regressions} regressions beyond {args.threshold:.0%}")
+    return 1 if regressions else 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Static site generator benchmarks")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="run the benchmarks")
+    run_parser.add_argument("--output", help="path of the JSON results file")
+    run_parser.add_argument("--repeat", type=int, default=5, help="samples per benchmark")
+    run_parser.add_argument("--filter", help="only run benchmarks containing this text")
+    run_parser.set_defaults(func=run)
+
+    compare_parser = commands.add_parser("compare", help="compare two results files")
+    compare_parser.add_argument("baseline", help="path of the baseline results")
+    compare_parser.add_argument("current", help="path of the current results")
+    compare_parser.add_argument(
+        "--threshold", type=float, default=0.1, help="allowed slowdown, 0.1 is 10%%"
+    )
+    compare_parser.set_defaults(func=compare)
+
+    args = parser.parse_args()
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,96 @@
+"""
+Deterministic synthetic markdown inputs for the benchmarks.
+
+Every generator takes a size and returns the same text for the same size on
+every run, so results of different runs can be compared.
+
+"""
+
+import random
+
+SIZES = {"small": 10, "medium": 100, "large": 1000}
+
+_WORDS = (
+    "the ring of power was forged in the fires of mount doom by sauron "
+    "and only there could it be unmade said gandalf to frodo baggins"
+).split()
+
+
+def _words(rng: random.Random, count: int) -> str:
+    return " ".join(rng.choice(_WORDS) for _ in range(count))
+
+
+def inline_text(size: int, seed: int = 1) -> str:
+    """
+    Generates a line of inline markdown with every inline token type.
+
+    Args:
+        size: number of inline sections
+        seed: seed of the random generator
+
+    Returns: inline markdown text
+
+    """
+    rng = random.Random(seed)
+    parts = []
+
+    for i in range(size):
+        match i % 6:
+            case 0:
+                parts.append(f"**{_words(rng, 2)}**")
+            case 1:
+                parts.append(f"*{_words(rng, 2)}*")
+            case 2:
+                parts.append(f"`{_words(rng, 1)}`")
+            case 3:
+                parts.append(f"![{_words(rng, 2)}](/images/{i}.png)")
+            case 4:
+                parts.append(f"[{_words(rng, 2)}](/pages/{i})")
+            case _:
+                parts.append(_words(rng, 8))
+
+    return " ".join(parts)
+
+
+def paragraph_block(size: int) -> str:
+    return "\n".join(inline_text(6, seed) for seed in range(size))
+
+
+def heading_block(size: int) -> str:
+    return "## " + inline_text(size)
+
+
+def code_block(size: int) -> str:
+    rng = random.Random(size)
+    return "```\n" + "\n".join(_words(rng, 6) for _ in range(size)) + "\n```"
+
+
+def quote_block(size: int) -> str:
+    return "\n".join("> " + inline_text(3, seed) for seed in range(size))
+
+
+def ulist_block(size: int) -> str:
+    return "\n".join("- " + inline_text(3, seed) for seed in range(size))
+
+
+def olist_block(size: int) -> str:
+    return "\n".join(f"{i}. " + inline_text(3, i) for i in range(1, size + 1))
+
+
+def document(size: int) -> str:
+    """
+    Generates a markdown document with a title and every block type.
+
+    Args:
+        size: number of sections in the document
+
+    Returns: markdown document
+
+    """
+    blocks = ["# Benchmark document"]
+    makers = [heading_block, paragraph_block, ulist_block, code_block, olist_block, quote_block]
+
+    for i in range(size):
+        blocks.append(makers[i % len(makers)](5))
+
+    return "\n\n".join(blocks)
@@ -1,2 +1,2 @@
-python src/main.py
-cd public && python -m http.server 8888
+python src/main.py --gzip
+python src/server.py public --port 8888
@@ -0,0 +1,102 @@
+"""
+Line oriented scanner that splits a markdown document into typed blocks.
+
+"""
+
+from typing import Iterable, Iterator, List
+
+from textnode import BlockType
+
+
+def _strip_lines(lines: List[str]) -> List[str]:
+    """
+    Removes leading and trailing whitespace from a block of lines, the same
+    way str.strip does for the joined block.
+
+    Args:
+        lines: lines of the block
+
+    Returns: stripped lines, empty if the block only contains whitespace
+
+    """
+    start = 0
+    end = len(lines)
+
+    while start < end and not lines[start].strip():
+        start += 1
+    while end > start and not lines[end - 1].strip():
+        end -= 1
+
+    if start == end:
+        return []
+
+    stripped = lines[start:end]
+    stripped[0] = stripped[0].lstrip()
+    stripped[-1] = stripped[-1].rstrip()
+    return stripped
+
+
+def lines_to_block_type(lines: List[str]) -> BlockType:
+    """
+    Determines the type of a block from its lines. The first character of the
+    block decides which block type is checked, so at most one check runs.
+    The result is the same as block_to_block_type for the joined block.
+
+    Args:
+        lines: lines of the block
+
+    Returns: block type
+
+    """
+    first = lines[0]
+    char = first[:1]
+
+    if char == "#":
+        if first.startswith(("# ", "## ", "### ", "#### ", "##### ", "###### ")):
+            return "heading"
+    elif char == "`":
+        if len(lines) > 1 and first.startswith("```") and lines[-1].startswith("```"):
+            return "code"
+    elif char == ">":
+        if all(line.startswith(">") for line in lines):
+            return "quote"
+    elif char == "-" or char == "*":
+        if all(line.startswith(("- ", "* ")) for line in lines):
+            return "unordered_list"
+    elif char.isdigit():
+        if all(line.startswith(f"{i}.") for i, line in enumerate(lines, 1)):
+            return "ordered_list"
+
+    return "paragraph"
+
+
+def scan_blocks(lines: Iterable[str]) -> Iterator[tuple[BlockType, List[str]]]:
+    """
+    Walks the lines of a markdown document once and yields its blocks.
+    Blocks are separated by empty lines and stripped of leading and trailing
+    whitespace like markdown_to_blocks does. Blocks that only contain
+    whitespace are skipped.
+
+    Args:
+        lines: lines of the document without line endings
+
+    Returns: iterator of (block type, lines of the block) tuples
+
+    """
+    block: List[str] = []
+
+    for line in lines:
+        if line:
+            block.append(line)
+            continue
+
+        if block:
+            stripped = _strip_lines(block)
+            if stripped:
+                yield lines_to_block_type(stripped), stripped
+            block = []
+
+    if block:
+        stripped = _strip_lines(block)
+        if stripped:
+            yield lines_to_block_type(stripped), stripped
@@ -0,0 +1,170 @@
+"""
+Build-time precompression of the text outputs in the public folder.
+
+Every html, css and other text output above a size threshold gets a .gz
+sibling compressed at the highest zlib level, so the server can send it
+without compressing on every request. The manifest remembers the stat and
+hash of every compressed output: unchanged outputs are skipped and the .gz
+files of outputs that no longer exist are removed. Builds without
+compression remove every recorded .gz file, so none of them goes stale.
+
+"""
+
+import gzip
+import hashlib
+import os
+from typing import Iterable, Self
+
+from manifest import BuildManifest
+from output import ChangeSet, write_bytes
+from scan import scan_files
+
+TEXT_EXTENSIONS = frozenset(
+    {".html", ".htm", ".css", ".js", ".mjs", ".json", ".svg", ".xml", ".txt", ".map"}
+)
+
+
+class CompressStats:
+    """
+
+    Attributes:
+        compressed: number of outputs compressed
+        compressed_bytes: size of the compressed outputs
+        gzip_bytes: size of their .gz files
+        skipped: number of unchanged outputs skipped
+        removed: number of stale .gz files removed
+    """
+
+    def __init__(self) -> None:
+        self.compressed: int = 0
+        self.compressed_bytes: int = 0
+        self.gzip_bytes: int = 0
+        self.skipped: int = 0
+        self.removed: int = 0
+
+    def __repr__(self: Self) -> str:
+        return (
+            f"compressed {self.compressed} files ({self.compressed_bytes} -> "
+            f"{self.gzip_bytes} bytes), skipped {self.skipped} files, "
+            f"removed {self.removed} files"
+        )
+
+
+def compress_file(path: str, sha256: str | None) -> tuple[str, int, str | None]:
+    """
+    Writes the .gz sibling of an output unless its content hash matches the
+    hash of the last compression and the .gz file still exists. The gzip
+    header has no timestamp, so compressing the same content twice gives
+    the same bytes.
+
+    Args:
+        path: path of the output
+        sha256: hash of the output when it was last compressed
+
+    Returns: (hash of the output, size of the .gz file, output status of the
+        .gz file or None when it was skipped)
+
+    """
+    with open(path, "rb") as file:
+        data = file.read()
+
+    digest = hashlib.sha256(data).hexdigest()
+    gzip_path = path + ".gz"
+
+    if digest == sha256 and os.path.exists(gzip_path):
+        return digest, os.path.getsize(gzip_path), None
+
+    compressed = gzip.compress(data, compresslevel=9, mtime=0)
+    return digest, len(compressed), write_bytes(gzip_path, compressed)
+
+
+def compress_outputs(
+    dest: str = "public",
+    manifest: BuildManifest | None = None,
+    min_size: int = 1024,
+    max_workers: int | None = None,
+    changes: ChangeSet | None = None,
+) -> CompressStats:
+    """
+    Writes .gz siblings for the text outputs in the public folder. Outputs
+    whose stat matches the manifest are skipped without being read, the
+    others are hashed and only compressed when their content changed. Files
+    are compressed in a thread pool, zlib releases the GIL while it works.
+    Hidden files and folders are skipped, the server does not serve them.
+
+    Args:
+        dest: path of the public folder
+        manifest: manifest used to remember which outputs were compressed
+        min_size: smallest output size that is compressed
+        max_workers: maximum number of files compressed at once
+        changes: change list the written and removed .gz files are recorded in
+
+    Returns: statistics of the compression
+
+    """
+    stats = CompressStats()
+    previous = manifest.compressed if manifest is not None else {}
+    written: list[tuple[str, int, str]] = []
+
+    def compress(path: str, entry: dict | None) -> dict:
+        digest, gzip_size, status = compress_file(path, entry["sha256"] if entry else None)
+        if status is not None:
+            written.append((path, gzip_size, status))
+        return {"sha256": digest}
+
+    records = scan_files(
+        dest,
+        {path: entry for path, entry in previous.items() if os.path.exists(path + ".gz")},
+        compress,
+        lambda path: os.path.splitext(path)[1].lower() in TEXT_EXTENSIONS,
+        min_size,
+        skip_hidden=True,
+        max_workers=max_workers,
+    )
+
+    for path, gzip_size, status in written:
+        stats.compressed += 1
+        stats.compressed_bytes += records[path]["size"]
+        stats.gzip_bytes += gzip_size
+        if changes is not None:
+            changes.record(path + ".gz", status)
+    stats.skipped = len(records) - stats.compressed
+
+    stats.removed = _remove_gzip_files(previous.keys() - records.keys(), changes)
+
+    if manifest is not None:
+        manifest.compressed = records
+
+    return stats
+
+
+def remove_compressed(manifest: BuildManifest, changes: ChangeSet | None = None) -> int:
+    """
+    Removes the .gz sibling of every output the manifest records as
+    compressed, used when a build runs without compression so no client
+    is sent an outdated .gz file.
+
+    Args:
+        manifest: manifest remembering which outputs were compressed
+        changes: change list the removed .gz files are recorded in
+
+    Returns: number of .gz files removed
+
+    """
+    removed = _remove_gzip_files(manifest.compressed, changes)
+    manifest.compressed = {}
+    return removed
+
+
+def _remove_gzip_files(paths: Iterable[str], changes: ChangeSet | None) -> int:
+    removed = 0
+
+    for path in paths:
+        gzip_path = path + ".gz"
+        if os.path.isfile(gzip_path):
+            os.remove(gzip_path)
+            removed += 1
+            if changes is not None:
+                changes.record_removed(gzip_path)
+
+    return removed
@@ -0,0 +1,200 @@
+"""
+Development server that renders pages on demand.
+
+Instead of building the whole site first, a request is mapped to its
+markdown file in the content folder, which is rendered when it is requested.
+Rendered pages are kept in a LRU cache until the markdown file or the
+template changes. Static files are served straight from the static folder.
+
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from typing import Self
+
+from pages import page_fragments
+from template import Template, load_template
+
+
+def resolve_source(url_path: str, dir_path_content: str) -> str | None:
+    """
+    Maps the path of a request to the markdown file the page is built from.
+    "/", "/blog/" and "/blog/index.html" map to index.md files inside the
+    content folder, "/blog/first" and "/blog/first.html" map to first.md.
+    "/blog" maps to blog.md, or to blog/index.md when there is no blog.md.
+    Paths that normalize outside the content folder are rejected.
+
+    Args:
+        url_path: path of the request without query string
+        dir_path_content: path of the content folder
+
+    Returns: path of the markdown file, None if there is none
+
+    """
+    if "\0" in url_path:
+        return None
+
+    relative_path = url_path.strip("/")
+    is_folder = not relative_path or url_path.endswith("/")
+
+    if relative_path.endswith(".html"):
+        relative_path = relative_path[: -len(".html")]
+
+    root = os.path.abspath(dir_path_content)
+    base = os.path.normpath(os.path.join(root, relative_path))
+
+    if base != root and not base.startswith(root + os.sep):
+        return None
+
+    candidates = [os.path.join(base, "index.md")]
+    if not is_folder and base != root:
+        candidates.insert(0, base + ".md")
+
+    for candidate in candidates:
+        if os.path.isfile(candidate):
+            return candidate
+
+    return None
+
+
+class PageCache:
+    """
+    LRU cache of rendered pages. An entry is only valid as long as its
+    markdown file has the same mtime and the template has not been compiled
+    again, which load_template does whenever a template file changes.
+
+    Attributes:
+        maxsize: maximum number of cached pages
+        template_path: path of the html template
+        hits: number of requests served from the cache
+        misses: number of requests that rendered the page
+    """
+
+    def __init__(self, template_path: str, maxsize: int = 256) -> None:
+        self.template_path: str = template_path
+        self.maxsize: int = maxsize
+        self.hits: int = 0
+        self.misses: int = 0
+        self._entries: OrderedDict[str, tuple[int, Template, bytes]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self: Self, source_path: str) -> bytes:
+        """
+        Returns the rendered page of the given markdown file, rendering it
+        when it is not cached or has changed.
+
+        Args:
+            source_path: path of the markdown file
+
+        Returns: utf-8 encoded page
+
+        """
+        mtime = os.stat(source_path).st_mtime_ns
+        template = load_template(self.template_path)
+
+        with self._lock:
+            entry = self._entries.get(source_path)
+            if entry and entry[0] == mtime and entry[1] is template:
+                self._entries.move_to_end(source_path)
+                self.hits += 1
+                return entry[2]
+
+        with open(source_path, "r", encoding="utf-8") as file:
+            content = file.read()
+
+        page = "".join(page_fragments(content, template)).encode("utf-8")
+
+        with self._lock:
+            self.misses += 1
+            self._entries[source_path] = (mtime, template, page)
+            self._entries.move_to_end(source_path)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+        return page
+
+
+class DevRequestHandler(SimpleHTTPRequestHandler):
+    """
+    Serves pages rendered on demand and falls back to the static folder for
+    every other request.
+    """
+
+    server: "DevServer"
+
+    def do_GET(self: Self) -> None:
+        if not self._send_page(head=False):
+            super().do_GET()
+
+    def do_HEAD(self: Self) -> None:
+        if not self._send_page(head=True):
+            super().do_HEAD()
+
+    def _send_page(self: Self, head: bool) -> bool:
+        url_path = self.path.split("?", 1)[0].split("#", 1)[0]
+        source_path = resolve_source(url_path, self.server.dir_path_content)
+
+        if not source_path:
+            return False
+
+        try:
+            body = self.server.cache.get(source_path)
+        except Exception as e:
+            self.send_error(500, f"{source_path}: {e}")
+            return True
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+
+        if not head:
+            self.wfile.write(body)
+
+        return True
+
+
+class DevServer(ThreadingHTTPServer):
+    """
+    Threaded HTTP server of the on demand development mode.
+
+    Attributes:
+        dir_path_content: path of the content folder
+        cache: cache of the rendered pages
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address, handler, dir_path_content: str, cache: PageCache) -> None:
+        super().__init__(address, handler)
+        self.dir_path_content: str = dir_path_content
+        self.cache: PageCache = cache
+
+
+def serve(
+    port: int,
+    dir_path_content: str = "content",
+    template_path: str = "template.html",
+    static_path: str = "static",
+    cache_size: int = 256,
+) -> None:
+    """
+    Runs the on demand development server until it is interrupted.
+
+    Args:
+        port: port to listen on
+        dir_path_content: path of the content folder
+        template_path: path of the html template
+        static_path: path of the static folder
+        cache_size: maximum number of rendered pages kept in memory
+    """
+    handler = partial(DevRequestHandler, directory=static_path)
+    cache = PageCache(template_path, cache_size)
+
+    with DevServer(("", port), handler, dir_path_content, cache) as server:
+        print(f"rendering {dir_path_content}/ on demand on http://localhost:{port}")
+        server.serve_forever()
@@ -0,0 +1,212 @@
+"""
+Content-hash fingerprinting of static assets.
+
+Fingerprinted assets are published under names containing a hash of their
+content, such as index.3f2a1b9c.css, so they can be cached forever. The urls
+of the assets are kept in a process wide table: the template engine rewrites
+href and src attributes of compiled templates with it and text_to_html_node
+rewrites the urls of links and images.
+
+"""
+
+import hashlib
+import json
+import os
+import re
+
+from inline_cache import inline_cache
+from output import file_hash
+from scan import scan_files
+from sinks import DISK_SINK, OutputSink
+
+ASSET_MANIFEST = "asset-manifest.json"
+
+FINGERPRINT_EXTENSIONS = frozenset(
+    {".css", ".js", ".mjs", ".png", ".jpg", ".jpeg", ".gif", ".webp", ".avif", ".svg"}
+    | {".woff", ".woff2", ".ttf", ".otf", ".mp4", ".webm"}
+)
+
+_ATTRIBUTE_RE = re.compile(r"""(\b(?:href|src)\s*=\s*)(["'])(.*?)\2""", re.IGNORECASE)
+
+_urls: dict[str, str] = {}
+_digest: str = ""
+
+
+def fingerprint_name(relative_path: str, sha256: str) -> str:
+    """
+    Adds the first characters of the content hash to the name of an asset.
+
+    Args:
+        relative_path: path of the asset relative to the static folder
+        sha256: hex digest of the asset
+
+    Returns: fingerprinted relative path
+
+    """
+    root, extension = os.path.splitext(relative_path)
+    return f"{root}.{sha256[:8]}{extension}"
+
+
+def hash_assets(
+    path: str = "static",
+    records: dict[str, dict] | None = None,
+    max_workers: int | None = None,
+) -> dict[str, dict]:
+    """
+    Hashes the fingerprinted assets of the static folder in a thread pool.
+    Assets whose stat matches their previous record are not read again.
+
+    Args:
+        path: path of the static folder
+        records: stat and hash of every asset from the previous build
+        max_workers: maximum number of files hashed at once
+
+    Returns: stat and hash of every asset keyed by its source path
+
+    """
+    return scan_files(
+        path,
+        records,
+        lambda source_path, _: {"sha256": file_hash(source_path)},
+        lambda source_path: os.path.splitext(source_path)[1].lower() in FINGERPRINT_EXTENSIONS,
+        max_workers=max_workers,
+    )
+
+
+def asset_names(path: str, records: dict[str, dict]) -> dict[str, str]:
+    """
+    Maps every hashed asset to its fingerprinted name.
+
+    Args:
+        path: path of the static folder
+        records: stat and hash of every asset keyed by its source path
+
+    Returns: fingerprinted path of every asset keyed by its path, both
+        relative to the static folder with forward slashes
+
+    """
+    names: dict[str, str] = {}
+
+    for source_path, entry in records.items():
+        relative_path = os.path.relpath(source_path, path).replace(os.sep, "/")
+        names[relative_path] = fingerprint_name(relative_path, entry["sha256"])
+
+    return dict(sorted(names.items()))
+
+
+def write_asset_manifest(dest: str, names: dict[str, str], sink: OutputSink = DISK_SINK) -> str:
+    """
+    Writes the fingerprinted name of every asset to the asset manifest in
+    the public folder, for tools that need to find the published assets.
+
+    Args:
+        dest: path of the public folder
+        names: fingerprinted path of every asset keyed by its relative path
+        sink: sink the asset manifest is written to
+
+    Returns: ADDED, CHANGED or UNCHANGED
+
+    """
+    data = json.dumps(names, indent=2, sort_keys=True) + "\n"
+    return sink.write_bytes(os.path.join(dest, ASSET_MANIFEST), data.encode())
+
+
+def configure_assets(names: dict[str, str]) -> None:
+    """
+    Sets the fingerprinted names used to rewrite urls. Cached inline nodes
+    are dropped when the names change, since they may contain old urls.
+    Also used as part of the initializer of worker processes.
+
+    Args:
+        names: fingerprinted path of every asset keyed by its relative path
+    """
+    global _urls, _digest
+
+    urls = {f"/{name}": f"/{fingerprinted}" for name, fingerprinted in names.items()}
+    if urls == _urls:
+        return
+
+    _urls = urls
+    _digest = ""
+    if names:
+        _digest = hashlib.sha256(json.dumps(names, sort_keys=True).encode()).hexdigest()
+    inline_cache.clear()
+
+
+def configured_assets() -> dict[str, str]:
+    """
+    Returns the fingerprinted names currently used to rewrite urls.
+
+    Returns: fingerprinted path of every asset keyed by its relative path
+
+    """
+    return {url[1:]: fingerprinted[1:] for url, fingerprinted in _urls.items()}
+
+
+def assets_digest() -> str:
+    """
+    Returns a hash of the fingerprinted names, empty when there are none.
+    Pages and templates depend on it, since their urls are rewritten.
+
+    Returns: hex digest
+
+    """
+    return _digest
+
+
+def asset_url(url: str | None) -> str | None:
+    """
+    Rewrites a root relative url of a fingerprinted asset. The query string
+    and fragment are kept, every other url is returned unchanged.
+
+    Args:
+        url: url of a link, image or template attribute
+
+    Returns: fingerprinted url
+
+    """
+    if not _urls or not url:
+        return url
+
+    path, suffix = split_url(url)
+    fingerprinted = _urls.get(path)
+    return fingerprinted + suffix if fingerprinted else url
+
+
+def split_url(url: str) -> tuple[str, str]:
+    """
+    Splits the query string and fragment off a url.
+
+    Args:
+        url: url to split
+
+    Returns: path of the url and the query string and fragment, which start
+        with ? or # or are empty
+
+    """
+    end = len(url)
+    for separator in "?#":
+        index = url.find(separator)
+        if index != -1:
+            end = min(end, index)
+
+    return url[:end], url[end:]
+
+
+def rewrite_references(html: str) -> str:
+    """
+    Rewrites the href and src attributes of fingerprinted assets in html.
+
+    Args:
+        html: html text
+
+    Returns: html text with fingerprinted urls
+
+    """
+    if not _urls:
+        return html
+
+    return _ATTRIBUTE_RE.sub(
+        lambda match: match.group(1) + match.group(2) + asset_url(match.group(3)) + match.group(2),
+        html,
+    )
@@ -0,0 +1,56 @@
+"""
+Shared fixtures for the unit tests.
+
+"""
+
+import os
+import tempfile
+import unittest
+
+
+class TempDirTestCase(unittest.TestCase):
+    """
+    Test case that runs in a temporary folder, deleted after every test.
+
+    Attributes:
+        tmp: the temporary folder
+        root: folder the paths given to write are relative to, the
+            temporary folder unless a test changes it
+    """
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.root = self.tmp.name
+
+    def write(self, name, content):
+        """
+        Writes a file and the folders it is in. Text is written as utf-8.
+
+        Args:
+            name: path of the file relative to root
+            content: str or bytes content of the file
+
+        Returns: path of the file
+
+        """
+        path = os.path.join(self.root, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if isinstance(content, str):
+            content = content.encode("utf-8")
+        with open(path, "wb") as file:
+            file.write(content)
+        return path
+
+    def read(self, path):
+        """
+        Reads a file.
+
+        Args:
+            path: path of the file
+
+        Returns: content of the file as bytes
+
+        """
+        with open(path, "rb") as file:
+            return file.read()
@@ -3,7 +3,8 @@ HTMLNode class reprisents a node in the HTML tree.
 
 """
 
-from typing import Self, TypeAlias, List
+from html import escape
+from typing import IO, Iterator, Self, TypeAlias, List
 
 
 class HTMLNode:
@@ -16,6 +17,8 @@ class HTMLNode:
         props: The properties of the node
     """
 
+    __slots__ = ("tag", "value", "children", "props")
+
     def __init__(self, tag=None, value=None, children=None, props=None) -> None:
         self.tag: Value = tag
         self.value: Value = value
@@ -31,9 +34,62 @@ class HTMLNode:
         """
         raise NotImplementedError
 
+    def iter_html(self: Self) -> Iterator[str]:
+        """
+        Yields the HTML of the node and its descendants as fragments in
+        document order. The tree is walked with an explicit stack, so deep
+        trees are not limited by the recursion depth.
+
+        Args:
+            self: Self
+
+        Returns: iterator of HTML fragments
+
+        """
+        stack: list[HTMLNode | str] = [self]
+
+        while stack:
+            node = stack.pop()
+
+            if isinstance(node, str):
+                yield node
+                continue
+
+            start, children, end = node._html_parts()
+            yield start
+
+            if children:
+                stack.append(end)
+                stack.extend(reversed(children))
+            elif end:
+                yield end
+
+    def write_html(self: Self, fp: IO[str]) -> None:
+        """
+        Writes the HTML of the node to the given file without building the
+        whole document as a single string.
+
+        Args:
+            self: Self
+            fp: text file to write to
+        """
+        fp.writelines(self.iter_html())
+
+    def _html_parts(self: Self) -> "tuple[str, Children, str]":
+        """
+        Splits the node into its opening HTML, its children and its closing
+        HTML. Implemented by the subclasses.
+
+        Args:
+            self: Self
+        """
+        raise NotImplementedError
+
     def props_to_html(self: Self) -> str:
         """
         Convert the props dictionary to a string of HTML attributes.
+        Values are escaped, so quotes and ampersands can not end the
+        attribute or start an entity.
         Args:
             self: Self
 
@@ -45,7 +101,7 @@ class HTMLNode:
         if self.props:
 
             for key, value in self.props.items():
-                result += f' {key}="{value}"'
+                result += f' {key}="{escape(str(value), quote=True)}"'
 
         return result
 
@@ -59,6 +115,8 @@ class LeafNode(HTMLNode):
 
     """
 
+    __slots__ = ()
+
     def __init__(
         self,
         tag,
@@ -86,6 +144,9 @@ class LeafNode(HTMLNode):
 
         return f"<{self.tag}{super().props_to_html()}>{self.value}</{self.tag}>"
 
+    def _html_parts(self: Self) -> "tuple[str, Children, str]":
+        return self.to_html(), None, ""
+
     def __repr__(self: Self) -> str:
         return f"LeafNode({self.tag}, {self.value}, {self.props})"
 
@@ -95,19 +156,28 @@ class ParentNode(HTMLNode):
     Child class of HTMLNode that represents a single HTML node with children.
     """
 
+    __slots__ = ()
+
     def __init__(self, tag, children, props=None) -> None:
         super().__init__(tag, None, children, props)
 
     def to_html(self: Self) -> str:
-        children_html = ""
+        """
+        Convert the node and its children to an HTML string.
 
+        Args:
+            self: Self
+
+        Returns: str
+
+        """
+        return "".join(self.iter_html())
+
+    def _html_parts(self: Self) -> "tuple[str, Children, str]":
         if not self.children:
             raise ValueError("ParentNode must have children")
 
-        for child in self.children:
-            children_html += child.to_html()
-
-        return f"<{self.tag}{super().props_to_html()}>{children_html}</{self.tag}>"
+        return f"<{self.tag}{self.props_to_html()}>", self.children, f"</{self.tag}>"
 
     def __repr__(self: Self) -> str:
         return f"ParentNode({self.tag}, {self.children}, {self.props})"
@@ -117,5 +187,5 @@ class ParentNode(HTMLNode):
 
 Value: TypeAlias = str | None
 Tag: TypeAlias = str | None
-Children: TypeAlias = List[HTMLNode] | None
+Children: TypeAlias = List[HTMLNode] | tuple[HTMLNode, ...] | None
 Props: TypeAlias = dict[str, str] | None
@@ -0,0 +1,257 @@
+"""
+Intrinsic dimensions of the images in the static folder.
+
+The width and height of an image are read from the header of its file
+without decoding any pixels, for PNG, GIF, JPEG and WebP files. The sizes of
+the images are kept in a process wide table keyed by their url, which
+text_to_html_node uses to give img tags their dimensions, so the browser can
+reserve their space before they load.
+
+"""
+
+import hashlib
+import json
+import os
+import struct
+
+from fingerprint import split_url
+from inline_cache import inline_cache
+from scan import scan_files
+
+IMAGE_EXTENSIONS = frozenset({".png", ".gif", ".jpg", ".jpeg", ".webp"})
+
+# JPEG start of frame markers, which hold the dimensions of the image
+_SOF_MARKERS = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+# JPEG markers without a length and a segment
+_STANDALONE_MARKERS = frozenset(range(0xD0, 0xD8)) | {0x01}
+
+_sizes: dict[str, tuple[int, int]] = {}
+_digest: str = ""
+
+
+def _png_size(header: bytes) -> tuple[int, int] | None:
+    if len(header) < 24 or header[12:16] != b"IHDR":
+        return None
+    return struct.unpack(">II", header[16:24])
+
+
+def _gif_size(header: bytes) -> tuple[int, int] | None:
+    if len(header) < 10:
+        return None
+    return struct.unpack("<HH", header[6:10])
+
+
+def _webp_size(header: bytes) -> tuple[int, int] | None:
+    chunk = header[12:16]
+
+    if chunk == b"VP8 " and len(header) >= 30 and header[23:26] == b"\x9d\x01\x2a":
+        width, height = struct.unpack("<HH", header[26:30])
+        return width & 0x3FFF, height & 0x3FFF
+
+    if chunk == b"VP8L" and len(header) >= 25 and header[20] == 0x2F:
+        bits = int.from_bytes(header[21:25], "little")
+        return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+
+    if chunk == b"VP8X" and len(header) >= 30:
+        width = int.from_bytes(header[24:27], "little") + 1
+        height = int.from_bytes(header[27:30], "little") + 1
+        return width, height
+
+    return None
+
+
+def _jpeg_size(file) -> tuple[int, int] | None:
+    file.seek(2)
+
+    while True:
+        byte = file.read(1)
+        if not byte:
+            return None
+        if byte != b"\xff":
+            continue
+
+        marker = file.read(1)
+        while marker == b"\xff":
+            marker = file.read(1)
+        if not marker:
+            return None
+
+        code = marker[0]
+        if code in _STANDALONE_MARKERS:
+            continue
+        if code in (0xD9, 0xDA):
+            return None
+
+        length = file.read(2)
+        if len(length) < 2:
+            return None
+        (size,) = struct.unpack(">H", length)
+
+        if code in _SOF_MARKERS:
+            frame = file.read(5)
+            if len(frame) < 5:
+                return None
+            height, width = struct.unpack(">HH", frame[1:5])
+            return width, height
+
+        file.seek(size - 2, os.SEEK_CUR)
+
+
+def image_size(path: str) -> tuple[int, int] | None:
+    """
+    Reads the width and height of an image from the header of its file.
+    JPEG files are scanned marker by marker up to their frame header, the
+    other formats keep their dimensions in the first bytes.
+
+    Args:
+        path: path of the image
+
+    Returns: (width, height) tuple, or None if the file is not a PNG, GIF,
+        JPEG or WebP image or its header is truncated
+
+    """
+    with open(path, "rb") as file:
+        header = file.read(32)
+
+        if header.startswith(b"\x89PNG\r\n\x1a\n"):
+            size = _png_size(header)
+        elif header[:6] in (b"GIF87a", b"GIF89a"):
+            size = _gif_size(header)
+        elif header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+            size = _webp_size(header)
+        elif header.startswith(b"\xff\xd8"):
+            size = _jpeg_size(file)
+        else:
+            size = None
+
+    if size is None or 0 in size:
+        return None
+    return size
+
+
+def measure_images(
+    path: str = "static",
+    records: dict[str, dict] | None = None,
+    max_workers: int | None = None,
+) -> dict[str, dict]:
+    """
+    Reads the dimensions of the images of the static folder in a thread
+    pool. Images whose stat matches their previous record are not read again.
+
+    Args:
+        path: path of the static folder
+        records: stat and dimensions of every image from the previous build
+        max_workers: maximum number of files read at once
+
+    Returns: stat and dimensions of every image keyed by its source path,
+        with None dimensions for files that could not be read
+
+    """
+
+    def measure(source_path: str, _: dict | None) -> dict:
+        try:
+            size = image_size(source_path)
+        except OSError:
+            size = None
+        width, height = size or (None, None)
+        return {"width": width, "height": height}
+
+    return scan_files(
+        path,
+        records,
+        measure,
+        lambda source_path: os.path.splitext(source_path)[1].lower() in IMAGE_EXTENSIONS,
+        max_workers=max_workers,
+    )
+
+
+def image_sizes(path: str, records: dict[str, dict]) -> dict[str, tuple[int, int]]:
+    """
+    Maps every measured image to its dimensions.
+
+    Args:
+        path: path of the static folder
+        records: stat and dimensions of every image keyed by its source path
+
+    Returns: (width, height) of every readable image keyed by its path
+        relative to the static folder with forward slashes
+
+    """
+    sizes: dict[str, tuple[int, int]] = {}
+
+    for source_path, entry in records.items():
+        if entry["width"] and entry["height"]:
+            relative_path = os.path.relpath(source_path, path).replace(os.sep, "/")
+            sizes[relative_path] = (entry["width"], entry["height"])
+
+    return dict(sorted(sizes.items()))
+
+
+def configure_images(sizes: dict[str, tuple[int, int]]) -> None:
+    """
+    Sets the image dimensions given to img tags. Cached inline nodes are
+    dropped when the dimensions change, since they may contain old ones.
+    Also used as part of the initializer of worker processes.
+
+    Args:
+        sizes: (width, height) of every image keyed by its relative path
+    """
+    global _sizes, _digest
+
+    urls = {f"/{name}": tuple(size) for name, size in sizes.items()}
+    if urls == _sizes:
+        return
+
+    _sizes = urls
+    _digest = ""
+    if sizes:
+        _digest = hashlib.sha256(json.dumps(sorted(urls.items())).encode()).hexdigest()
+    inline_cache.clear()
+
+
+def configured_images() -> dict[str, tuple[int, int]]:
+    """
+    Returns the image dimensions currently given to img tags.
+
+    Returns: (width, height) of every image keyed by its relative path
+
+    """
+    return {url[1:]: size for url, size in _sizes.items()}
+
+
+def images_digest() -> str:
+    """
+    Returns a hash of the image dimensions, empty when there are none.
+    Pages depend on it, since their img tags carry the dimensions.
+
+    Returns: hex digest
+
+    """
+    return _digest
+
+
+def image_props(url: str | None, alt: str) -> dict[str, str | None]:
+    """
+    Builds the attributes of an img tag. Root relative urls of measured
+    images get their width and height, every image is loaded lazily and
+    decoded off the main thread.
+
+    Args:
+        url: url of the image as written in the markdown
+        alt: alt text of the image
+
+    Returns: dictionary of attributes, without the src
+
+    """
+    props: dict[str, str | None] = {"alt": alt}
+
+    if url and _sizes:
+        size = _sizes.get(split_url(url)[0])
+        if size:
+            props["width"] = str(size[0])
+            props["height"] = str(size[1])
+
+    props["loading"] = "lazy"
+    props["decoding"] = "async"
+    return props
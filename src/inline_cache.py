@@ -0,0 +1,115 @@
+"""
+InlineCache class memoizes the HTML nodes parsed from inline markdown text.
+
+Pages repeat a lot of identical inline text, such as list items, disclaimers
+and navigation paragraphs, so the nodes of recently parsed text are kept in a
+bounded LRU cache. Cached node lists are tuples and the nodes are shared
+between trees, so they must not be modified after they are created.
+
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Callable, Self
+
+from htmlnode import HTMLNode
+
+DEFAULT_SIZE = 4096
+
+
+class InlineCache:
+    """
+    LRU cache of the HTML nodes of inline markdown text, keyed by the text.
+
+    Attributes:
+        maxsize: maximum number of cached texts, 0 disables the cache
+        hits: number of lookups served from the cache
+        misses: number of lookups that parsed the text
+        evictions: number of entries dropped to stay within maxsize
+    """
+
+    def __init__(self, maxsize: int = DEFAULT_SIZE) -> None:
+        self.maxsize: int = maxsize
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+        self._entries: OrderedDict[str, tuple[HTMLNode, ...]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(
+        self: Self, text: str, parse: Callable[[str], list[HTMLNode]]
+    ) -> tuple[HTMLNode, ...]:
+        """
+        Returns the cached nodes of the given text, parsing and caching them
+        when they are not cached yet.
+
+        Args:
+            text: inline markdown text
+            parse: function that parses the text into nodes
+
+        Returns: tuple of HTML nodes
+
+        """
+        if not self.maxsize:
+            return tuple(parse(text))
+
+        with self._lock:
+            nodes = self._entries.get(text)
+            if nodes is not None:
+                self._entries.move_to_end(text)
+                self.hits += 1
+                return nodes
+
+        nodes = tuple(parse(text))
+
+        with self._lock:
+            self.misses += 1
+            self._entries[text] = nodes
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+        return nodes
+
+    def configure(self: Self, maxsize: int) -> None:
+        """
+        Changes the size of the cache. A size of 0 disables the cache and
+        drops every entry.
+
+        Args:
+            maxsize: maximum number of cached texts
+        """
+        with self._lock:
+            self.maxsize = maxsize
+            while len(self._entries) > maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self: Self) -> None:
+        """Drops every entry and resets the counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def __len__(self: Self) -> int:
+        return len(self._entries)
+
+    def __repr__(self: Self) -> str:
+        return (
+            f"InlineCache({len(self)}/{self.maxsize}, hits={self.hits}, "
+            f"misses={self.misses}, evictions={self.evictions})"
+        )
+
+
+inline_cache = InlineCache()
+
+
+def configure_inline_cache(maxsize: int) -> None:
+    """
+    Changes the size of the shared inline cache. Used as the initializer of
+    worker processes so they use the same size as the main process.
+
+    Args:
+        maxsize: maximum number of cached texts, 0 disables the cache
+    """
+    inline_cache.configure(maxsize)
@@ -0,0 +1,152 @@
+"""
+Single pass tokenizer for inline markdown.
+
+"""
+
+import re
+from typing import List, TypeAlias
+
+from htmlnode import LeafNode
+from textnode import TextNode, TextType, text_to_html_node
+
+Span: TypeAlias = tuple[TextType, int, int, int, int]
+
+_SPECIAL_RE = re.compile(r"[`*!\[]")
+_IMAGE_RE = re.compile(r"!\[(.*?)]\((.+?)\)")
+_LINK_RE = re.compile(r"\[(.*?)\]\((.*?)\)")
+_DELIMITER_RE = re.compile(r"[`*]")
+
+_DELIMITERS: dict[str, TextType] = {"`": "code", "**": "bold", "*": "italic"}
+
+
+def tokenize_spans(text: str) -> List[Span]:
+    """
+    Splits markdown text into inline spans in a single left to right scan.
+    Supports code, bold, italic, image and link markdown. The content of code,
+    bold and italic sections is not parsed any further, the same way
+    text_to_textnodes has always treated it.
+
+    Spans only hold offsets into the given text, so no substrings are copied
+    until the spans are turned into nodes.
+
+    Args:
+        text: text to be split
+
+    Raises:
+        Exception: if a code, bold or italic delimiter is not closed
+
+    Returns: list of (text type, start, end, url start, url end) spans, the
+        url offsets are -1 for spans without a url
+
+    """
+    spans: List[Span] = []
+    start = 0
+    position = 0
+
+    while match := _SPECIAL_RE.search(text, position):
+        index = match.start()
+        char = text[index]
+
+        if char == "`" or char == "*":
+            delimiter = "**" if text.startswith("**", index) else char
+            content_start = index + len(delimiter)
+            end = text.find(delimiter, content_start)
+
+            if end == -1:
+                raise Exception(
+                    f'Invalid markdown syntax, delimiter "{delimiter}" not closed'
+                )
+
+            if index > start:
+                spans.append(("text", start, index, -1, -1))
+            if end > content_start:
+                spans.append((_DELIMITERS[delimiter], content_start, end, -1, -1))
+
+            position = start = end + len(delimiter)
+            continue
+
+        if char == "!":
+            token = _IMAGE_RE.match(text, index)
+            text_type: TextType = "image"
+        elif index == 0 or text[index - 1] != "!":
+            token = _LINK_RE.match(text, index)
+            text_type = "link"
+
+            # Images are extracted before links, so an image inside the
+            # brackets wins over the link around it.
+            if token and _IMAGE_RE.search(text, index + 1, token.end()):
+                token = None
+        else:
+            token = None
+
+        # Delimiters are split before images and links are extracted, so an
+        # image or link can not span a code, bold or italic delimiter.
+        if token and _DELIMITER_RE.search(text, index, token.end()):
+            token = None
+
+        if not token:
+            position = index + 1
+            continue
+
+        if index > start:
+            spans.append(("text", start, index, -1, -1))
+        spans.append((text_type, *token.span(1), *token.span(2)))
+        position = start = token.end()
+
+    if start < len(text):
+        spans.append(("text", start, len(text), -1, -1))
+
+    return spans
+
+
+def spans_to_textnodes(text: str, spans: List[Span]) -> List[TextNode]:
+    """
+    Converts spans into the text nodes returned by text_to_textnodes.
+
+    Args:
+        text: text the spans point into
+        spans: spans of the text
+
+    Returns: list of TextNodes
+
+    """
+    return [
+        TextNode(text[start:end], text_type, text[url_start:url_end] if url_start >= 0 else None)
+        for text_type, start, end, url_start, url_end in spans
+    ]
+
+
+def spans_to_html_nodes(text: str, spans: List[Span]) -> List[LeafNode]:
+    """
+    Converts spans straight into HTML nodes without building text nodes.
+    Each piece of text is sliced out of the given text exactly once.
+
+    Args:
+        text: text the spans point into
+        spans: spans of the text
+
+    Returns: list of LeafNodes
+
+    """
+    return [
+        text_to_html_node(
+            text[start:end], text_type, text[url_start:url_end] if url_start >= 0 else None
+        )
+        for text_type, start, end, url_start, url_end in spans
+    ]
+
+
+def tokenize_inline(text: str) -> List[TextNode]:
+    """
+    Splits markdown text into text nodes in a single left to right scan.
+
+    Args:
+        text: text to be split
+
+    Raises:
+        Exception: if a code, bold or italic delimiter is not closed
+
+    Returns: list of TextNodes
+
+    """
+    return spans_to_textnodes(text, tokenize_spans(text))
@@ -0,0 +1,211 @@
+"""
+Live reload support for the development servers.
+
+HTML pages served in development get a small script injected that listens to
+a server-sent events endpoint and reloads the page after every rebuild. The
+pages are served from the public folder, or from the MemorySink of a build
+that only keeps its outputs in memory.
+
+"""
+
+import os
+import threading
+from functools import partial
+from http.server import BaseHTTPRequestHandler, SimpleHTTPRequestHandler, ThreadingHTTPServer
+from typing import Self
+
+from sinks import MemorySink
+
+LIVERELOAD_PATH = "/__livereload"
+
+LIVERELOAD_SCRIPT = (
+    "<script>"
+    f'new EventSource("{LIVERELOAD_PATH}").onmessage = () => location.reload();'
+    "</script>"
+)
+
+
+def inject_livereload(html: bytes) -> bytes:
+    """
+    Injects the live reload script into the given page, before the closing
+    body tag or at the end of the page when there is none.
+
+    Args:
+        html: utf-8 encoded page
+
+    Returns: page with the live reload script
+
+    """
+    script = LIVERELOAD_SCRIPT.encode()
+    index = html.rfind(b"</body>")
+
+    if index == -1:
+        return html + script
+
+    return html[:index] + script + html[index:]
+
+
+class LiveReload:
+    """
+    Tracks the number of finished rebuilds and wakes up the clients waiting
+    for the next one.
+
+    Attributes:
+        generation: number of rebuilds announced so far
+    """
+
+    def __init__(self) -> None:
+        self.generation: int = 0
+        self._condition = threading.Condition()
+
+    def notify(self: Self) -> None:
+        """Announces a finished rebuild to every connected client."""
+        with self._condition:
+            self.generation += 1
+            self._condition.notify_all()
+
+    def wait(self: Self, generation: int, timeout: float) -> int:
+        """
+        Waits until a rebuild newer than the given generation is announced.
+
+        Args:
+            generation: last generation seen by the client
+            timeout: maximum number of seconds to wait
+
+        Returns: current generation
+
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: self.generation != generation, timeout)
+            return self.generation
+
+    def handle(self: Self, handler: BaseHTTPRequestHandler, keepalive: float = 15) -> None:
+        """
+        Serves the server-sent events stream on the given request. A comment is
+        sent every keepalive seconds so closed connections are noticed.
+
+        Args:
+            handler: request handler of the live reload request
+            keepalive: seconds between keepalive comments
+        """
+        handler.send_response(200)
+        handler.send_header("Content-Type", "text/event-stream")
+        handler.send_header("Cache-Control", "no-cache")
+        handler.end_headers()
+
+        generation = self.generation
+
+        try:
+            while True:
+                current = self.wait(generation, keepalive)
+                if current != generation:
+                    generation = current
+                    handler.wfile.write(b"data: reload\n\n")
+                else:
+                    handler.wfile.write(b": keepalive\n\n")
+                handler.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+
+class LiveReloadHandler(SimpleHTTPRequestHandler):
+    """
+    Serves a folder like SimpleHTTPRequestHandler, or the outputs of the
+    server's sink, injects the live reload script into html pages and serves
+    the live reload endpoint.
+    """
+
+    server: "LiveReloadServer"
+
+    def do_GET(self: Self) -> None:
+        if self.path == LIVERELOAD_PATH:
+            self.server.livereload.handle(self)
+            return
+
+        url_path = self.path.split("?", 1)[0].split("#", 1)[0]
+        path = self.translate_path(url_path)
+
+        if url_path.endswith("/"):
+            path = os.path.join(path, "index.html")
+
+        if self.server.sink is not None:
+            self._send_output(url_path, path)
+            return
+
+        if not path.endswith(".html") or not os.path.isfile(path):
+            super().do_GET()
+            return
+
+        with open(path, "rb") as file:
+            self._send_body(inject_livereload(file.read()), "text/html; charset=utf-8")
+
+    def _send_output(self: Self, url_path: str, path: str) -> None:
+        """Serves an output of the server's sink, folders redirect to their slash url."""
+        sink = self.server.sink
+
+        try:
+            data = sink.read(path)
+        except KeyError:
+            if os.path.join(path, "index.html") in sink:
+                self.send_response(301)
+                self.send_header("Location", url_path + "/")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+            else:
+                self.send_error(404)
+            return
+
+        if path.endswith(".html"):
+            self._send_body(inject_livereload(data), "text/html; charset=utf-8")
+        else:
+            self._send_body(data, self.guess_type(path))
+
+    def _send_body(self: Self, body: bytes, content_type: str) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class LiveReloadServer(ThreadingHTTPServer):
+    """
+    Threaded HTTP server that knows the LiveReload state of the build.
+
+    Attributes:
+        livereload: rebuild notifications of the build
+        sink: sink holding the outputs of a build kept in memory, None to
+            serve the folder
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self, address, handler, livereload: LiveReload, sink: MemorySink | None = None
+    ) -> None:
+        super().__init__(address, handler)
+        self.livereload: LiveReload = livereload
+        self.sink: MemorySink | None = sink
+
+
+def start_server(
+    directory: str, port: int, livereload: LiveReload, sink: MemorySink | None = None
+) -> LiveReloadServer:
+    """
+    Starts serving the given folder with live reload in a background thread.
+
+    Args:
+        directory: folder to serve
+        port: port to listen on
+        livereload: rebuild notifications of the build
+        sink: serve the outputs this sink holds under the folder instead of
+            the files on disk
+
+    Returns: running server
+
+    """
+    handler = partial(LiveReloadHandler, directory=directory)
+    server = LiveReloadServer(("", port), handler, livereload, sink)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
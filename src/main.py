@@ -1,22 +1,64 @@
+import argparse
+import asyncio
 import os
-import re
-from shutil import rmtree, copy
-from markdown_handler import markdown_to_html_node
+import sys
+import time
+from contextlib import nullcontext
+from compress import compress_outputs, remove_compressed
+from devserver import serve
+from fingerprint import (
+    ASSET_MANIFEST,
+    asset_names,
+    configure_assets,
+    configured_assets,
+    hash_assets,
+    write_asset_manifest,
+)
+from images import configure_images, image_sizes, measure_images
+from inline_cache import DEFAULT_SIZE, configure_inline_cache, inline_cache
+from livereload import LiveReload, start_server
+from manifest import BuildManifest, MANIFEST_PATH, template_digest
+from minify import configure_minify
+from output import ChangeSet
+from pages import (
+    BuildError,
+    PageResult,
+    build_pages,
+    collect_pages,
+    extract_title,
+    page_output_path,
+    render_page,
+)
+from pipeline import build_pages_async
+from placement import STRATEGIES, Placer
+from profiler import BuildProfile
+from server import write_etags
+from sinks import DISK_SINK, DiskSink, MemorySink, OutputSink
+from static_sync import sync_static
+from stylesheets import DEFAULT_MAX_SIZE, configure_inline_css, fingerprint_stylesheets
+from template import load_template
+from watch import Watcher
 
 
-def copy_static(path: str = "static", dest: str = "public") -> None:
+def copy_static(
+    path: str = "static",
+    dest: str = "public",
+    placer: Placer | None = None,
+    sink: OutputSink | None = None,
+) -> None:
     """
     A recursive function that copies the contents of the given folder to a public folder.
     By default the static folder at root is used.
 
     Args:
         path: path of the folder to copy
+        dest: path of the public folder
+        placer: places the files with its strategy instead of copying them
+        sink: sink the files are written to, the disk when None
     """
-
-    if os.path.exists(dest):
-        rmtree(dest)
-
-    os.mkdir(dest)
+    if sink is None:
+        sink = DiskSink(placer)
+    sink.reset(dest)
 
     if os.path.exists(path):
         items = os.listdir(path)
@@ -25,33 +67,89 @@ def copy_static(path: str = "static", dest: str = "public") -> None:
             dest_path = os.path.join(dest, item)
 
             if os.path.isdir(item_path):
-                copy_static(item_path, dest_path)
+                copy_static(item_path, dest_path, sink=sink)
             else:
-                copy(item_path, dest_path)
+                sink.copy_file(item_path, dest_path)
 
 
-def extract_title(markdown: str) -> str:
+def fingerprint_static(
+    manifest: BuildManifest, static_path: str = "static"
+) -> tuple[dict[str, str], dict[str, bytes]]:
     """
-    Extracts the title from the given markdown string.
-    Raises an exception if the title is not found.
+    Hashes the static assets, reusing the hashes of unchanged files from the
+    manifest, rewrites the urls inside the stylesheets and rewrites urls to
+    the fingerprinted names from now on.
 
     Args:
-        markdown: markdown string to extract title from
+        manifest: manifest the hashes are kept in
+        static_path: path of the static folder
 
-    Raises:
-        Exception: when no h1 title is found
+    Returns: fingerprinted name of every asset keyed by its relative path, and
+        the rewritten content of every stylesheet keyed by its relative path
 
-    Returns: title as string
+    """
+    manifest.fingerprints = hash_assets(static_path, manifest.fingerprints)
+    names = asset_names(static_path, manifest.fingerprints)
+    names, stylesheets = fingerprint_stylesheets(static_path, names)
+    configure_assets(names)
+    return names, stylesheets
 
+
+def measure_static(manifest: BuildManifest, static_path: str = "static") -> None:
     """
-    title = re.search(r"^# (.+)", markdown, re.MULTILINE)
-    if title:
-        return title.group(1)
+    Reads the dimensions of the static images, reusing the dimensions of
+    unchanged files from the manifest, and gives them to img tags from now on.
+
+    Args:
+        manifest: manifest the dimensions are kept in
+        static_path: path of the static folder
+    """
+    manifest.images = measure_images(static_path, manifest.images)
+    configure_images(image_sizes(static_path, manifest.images))
 
-    raise Exception("Title not found")
 
+def generate_pages_recursive(
+    dir_path_content: str,
+    template_path: str,
+    dest_dir_path: str,
+    manifest: BuildManifest | None = None,
+    jobs: int = 1,
+    fail_fast: bool = False,
+    profile: BuildProfile | None = None,
+    changes: ChangeSet | None = None,
+    use_async: bool = False,
+    stream: bool = False,
+    sink: OutputSink = DISK_SINK,
+) -> list[PageResult]:
+    """
+    Generates html pages for every markdown file in the content folder.
+    The content folder is walked into a work list first and the pages are
+    then rendered, in a process pool when jobs is above one. When a manifest
+    is given, pages whose source is unchanged are skipped. Pages whose output
+    is identical to the file on disk are not rewritten. With use_async the
+    pages go through the asyncio pipeline, which reads and writes files while
+    other pages are rendered. With stream every page is converted block by
+    block, so very large files are never held in memory at once. The pages
+    are written to the given sink. Every page is rendered for sinks that only
+    exist in this process, the manifest then only tracks the pages they hold
+    so remove_stale can delete the outputs of deleted sources.
 
-def generate_pages_recursive(dir_path_content: str, template_path: str, dest_dir_path: str) -> None:
+    Args:
+        dir_path_content: path of the content folder
+        template_path: path of the html template
+        dest_dir_path: path of the folder where pages are written
+        manifest: manifest of the previous build
+        jobs: number of worker processes
+        fail_fast: stop at the first failed page
+        profile: profile the pages are recorded in
+        changes: change list the written pages are recorded in
+        use_async: render the pages with the asyncio pipeline
+        stream: generate the pages block by block
+        sink: sink the pages are written to
+
+    Returns: list of results of the rendered pages
+
+    """
 
     if not os.path.exists(dir_path_content):
         raise Exception("source file does not exist")
@@ -59,39 +157,490 @@ def generate_pages_recursive(dir_path_content: str, template_path: str, dest_dir
     if not os.path.exists(template_path):
         raise Exception("template file does not exist")
 
-    if not os.path.exists(dest_dir_path):
-        os.mkdir(dest_dir_path)
+    with profile.stage("collect") if profile else nullcontext():
+        pages = collect_pages(dir_path_content, dest_dir_path, sink)
+
+        if manifest and sink.in_process:
+            manifest.seen.update(source_path for source_path, _ in pages)
+        elif manifest:
+            pages = [page for page in pages if not manifest.is_fresh(*page)]
+
+    with profile.stage("pages") if profile else nullcontext():
+        if use_async:
+            results = asyncio.run(
+                build_pages_async(
+                    pages, template_path, jobs, fail_fast, profile is not None, sink=sink
+                )
+            )
+        else:
+            results = build_pages(
+                pages, template_path, jobs, fail_fast, profile is not None, stream, sink
+            )
+
+    if profile:
+        for result in results:
+            profile.add(result.profile, result.bytes_written)
+
+    if changes is not None:
+        for result in results:
+            changes.record(result.path, result.status)
+
+    if manifest:
+        for result in results:
+            if not result.error:
+                manifest.record(result.source, result.path)
+
+    return results
+
+
+def rebuild_changes(
+    changed: set[str],
+    manifest: BuildManifest,
+    dir_path_content: str = "content",
+    template_path: str = "template.html",
+    static_path: str = "static",
+    dest_dir_path: str = "public",
+    gzip_min_size: int | None = None,
+    sink: OutputSink = DISK_SINK,
+    changes: ChangeSet | None = None,
+    use_hash: bool = False,
+    dedup: bool = False,
+) -> list[PageResult]:
+    """
+    Rebuilds only the outputs affected by the changed paths. Changed pages
+    are rendered again and removed pages are deleted, a changed template
+    rebuilds every page and changed static files are synced. When assets are
+    fingerprinted and their names change, or when the dimensions of an image
+    change, every page is rebuilt as well. The .gz files of rewritten
+    outputs are refreshed, or removed when compression is off. The sink and
+    the static options are those of the initial build, so a rebuild places
+    files the same way.
+
+    Args:
+        changed: paths that were added, modified or removed
+        manifest: manifest of the running build
+        dir_path_content: path of the content folder
+        template_path: path of the html template
+        static_path: path of the static folder
+        dest_dir_path: path of the folder where pages are written
+        gzip_min_size: smallest output that gets a .gz file, None when
+            outputs are not compressed
+        sink: sink the outputs are written to
+        changes: change list the written and removed outputs are recorded in
+        use_hash: compare static files by content hash when their mtime differs
+        dedup: link byte-identical static files instead of placing them again
+
+    Returns: list of results of the rendered pages
+
+    """
+    results: list[PageResult] = []
+    removed: list[str] = []
+    static_changed = any(path.startswith(static_path + os.sep) for path in changed)
+    names = configured_assets()
+    stylesheets: dict[str, bytes] = {}
+
+    if static_changed:
+        measure_static(manifest, static_path)
+        if names:
+            names, stylesheets = fingerprint_static(manifest, static_path)
+
+    if manifest.refresh_template(template_path) | manifest.refresh_assets():
+        manifest.seen.clear()
+        results = generate_pages_recursive(
+            dir_path_content, template_path, dest_dir_path, manifest, changes=changes, sink=sink
+        )
+        removed = manifest.remove_stale(sink)
+    else:
+        for path in sorted(changed):
+            if not path.startswith(dir_path_content + os.sep) or not path.endswith(".md"):
+                continue
+
+            if not os.path.exists(path):
+                if output := manifest.remove(path, sink):
+                    removed.append(output)
+                continue
+
+            dest_path = page_output_path(path, dir_path_content, dest_dir_path)
+            sink.makedirs(os.path.dirname(dest_path))
+            result = render_page(path, template_path, dest_path, sink=sink)
+            if not result.error:
+                manifest.record(path, dest_path)
+            if changes is not None:
+                changes.record(result.path, result.status)
+            results.append(result)
+
+    if changes is not None:
+        for path in removed:
+            changes.record_removed(path)
+
+    if static_changed:
+        sync_static(
+            static_path,
+            dest_dir_path,
+            manifest,
+            use_hash,
+            changes=changes,
+            dedup=dedup,
+            names=names,
+            stylesheets=stylesheets,
+            sink=sink,
+        )
+        if names:
+            status = write_asset_manifest(dest_dir_path, names, sink)
+            if changes is not None:
+                changes.record(os.path.join(dest_dir_path, ASSET_MANIFEST), status)
+
+    if gzip_min_size is not None:
+        compress_outputs(dest_dir_path, manifest, gzip_min_size, changes=changes)
+    elif manifest.compressed:
+        remove_compressed(manifest, changes)
 
-    for item in os.listdir(dir_path_content):
-        item_path = os.path.join(dir_path_content, item)
+    return results
 
-        if os.path.isdir(item_path):
-            dest_folder_path = os.path.join(dest_dir_path, item)
-            generate_pages_recursive(item_path, template_path, dest_folder_path)
-        elif item.endswith(".md"):
-            item_name = os.path.splitext(item)[0]
-            dest_path = os.path.join(dest_dir_path, item_name + ".html")
 
-            with open(item_path, "r", encoding="utf-8") as file:
-                content = file.read()
-                title = extract_title(content)
-                html = markdown_to_html_node(content)
+def watch(
+    manifest: BuildManifest,
+    port: int,
+    changes: ChangeSet,
+    changes_path: str,
+    sink: OutputSink = DISK_SINK,
+    use_hash: bool = False,
+    dedup: bool = False,
+    gzip_min_size: int | None = None,
+) -> None:
+    """
+    Serves the public folder with live reload and rebuilds the affected
+    outputs whenever the content, static files or template change. Rebuilds
+    keep the sink and options of the initial build, refresh the ETag file and
+    add their outputs to the change list of the initial build. A sink that
+    only exists in this process is served directly and nothing but the
+    change list is written to disk.
+
+    Args:
+        manifest: manifest of the initial build
+        port: port of the development server
+        changes: change list of the initial build
+        changes_path: path the change list is written to after every rebuild
+        sink: sink the outputs are written to
+        use_hash: compare static files by content hash when their mtime differs
+        dedup: link byte-identical static files instead of placing them again
+        gzip_min_size: smallest output that gets a .gz file, None when
+            outputs are not compressed
+    """
+    livereload = LiveReload()
+    start_server("public", port, livereload, sink if sink.in_process else None)
+    origin = "memory" if sink.in_process else "public/"
+    print(f"serving {origin} on http://localhost:{port}, watching for changes")
+
+    watcher = Watcher(["content", "static", *load_template("template.html").dependencies])
 
-                with open(template_path, "r", encoding="utf-8") as template_file:
-                    template = template_file.read()
-                    template = template.replace("{{ Title }}", title)
-                    template = template.replace("{{ Content }}", html.to_html())
+    while True:
+        changed = watcher.wait()
+        start = time.perf_counter()
 
-                    with open(dest_path, "w", encoding="utf-8") as output_file:
-                        output_file.write(template)
+        try:
+            results = rebuild_changes(
+                changed,
+                manifest,
+                gzip_min_size=gzip_min_size,
+                sink=sink,
+                changes=changes,
+                use_hash=use_hash,
+                dedup=dedup,
+            )
+            if not sink.in_process:
+                write_etags("public", compressed=manifest.compressed)
+                manifest.save()
+            changes.write(changes_path)
+            watcher.paths = ["content", "static", *load_template("template.html").dependencies]
+        except Exception as e:
+            print(f"error: {e}", file=sys.stderr)
+            continue
 
+        for result in results:
+            if result.error:
+                print(f"error: {result.source}: {result.error}", file=sys.stderr)
 
+        livereload.notify()
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"rebuilt {len(results)} pages for {len(changed)} changes in {elapsed:.0f} ms")
 
 
-def main():
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    """
+    Parses the command line arguments of the program.
+
+    Args:
+        argv: arguments to parse, defaults to sys.argv
+
+    Returns: parsed arguments
+
+    """
+    parser = argparse.ArgumentParser(description="Static site generator")
+    parser.add_argument(
+        "--force", action="store_true", help="rebuild every page even if unchanged"
+    )
+    parser.add_argument(
+        "--clean",
+        action="store_true",
+        help="wipe the public folder and copy every static file again",
+    )
+    parser.add_argument(
+        "--hash-static",
+        action="store_true",
+        help="compare static files by content hash when their mtime differs",
+    )
+    parser.add_argument(
+        "--fingerprint",
+        action="store_true",
+        help="publish css, js, images and fonts under content hashed names",
+    )
+    parser.add_argument(
+        "--static-strategy",
+        choices=STRATEGIES,
+        default="copy",
+        help="how static files are placed, falls back to copying when unsupported",
+    )
+    parser.add_argument(
+        "--dedup-static",
+        action="store_true",
+        help="hard link byte-identical static files to a single copy",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="number of processes rendering pages, 0 uses every core",
+    )
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument(
+        "--async",
+        dest="use_async",
+        action="store_true",
+        help="overlap reading and writing files with rendering in an asyncio pipeline",
+    )
+    mode.add_argument(
+        "--stream",
+        action="store_true",
+        help="convert pages block by block so huge files are never fully in memory",
+    )
+    parser.add_argument(
+        "--fail-fast", action="store_true", help="stop the build at the first failed page"
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="record per page stage timings and print the slowest pages and stages",
+    )
+    parser.add_argument(
+        "--profile-top", type=int, default=10, help="number of slowest entries to print"
+    )
+    parser.add_argument(
+        "--trace",
+        default="build-trace.json",
+        help="path of the Chrome trace event file written by --profile",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="serve public/ with live reload and rebuild on every change",
+    )
+    parser.add_argument(
+        "--memory",
+        action="store_true",
+        help="with --watch, keep the outputs in memory and serve them from there",
+    )
+    parser.add_argument(
+        "--serve",
+        action="store_true",
+        help="skip the build and render pages on demand in a development server",
+    )
+    parser.add_argument(
+        "--port", type=int, default=8888, help="port of the development server"
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=256,
+        help="number of rendered pages kept in memory by --serve",
+    )
+    parser.add_argument(
+        "--inline-cache-size",
+        type=int,
+        default=DEFAULT_SIZE,
+        help="number of parsed inline texts kept in memory, 0 disables the cache",
+    )
+    parser.add_argument(
+        "--minify",
+        action="store_true",
+        help="strip whitespace, comments and optional quotes from the generated pages",
+    )
+    parser.add_argument(
+        "--inline-css",
+        action="store_true",
+        help="inline small stylesheets linked from the template, preload the larger ones",
+    )
+    parser.add_argument(
+        "--inline-css-max-size",
+        type=int,
+        default=DEFAULT_MAX_SIZE,
+        help="largest stylesheet in bytes that is inlined by --inline-css",
+    )
+    parser.add_argument(
+        "--gzip",
+        action="store_true",
+        help="write .gz files next to html, css and other text outputs",
+    )
+    parser.add_argument(
+        "--gzip-min-size",
+        type=int,
+        default=1024,
+        help="smallest output in bytes that gets a .gz file",
+    )
+    parser.add_argument(
+        "--changes",
+        default="build-changes.json",
+        help="path of the JSON list of added, changed and removed outputs",
+    )
+    args = parser.parse_args(argv)
+
+    if args.memory and not args.watch:
+        parser.error("--memory requires --watch")
+    if args.memory and (args.gzip or args.clean):
+        parser.error("--memory can not be combined with --gzip or --clean")
+
+    return args
+
+
+def main(argv: list[str] | None = None):
     """Main function for the program"""
-    copy_static()
-    generate_pages_recursive("content", "template.html", "public")
+    args = parse_args(argv)
+    configure_inline_cache(args.inline_cache_size)
+    configure_minify(args.minify)
+    configure_inline_css(args.inline_css_max_size if args.inline_css else 0)
+
+    if args.serve:
+        try:
+            serve(args.port, cache_size=args.cache_size)
+        except KeyboardInterrupt:
+            pass
+        return
+
+    profile = BuildProfile() if args.profile else None
+    if args.memory:
+        manifest = BuildManifest(MANIFEST_PATH, template_digest("template.html"))
+    else:
+        manifest = BuildManifest.load(MANIFEST_PATH, "template.html", force=args.force)
+
+    changes = ChangeSet("public")
+
+    placer = Placer(args.static_strategy)
+    sink = MemorySink() if args.memory else DiskSink(placer)
+    names: dict[str, str] = {}
+    stylesheets: dict[str, bytes] = {}
+
+    if args.fingerprint:
+        with profile.stage("fingerprint") if profile else nullcontext():
+            names, stylesheets = fingerprint_static(manifest)
+    with profile.stage("images") if profile else nullcontext():
+        measure_static(manifest)
+    manifest.refresh_assets()
+
+    with profile.stage("static") if profile else nullcontext():
+        if args.clean:
+            sink.reset("public")
+        stats = sync_static(
+            manifest=manifest,
+            use_hash=args.hash_static,
+            changes=changes,
+            dedup=args.dedup_static,
+            names=names,
+            stylesheets=stylesheets,
+            sink=sink,
+        )
+        print(f"static: {stats}")
+
+        asset_manifest = os.path.join("public", ASSET_MANIFEST)
+        if names:
+            changes.record(asset_manifest, write_asset_manifest("public", names, sink))
+        elif sink.remove(asset_manifest):
+            changes.record_removed(asset_manifest)
+
+    if placer.counts and args.static_strategy != "copy":
+        print(f"static placement: {placer.counts}")
+
+    jobs = args.jobs or os.cpu_count() or 1
+    try:
+        results = generate_pages_recursive(
+            "content",
+            "template.html",
+            "public",
+            manifest,
+            jobs,
+            args.fail_fast,
+            profile,
+            changes,
+            args.use_async,
+            args.stream,
+            sink,
+        )
+    except BuildError as e:
+        print(f"error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    for path in manifest.remove_stale(sink):
+        changes.record_removed(path)
+
+    if args.gzip:
+        with profile.stage("compress") if profile else nullcontext():
+            gzip_stats = compress_outputs(
+                "public", manifest, args.gzip_min_size, changes=changes
+            )
+        print(f"gzip: {gzip_stats}")
+    elif manifest.compressed:
+        print(f"gzip: removed {remove_compressed(manifest, changes)} files")
+
+    if not sink.in_process:
+        with profile.stage("etags") if profile else nullcontext():
+            write_etags("public", compressed=manifest.compressed)
+        manifest.save()
+
+    changes.write(args.changes)
+    print(f"outputs: {changes}")
+
+    if profile:
+        print(profile.report(args.profile_top))
+        profile.write_trace(args.trace)
+        if inline_cache.hits or inline_cache.misses:
+            print(f"inline cache: {inline_cache}")
+
+    failed = [result for result in results if result.error]
+    for result in failed:
+        print(f"error: {result.source}: {result.error}", file=sys.stderr)
+
+    print(f"pages: rendered {len(results) - len(failed)}, failed {len(failed)}")
+    if args.minify:
+        print(f"minify: saved {sum(result.bytes_saved for result in results)} bytes")
+
+    if args.watch:
+        try:
+            watch(
+                manifest,
+                args.port,
+                changes,
+                args.changes,
+                sink,
+                args.hash_static,
+                args.dedup_static,
+                args.gzip_min_size if args.gzip else None,
+            )
+        except KeyboardInterrupt:
+            return
+
+    if failed:
+        sys.exit(1)
 
 
-main()
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,292 @@
+"""
+BuildManifest class records the inputs each generated page was built from,
+so that unchanged pages can be skipped on the next build.
+
+"""
+
+import hashlib
+import json
+import os
+from typing import Self
+
+from fingerprint import assets_digest
+from images import images_digest
+from output import file_hash
+from sinks import DISK_SINK, OutputSink
+from template import compile_options, load_template
+
+GENERATOR_VERSION = "1"
+MANIFEST_PATH = ".build-manifest.json"
+
+
+def template_digest(template_path: str) -> str:
+    """
+    Calculates a hash over the template and every layout, partial and inlined
+    stylesheet it uses, and over the options the template is compiled with.
+
+    Args:
+        template_path: path of the template
+
+    Returns: hex digest of the template files
+
+    """
+    digest = hashlib.sha256()
+
+    for dependency in load_template(template_path).dependencies:
+        digest.update(file_hash(dependency).encode())
+    if any(compile_options()):
+        digest.update(repr(compile_options()).encode())
+
+    return digest.hexdigest()
+
+
+class BuildManifest:
+    """
+
+    Attributes:
+        path: path of the manifest file
+        template_hash: hash of the template files used for the current build
+        pages: build record of each page keyed by the source path. Records
+            invalidated by a template, option or asset change are kept with
+            a dirty flag, so the outputs of deleted sources are still removed
+        assets: output paths of the static assets synced by the last build
+        compressed: stat and hash of every output with a .gz sibling, keyed by
+            the output path
+        fingerprints: stat and hash of every fingerprinted asset, keyed by the
+            source path
+        assets_hash: hash of the fingerprinted asset names the pages use
+        images: stat and dimensions of every image, keyed by the source path
+        images_hash: hash of the image dimensions the pages use
+        seen: source paths visited during the current build
+    """
+
+    def __init__(
+        self,
+        path: str,
+        template_hash: str,
+        pages=None,
+        assets=None,
+        compressed=None,
+        fingerprints=None,
+        assets_hash="",
+        images=None,
+        images_hash="",
+    ) -> None:
+        self.path: str = path
+        self.template_hash: str = template_hash
+        self.pages: dict[str, dict] = pages or {}
+        self.assets: set[str] = set(assets or [])
+        self.compressed: dict[str, dict] = compressed or {}
+        self.fingerprints: dict[str, dict] = fingerprints or {}
+        self.assets_hash: str = assets_hash
+        self.images: dict[str, dict] = images or {}
+        self.images_hash: str = images_hash
+        self.seen: set[str] = set()
+
+    @classmethod
+    def load(cls, path: str, template_path: str, force: bool = False) -> Self:
+        """
+        Loads the manifest from the given path. Previous page records are
+        dropped when the manifest is missing or unreadable or when the
+        generator version has changed, and marked dirty when the template has
+        changed or force is set. The list of synced static assets and the
+        records of compressed outputs, fingerprinted assets and measured
+        images survive template changes and forced builds.
+
+        Args:
+            path: path of the manifest file
+            template_path: path of the template used for the build
+            force: rebuild every page
+
+        Returns: BuildManifest
+
+        """
+        template_hash = template_digest(template_path)
+        data = {}
+
+        if os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as file:
+                    data = json.load(file)
+            except (OSError, ValueError):
+                data = {}
+
+        if data.get("version") != GENERATOR_VERSION:
+            return cls(path, template_hash)
+
+        manifest = cls(
+            path,
+            template_hash,
+            data.get("pages"),
+            data.get("assets"),
+            data.get("compressed"),
+            data.get("fingerprints"),
+            data.get("assets_hash", ""),
+            data.get("images"),
+            data.get("images_hash", ""),
+        )
+        if force or data.get("template_hash") != template_hash:
+            manifest.invalidate()
+
+        return manifest
+
+    def invalidate(self: Self) -> None:
+        """
+        Marks every page record dirty, so every page is rebuilt while the
+        outputs of sources deleted meanwhile are still removed by
+        remove_stale.
+        """
+        for entry in self.pages.values():
+            entry["dirty"] = True
+
+    def refresh_template(self: Self, template_path: str) -> bool:
+        """
+        Hashes the template files again and marks every page record dirty
+        when they have changed since the manifest was loaded.
+
+        Args:
+            template_path: path of the template used for the build
+
+        Returns: True if the template has changed, False otherwise
+
+        """
+        template_hash = template_digest(template_path)
+
+        if template_hash == self.template_hash:
+            return False
+
+        self.template_hash = template_hash
+        self.invalidate()
+        return True
+
+    def refresh_assets(self: Self) -> bool:
+        """
+        Marks every page record dirty when the fingerprinted asset names or the
+        image dimensions differ from the ones the pages were built with, since
+        their urls and img tags changed.
+
+        Returns: True if the asset names or image dimensions have changed,
+            False otherwise
+
+        """
+        if assets_digest() == self.assets_hash and images_digest() == self.images_hash:
+            return False
+
+        self.assets_hash = assets_digest()
+        self.images_hash = images_digest()
+        self.invalidate()
+        return True
+
+    def is_fresh(self: Self, source_path: str, dest_path: str) -> bool:
+        """
+        Checks if the page built from the given source is up to date.
+        The stat of the source is compared first and the content hash only
+        when the stat has changed.
+
+        Args:
+            source_path: path of the markdown source
+            dest_path: path of the generated page
+
+        Returns: True if the page does not need to be rebuilt, False otherwise
+
+        """
+        self.seen.add(source_path)
+        entry = self.pages.get(source_path)
+
+        if not entry or entry.get("dirty") or entry["output"] != dest_path:
+            return False
+        if not os.path.exists(dest_path):
+            return False
+
+        stat = os.stat(source_path)
+        if stat.st_mtime_ns == entry["mtime_ns"] and stat.st_size == entry["size"]:
+            return True
+
+        if file_hash(source_path) != entry["sha256"]:
+            return False
+
+        entry["mtime_ns"] = stat.st_mtime_ns
+        entry["size"] = stat.st_size
+        return True
+
+    def record(self: Self, source_path: str, dest_path: str) -> None:
+        """
+        Records that the page was built from the current state of the source.
+
+        Args:
+            source_path: path of the markdown source
+            dest_path: path of the generated page
+        """
+        stat = os.stat(source_path)
+        self.seen.add(source_path)
+        self.pages[source_path] = {
+            "output": dest_path,
+            "mtime_ns": stat.st_mtime_ns,
+            "size": stat.st_size,
+            "sha256": file_hash(source_path),
+        }
+
+    def remove(self: Self, source_path: str, sink: OutputSink = DISK_SINK) -> str | None:
+        """
+        Deletes the output of the page built from the given source and drops
+        the page from the manifest.
+
+        Args:
+            source_path: path of the markdown source
+            sink: sink holding the output
+
+        Returns: path of the removed output, None if there was none
+
+        """
+        entry = self.pages.pop(source_path, None)
+
+        if entry and sink.remove(entry["output"]):
+            return entry["output"]
+
+        return None
+
+    def remove_stale(self: Self, sink: OutputSink = DISK_SINK) -> list[str]:
+        """
+        Deletes the outputs of pages whose source was not seen during the
+        current build and drops them from the manifest.
+
+        Args:
+            sink: sink holding the outputs
+
+        Returns: list of removed output paths
+
+        """
+        removed: list[str] = []
+
+        for source_path in list(self.pages):
+            if source_path in self.seen:
+                continue
+
+            output = self.remove(source_path, sink)
+            if output:
+                removed.append(output)
+
+        return removed
+
+    def save(self: Self) -> None:
+        """
+        Writes the manifest to disk. The file is replaced atomically so an
+        interrupted build never leaves a truncated manifest behind.
+        """
+        data = {
+            "version": GENERATOR_VERSION,
+            "template_hash": self.template_hash,
+            "pages": self.pages,
+            "assets": sorted(self.assets),
+            "compressed": self.compressed,
+            "fingerprints": self.fingerprints,
+            "assets_hash": self.assets_hash,
+            "images": self.images,
+            "images_hash": self.images_hash,
+        }
+        tmp_path = self.path + ".tmp"
+
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump(data, file, indent=1, sort_keys=True)
+
+        os.replace(tmp_path, self.path)
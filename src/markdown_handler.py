@@ -4,9 +4,12 @@ TODO
 """
 
 import re
-from typing import List, get_args
+from typing import Iterable, Iterator, List, get_args
 from htmlnode import ParentNode, HTMLNode, LeafNode
-from textnode import BlockType, TextNode, SplittableTextType, text_node_to_html_node
+from inline_cache import inline_cache
+from inline_parser import spans_to_html_nodes, tokenize_inline, tokenize_spans
+from block_scanner import scan_blocks
+from textnode import BlockType, TextNode, SplittableTextType
 from markdown_utils import (
     get_heading_level,
     is_heading_block,
@@ -201,21 +204,7 @@ def text_to_textnodes(text: str) -> List[TextNode]:
     Returns: list of TextNodes
 
     """
-    result: List[TextNode] = [TextNode(text, "text")]
-
-    markdown_nodes: List[tuple[str, SplittableTextType]] = [
-        ("`", "code"),
-        ("**", "bold"),
-        ("*", "italic"),
-    ]
-
-    for delimiter, text_type in markdown_nodes:
-        result = split_nodes_delimiter(result, delimiter, text_type)
-
-    result = split_nodes_image(result)
-    result = split_nodes_link(result)
-
-    return result
+    return tokenize_inline(text)
 
 
 def markdown_to_blocks(text: str) -> List[str]:
@@ -260,14 +249,42 @@ def block_to_block_type(block: str) -> BlockType:
 
 
 def markdown_to_html_node(markdown) -> HTMLNode:
-    blocks = markdown_to_blocks(markdown)
     children = []
-    for block in blocks:
-        html_node = block_to_html_node(block)
+    for block_type, lines in scan_blocks(markdown.split("\n")):
+        html_node = lines_to_html_node(block_type, lines)
         children.append(html_node)
     return ParentNode("div", children, None)
 
 
+def markdown_lines_to_html(lines: Iterable[str]) -> Iterator[str]:
+    """
+    Converts a markdown document to HTML one block at a time. Only the block
+    being converted is kept in memory, so the lines can be read lazily from a
+    file. The fragments join to the same HTML as markdown_to_html_node.
+
+    Args:
+        lines: lines of the document without line endings
+
+    Raises:
+        ValueError: if the document has no blocks
+
+    Returns: iterator of HTML fragments
+
+    """
+    empty = True
+
+    for block_type, block_lines in scan_blocks(lines):
+        if empty:
+            yield "<div>"
+            empty = False
+        yield from lines_to_html_node(block_type, block_lines).iter_html()
+
+    if empty:
+        raise ValueError("ParentNode must have children")
+
+    yield "</div>"
+
+
 def block_to_html_node(block: str) -> HTMLNode:
     """
     Checks the type of block and converts it to an HTML node.
@@ -281,38 +298,54 @@ def block_to_html_node(block: str) -> HTMLNode:
     Returns:
 
     """
-    block_type = block_to_block_type(block)
+    return lines_to_html_node(block_to_block_type(block), block.split("\n"))
+
+
+def lines_to_html_node(block_type: BlockType, lines: List[str]) -> HTMLNode:
+    """
+    Converts the lines of a block of the given type to an HTML node.
+
+    Args:
+        block_type: type of the block
+        lines: lines of the block
+
+    Raises:
+        ValueError: if the block type is invalid
+
+    Returns:
+
+    """
     if block_type == "paragraph":
-        return paragraph_to_html_node(block)
+        return _paragraph_lines_to_html_node(lines)
     if block_type == "heading":
-        return heading_to_html_node(block)
+        return _heading_lines_to_html_node(lines)
     if block_type == "code":
-        return code_to_html_node(block)
+        return _code_lines_to_html_node(lines)
     if block_type == "ordered_list":
-        return olist_to_html_node(block)
+        return _olist_lines_to_html_node(lines)
     if block_type == "unordered_list":
-        return ulist_to_html_node(block)
+        return _ulist_lines_to_html_node(lines)
     if block_type == "quote":
-        return quote_to_html_node(block)
+        return _quote_lines_to_html_node(lines)
     raise ValueError("Invalid block type")
 
 
-def text_to_children(text: str) -> List[HTMLNode]:
+def text_to_children(text: str) -> tuple[HTMLNode, ...]:
     """
-    Converts inline markdown text to a list of HTML nodes.
+    Converts inline markdown text to HTML nodes. The nodes of repeated text
+    come from the inline cache and are shared, so they must not be modified.
 
     Args:
         text: text to be converted
 
-    Returns: list of HTML nodes
+    Returns: tuple of HTML nodes
 
     """
-    text_nodes = text_to_textnodes(text)
-    children = []
-    for text_node in text_nodes:
-        html_node = text_node_to_html_node(text_node)
-        children.append(html_node)
-    return children
+    return inline_cache.get(text, _parse_inline)
+
+
+def _parse_inline(text: str) -> list[HTMLNode]:
+    return spans_to_html_nodes(text, tokenize_spans(text))
 
 
 def paragraph_to_html_node(block: str) -> HTMLNode:
@@ -324,10 +357,7 @@ def paragraph_to_html_node(block: str) -> HTMLNode:
     Returns:
 
     """
-    lines = block.split("\n")
-    paragraph = " ".join(lines)
-    children = text_to_children(paragraph)
-    return ParentNode("p", children)
+    return _paragraph_lines_to_html_node(block.split("\n"))
 
 
 def heading_to_html_node(block: str) -> HTMLNode:
@@ -339,43 +369,67 @@ def heading_to_html_node(block: str) -> HTMLNode:
     Returns:
 
     """
+    return _heading_lines_to_html_node(block.split("\n"))
+
+
+def code_to_html_node(block):
+    return _code_lines_to_html_node(block.split("\n"))
+
+
+def olist_to_html_node(block):
+    return _olist_lines_to_html_node(block.split("\n"))
+
+
+def ulist_to_html_node(block):
+    return _ulist_lines_to_html_node(block.split("\n"))
+
+
+def quote_to_html_node(block):
+    return _quote_lines_to_html_node(block.split("\n"))
+
+
+def _paragraph_lines_to_html_node(lines: List[str]) -> HTMLNode:
+    paragraph = " ".join(lines)
+    children = text_to_children(paragraph)
+    return ParentNode("p", children)
+
+
+def _heading_lines_to_html_node(lines: List[str]) -> HTMLNode:
+    block = "\n".join(lines)
     level = get_heading_level(block)
     text = block[level + 1 :]
     children = text_to_children(text)
     return ParentNode(f"h{level}", children)
 
 
-def code_to_html_node(block):
-    if not block.startswith("```") or not block.endswith("```"):
+def _code_lines_to_html_node(lines: List[str]) -> HTMLNode:
+    if not lines[0].startswith("```") or not lines[-1].endswith("```"):
         raise ValueError("Invalid code block")
-    text = block[4:-3]
+    text = "\n".join(lines)[4:-3]
     children = text_to_children(text)
     code = ParentNode("code", children)
     return ParentNode("pre", [code])
 
 
-def olist_to_html_node(block):
-    items = block.split("\n")
+def _olist_lines_to_html_node(lines: List[str]) -> HTMLNode:
     html_items = []
-    for item in items:
+    for item in lines:
         text = item[3:]
         children = text_to_children(text)
         html_items.append(ParentNode("li", children))
     return ParentNode("ol", html_items)
 
 
-def ulist_to_html_node(block):
-    items = block.split("\n")
+def _ulist_lines_to_html_node(lines: List[str]) -> HTMLNode:
     html_items = []
-    for item in items:
+    for item in lines:
         text = item[2:]
         children = text_to_children(text)
         html_items.append(ParentNode("li", children))
     return ParentNode("ul", html_items)
 
 
-def quote_to_html_node(block):
-    lines = block.split("\n")
+def _quote_lines_to_html_node(lines: List[str]) -> HTMLNode:
     new_lines = []
     for line in lines:
         if not line.startswith(">"):
@@ -0,0 +1,338 @@
+"""
+Streaming minifier for the generated html pages.
+
+The minifier collapses runs of whitespace into a single space, drops the
+whitespace next to block level tags where browsers ignore it, removes
+comments and the quotes of attribute values that do not need them. The
+content of pre, code, textarea, script and style elements is left untouched.
+
+Html is fed to a Minifier in fragments of any size, so it can wrap the
+fragments of a page on their way to the output file. Only an incomplete
+tag at the end of a fragment is held back until the next one arrives.
+
+"""
+
+import re
+from typing import Iterable, Iterator, Self
+
+# elements whose content is written exactly as it was given
+PRESERVE_TAGS = frozenset({"pre", "code", "textarea", "script", "style"})
+
+# elements around which browsers do not render whitespace
+BLOCK_TAGS = frozenset(
+    {"html", "head", "body", "title", "meta", "link", "base", "script", "style", "noscript"}
+    | {"div", "p", "ul", "ol", "li", "dl", "dt", "dd", "blockquote", "pre", "hr", "br"}
+    | {"h1", "h2", "h3", "h4", "h5", "h6", "table", "thead", "tbody", "tfoot", "tr", "td"}
+    | {"th", "caption", "header", "footer", "main", "article", "section", "nav", "aside"}
+    | {"figure", "figcaption", "form", "fieldset", "details", "summary", "option"}
+)
+
+# incomplete tags held back longer than this are written as text
+MAX_PENDING = 4096
+
+_SPACE_RE = re.compile(r"[ \t\n\r\f]+")
+
+_TAG_RE = re.compile(
+    r"""<(/?)([A-Za-z][^\s/>]*)((?:\s+[^\s"'>/=]+(?:\s*=\s*(?:"[^"]*"|'[^']*'|[^\s"'>]+))?)*)"""
+    r"""\s*(/?)>"""
+)
+
+_ATTRIBUTE_RE = re.compile(r"""([^\s"'>/=]+)(?:\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s"'>]+)))?""")
+
+_UNQUOTED_RE = re.compile(r"""[^\s"'=<>`]+""")
+
+_enabled: bool = False
+
+
+class MinifyStats:
+    """
+    Counts the bytes minification removed from a page.
+
+    Attributes:
+        bytes_saved: number of bytes removed
+    """
+
+    def __init__(self) -> None:
+        self.bytes_saved: int = 0
+
+    def __repr__(self: Self) -> str:
+        return f"MinifyStats({self.bytes_saved})"
+
+
+def _attributes(text: str) -> tuple[str, bool]:
+    """
+    Rewrites the attributes of a tag with single spaces between them and
+    without the quotes of values that do not need them.
+
+    Args:
+        text: attributes of the tag
+
+    Returns: minified attributes and whether the last value is unquoted
+
+    """
+    result = []
+    unquoted = False
+
+    for match in _ATTRIBUTE_RE.finditer(text):
+        name, double, single, bare = match.groups()
+        value = double if double is not None else single if single is not None else bare
+        unquoted = False
+
+        if value is None:
+            result.append(f" {name}")
+        elif _UNQUOTED_RE.fullmatch(value):
+            result.append(f" {name}={value}")
+            unquoted = True
+        elif single is not None:
+            result.append(f" {name}='{value}'")
+        else:
+            result.append(f' {name}="{value}"')
+
+    return "".join(result), unquoted
+
+
+def _utf8_size(text: str) -> int:
+    return len(text) if text.isascii() else len(text.encode("utf-8"))
+
+
+class Minifier:
+    """
+    Minifies html fed to it in fragments.
+
+    Attributes:
+        bytes_saved: number of UTF-8 encoded bytes removed from the html fed
+            so far
+    """
+
+    def __init__(self, preserve: Iterable[str] = (), block: bool = True) -> None:
+        """
+        Args:
+            preserve: names of the preserved elements the html starts in
+            block: whether the html starts next to a block level tag, so its
+                leading whitespace is dropped
+        """
+        self.bytes_saved: int = 0
+        self._pending: str = ""
+        self._space: bool = False
+        self._block: bool = block
+        self._preserve: list[str] = list(preserve)
+
+    @property
+    def preserving(self: Self) -> tuple[str, ...]:
+        """Names of the preserved elements open at the current position."""
+        return tuple(self._preserve)
+
+    def feed(self: Self, html: str) -> str:
+        """
+        Minifies the next fragment of html. An incomplete tag at the end of
+        the fragment is held back until the next call.
+
+        Args:
+            html: next fragment
+
+        Returns: minified html
+
+        """
+        return self._minify(self._pending + html, final=False)
+
+    def flush(self: Self) -> str:
+        """
+        Returns the held back html and the pending whitespace, for the end
+        of a fragment followed by text the minifier does not see, such as a
+        template variable. The position after it is not next to a block tag.
+
+        Returns: minified html
+
+        """
+        html = self._minify(self._pending, final=True)
+        if self._space and not self._block:
+            html += " "
+            self.bytes_saved -= 1
+        self._space = False
+        self._block = False
+        return html
+
+    def close(self: Self) -> str:
+        """
+        Returns the held back html at the end of the document. Trailing
+        whitespace is dropped.
+
+        Returns: minified html
+
+        """
+        html = self._minify(self._pending, final=True)
+        self._space = False
+        return html
+
+    def fragments(self: Self, fragments: Iterable[str]) -> Iterator[str]:
+        """
+        Minifies a stream of fragments, flushing it at the end.
+
+        Args:
+            fragments: fragments of html
+
+        Returns: iterator of minified fragments
+
+        """
+        for fragment in fragments:
+            if html := self.feed(fragment):
+                yield html
+
+        if html := self.flush():
+            yield html
+
+    def _minify(self: Self, html: str, final: bool) -> str:
+        out: list[str] = []
+        position = 0
+        size = len(html)
+        self._pending = ""
+
+        while position < size:
+            start = html.find("<", position)
+            if start == -1:
+                start = size
+
+            if start > position:
+                self._text(html[position:start], out)
+            if start == size:
+                break
+
+            position = self._markup(html, start, out, final)
+            if position == -1:
+                self._pending = html[start:]
+                break
+
+        result = "".join(out)
+        consumed = html[: size - len(self._pending)] if self._pending else html
+        self.bytes_saved += _utf8_size(consumed) - _utf8_size(result)
+        return result
+
+    def _text(self: Self, text: str, out: list[str]) -> None:
+        if self._preserve:
+            out.append(text)
+            return
+
+        collapsed = _SPACE_RE.sub(" ", text)
+        if collapsed[0] == " ":
+            self._space = True
+            collapsed = collapsed[1:]
+        if not collapsed:
+            return
+
+        if self._space and not self._block:
+            out.append(" ")
+
+        if collapsed[-1] == " ":
+            out.append(collapsed[:-1])
+            self._space = True
+        else:
+            out.append(collapsed)
+            self._space = False
+        self._block = False
+
+    def _markup(self: Self, html: str, start: int, out: list[str], final: bool) -> int:
+        """
+        Minifies the comment, declaration or tag at the given position.
+
+        Returns: position after it, or -1 when it is incomplete
+
+        """
+        if not self._preserve and html.startswith("<!--", start):
+            end = html.find("-->", start + 4)
+            if end == -1:
+                return -1 if not final else self._literal(html, start, out)
+
+            comment = html[start : end + 3]
+            if comment.startswith("<!--[if"):
+                self._tag(comment, True, out)
+            return end + 3
+
+        if not self._preserve and html.startswith(("<!", "<?"), start):
+            end = html.find(">", start)
+            if end == -1:
+                return -1 if not final else self._literal(html, start, out)
+
+            self._tag(html[start : end + 1], True, out)
+            return end + 1
+
+        match = _TAG_RE.match(html, start)
+        if not match:
+            end = html.find(">", start, start + MAX_PENDING)
+            if end == -1 and not final and len(html) - start < MAX_PENDING:
+                return -1
+            if end == -1 or self._preserve or not html[start + 1 : start + 2].isalpha():
+                return self._literal(html, start, out)
+
+            # a tag the minifier does not understand is written as it is
+            self._tag(html[start : end + 1], False, out)
+            return end + 1
+
+        closing, tag, attributes, self_closing = match.groups()
+        name = tag.lower()
+
+        if self._preserve:
+            out.append(match.group(0))
+            if closing and name in self._preserve:
+                while self._preserve.pop() != name:
+                    pass
+                self._block = not self._preserve and name in BLOCK_TAGS
+            elif not closing and not self_closing and name in PRESERVE_TAGS:
+                self._preserve.append(name)
+            return match.end()
+
+        attributes, unquoted = _attributes(attributes)
+        if self_closing:
+            self_closing = " /" if unquoted else "/"
+        self._tag(f"<{closing}{tag}{attributes}{self_closing}>", name in BLOCK_TAGS, out)
+
+        if not closing and not self_closing and name in PRESERVE_TAGS:
+            self._preserve.append(name)
+        return match.end()
+
+    def _tag(self: Self, tag: str, block: bool, out: list[str]) -> None:
+        if self._space and not block and not self._block:
+            out.append(" ")
+        out.append(tag)
+        self._space = False
+        self._block = block
+
+    def _literal(self: Self, html: str, start: int, out: list[str]) -> int:
+        self._text("<", out)
+        return start + 1
+
+
+def minify(html: str) -> str:
+    """
+    Minifies a whole html document.
+
+    Args:
+        html: html document
+
+    Returns: minified html
+
+    """
+    minifier = Minifier()
+    return minifier.feed(html) + minifier.close()
+
+
+def configure_minify(enabled: bool) -> None:
+    """
+    Turns the minification of generated pages on or off. Also used as part
+    of the initializer of worker processes.
+
+    Args:
+        enabled: minify templates and page content
+    """
+    global _enabled
+
+    _enabled = enabled
+
+
+def minify_enabled() -> bool:
+    """
+    Returns whether generated pages are minified.
+
+    Returns: bool
+
+    """
+    return _enabled
@@ -0,0 +1,267 @@
+"""
+Writing of build outputs.
+
+Outputs are written to a temporary file next to the destination, which then
+replaces the destination, so a page is never left half written. When the new
+content is identical to the file on disk the file is left untouched, keeping
+its mtime for the upload step. Every added, changed and removed output is
+collected in a ChangeSet that is written as JSON at the end of the build.
+
+"""
+
+import filecmp
+import hashlib
+import json
+import os
+import threading
+from shutil import copy2, copystat
+from typing import IO, Self
+
+ADDED = "added"
+CHANGED = "changed"
+UNCHANGED = "unchanged"
+REMOVED = "removed"
+
+
+def file_hash(path: str) -> str:
+    """
+    Calculates the sha256 hash of the file at the given path.
+
+    Args:
+        path: path of the file to hash
+
+    Returns: hex digest of the file contents
+
+    """
+    digest = hashlib.sha256()
+
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(1024 * 1024), b""):
+            digest.update(chunk)
+
+    return digest.hexdigest()
+
+
+def same_content(path: str, other_path: str) -> bool:
+    """
+    Compares two files byte by byte, after comparing their sizes.
+
+    Args:
+        path: path of the first file
+        other_path: path of the second file
+
+    Returns: True if both files exist and have the same content
+
+    """
+    try:
+        if os.path.getsize(path) != os.path.getsize(other_path):
+            return False
+    except FileNotFoundError:
+        return False
+
+    return filecmp.cmp(path, other_path, shallow=False)
+
+
+def _commit(tmp_path: str, dest_path: str) -> str:
+    """
+    Moves the temporary file to the destination unless the destination
+    already has the same content.
+
+    Args:
+        tmp_path: path of the finished temporary file
+        dest_path: path of the output
+
+    Returns: ADDED, CHANGED or UNCHANGED
+
+    """
+    if not os.path.exists(dest_path):
+        os.replace(tmp_path, dest_path)
+        return ADDED
+
+    if same_content(tmp_path, dest_path):
+        os.remove(tmp_path)
+        return UNCHANGED
+
+    os.replace(tmp_path, dest_path)
+    return CHANGED
+
+
+def temporary_path(dest_path: str) -> str:
+    """
+    Names a temporary file next to the given output. The name is unique per
+    process and thread, so concurrent writers never share a temporary file.
+
+    Args:
+        dest_path: path of the output
+
+    Returns: path of the temporary file
+
+    """
+    directory, name = os.path.split(dest_path)
+    return os.path.join(directory, f".{name}.{os.getpid()}.{threading.get_ident()}.tmp")
+
+
+class OutputFile:
+    """
+    Context manager writing a text output through a temporary file. The
+    status is set when the block exits without an error; on an error the
+    temporary file is deleted and the destination is left as it was.
+
+    Attributes:
+        path: path of the output
+        status: ADDED, CHANGED or UNCHANGED once the file is written
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path: str = path
+        self.status: str | None = None
+        self._tmp_path: str | None = None
+        self._file: IO[str] | None = None
+
+    def __enter__(self: Self) -> IO[str]:
+        self._tmp_path = temporary_path(self.path)
+        self._file = open(self._tmp_path, "w", encoding="utf-8")
+        return self._file
+
+    def __exit__(self: Self, exc_type, exc, traceback) -> None:
+        self._file.close()
+
+        if exc_type is not None:
+            os.remove(self._tmp_path)
+            return
+
+        self.status = _commit(self._tmp_path, self.path)
+
+
+def write_bytes(path: str, data: bytes) -> str:
+    """
+    Writes a binary output through a temporary file, leaving the file
+    untouched when it already has the same content.
+
+    Args:
+        path: path of the output
+        data: content of the output
+
+    Returns: ADDED, CHANGED or UNCHANGED
+
+    """
+    tmp_path = temporary_path(path)
+    try:
+        with open(tmp_path, "wb") as file:
+            file.write(data)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+    return _commit(tmp_path, path)
+
+
+def copy_file(source_path: str, dest_path: str) -> str:
+    """
+    Copies a file through a temporary file. When the destination already has
+    the same content only the metadata of the source is copied.
+
+    Args:
+        source_path: path of the file to copy
+        dest_path: path of the copy
+
+    Returns: ADDED, CHANGED or UNCHANGED
+
+    """
+    if same_content(source_path, dest_path):
+        copystat(source_path, dest_path)
+        return UNCHANGED
+
+    tmp_path = temporary_path(dest_path)
+    try:
+        copy2(source_path, tmp_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    existed = os.path.exists(dest_path)
+    os.replace(tmp_path, dest_path)
+    return CHANGED if existed else ADDED
+
+
+class ChangeSet:
+    """
+    Outputs that were added, changed or removed during a build, relative to
+    the output folder.
+
+    Attributes:
+        root: path of the output folder
+        added: outputs that did not exist before
+        changed: outputs whose content changed
+        removed: outputs that were deleted
+    """
+
+    def __init__(self, root: str = "public") -> None:
+        self.root: str = root
+        self.added: set[str] = set()
+        self.changed: set[str] = set()
+        self.removed: set[str] = set()
+
+    def record(self: Self, path: str, status: str | None) -> None:
+        """
+        Records the status of a written output.
+
+        Args:
+            path: path of the output
+            status: ADDED, CHANGED or UNCHANGED
+        """
+        relative_path = self._relative(path)
+
+        if status == ADDED and relative_path in self.removed:
+            self.removed.discard(relative_path)
+            self.changed.add(relative_path)
+        elif status == ADDED:
+            self.added.add(relative_path)
+        elif status == CHANGED and relative_path not in self.added:
+            self.changed.add(relative_path)
+
+    def record_removed(self: Self, path: str) -> None:
+        """
+        Records a deleted output.
+
+        Args:
+            path: path of the output
+        """
+        relative_path = self._relative(path)
+        self.changed.discard(relative_path)
+
+        if relative_path in self.added:
+            self.added.discard(relative_path)
+        else:
+            self.removed.add(relative_path)
+
+    def to_dict(self: Self) -> dict[str, list[str]]:
+        return {
+            ADDED: sorted(self.added),
+            CHANGED: sorted(self.changed),
+            REMOVED: sorted(self.removed),
+        }
+
+    def write(self: Self, path: str) -> None:
+        """
+        Writes the change list as JSON.
+
+        Args:
+            path: path of the JSON file
+        """
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(self.to_dict(), file, indent=2)
+            file.write("\n")
+
+    def __len__(self: Self) -> int:
+        return len(self.added) + len(self.changed) + len(self.removed)
+
+    def __repr__(self: Self) -> str:
+        return (
+            f"added {len(self.added)}, changed {len(self.changed)}, "
+            f"removed {len(self.removed)}"
+        )
+
+    def _relative(self: Self, path: str) -> str:
+        return os.path.relpath(path, self.root).replace(os.sep, "/")
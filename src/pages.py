@@ -0,0 +1,417 @@
+"""
+Functions for rendering markdown pages, either one after another or in a
+pool of worker processes.
+
+"""
+
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import IO, Iterable, Iterator, Self
+
+from fingerprint import configure_assets, configured_assets
+from images import configure_images, configured_images
+from inline_cache import configure_inline_cache, inline_cache
+from markdown_handler import markdown_lines_to_html, markdown_to_html_node
+from minify import MinifyStats, configure_minify, minify_enabled
+from profiler import NULL_PROFILE, PageProfile
+from sinks import DISK_SINK, OutputSink
+from stylesheets import configure_inline_css, inline_css_limit
+from template import Template, load_template
+
+
+class PageResult:
+    """
+    Result of rendering a single page. Only small values are kept so the
+    result is cheap to send back from a worker process.
+
+    Attributes:
+        source: path of the markdown source
+        path: path of the generated page
+        bytes_written: size of the generated page
+        error: description of the error if the page failed, otherwise None
+        profile: stage timings of the page when the build is profiled
+        status: ADDED, CHANGED or UNCHANGED output status of the page
+        bytes_saved: number of bytes removed from the page by minification
+    """
+
+    def __init__(
+        self, source, path, bytes_written=0, error=None, profile=None, status=None, bytes_saved=0
+    ) -> None:
+        self.source: str = source
+        self.path: str = path
+        self.bytes_written: int = bytes_written
+        self.error: str | None = error
+        self.profile: PageProfile | None = profile
+        self.status: str | None = status
+        self.bytes_saved: int = bytes_saved
+
+    def __repr__(self: Self) -> str:
+        return f"PageResult({self.source}, {self.path}, {self.bytes_written}, {self.error})"
+
+
+class BuildError(Exception):
+    """Raised when a page fails to render and the build is set to fail fast."""
+
+    def __init__(self, result: PageResult) -> None:
+        super().__init__(f"{result.source}: {result.error}")
+        self.result: PageResult = result
+
+
+def extract_title(markdown: str) -> str:
+    """
+    Extracts the title from the given markdown string.
+    Raises an exception if the title is not found.
+
+    Args:
+        markdown: markdown string to extract title from
+
+    Raises:
+        Exception: when no h1 title is found
+
+    Returns: title as string
+
+    """
+    title = re.search(r"^# (.+)", markdown, re.MULTILINE)
+    if title:
+        return title.group(1)
+
+    raise Exception("Title not found")
+
+
+def extract_title_lines(lines: Iterable[str]) -> str:
+    """
+    Extracts the title from the lines of a markdown document, stopping at
+    the title line. Finds the same title as extract_title.
+
+    Args:
+        lines: lines of the document without line endings
+
+    Raises:
+        Exception: when no h1 title is found
+
+    Returns: title as string
+
+    """
+    for line in lines:
+        if line.startswith("# ") and len(line) > 2:
+            return line[2:]
+
+    raise Exception("Title not found")
+
+
+def read_lines(file: IO[str]) -> Iterator[str]:
+    """
+    Reads a text file lazily, one line at a time.
+
+    Args:
+        file: file opened in text mode
+
+    Returns: iterator of the lines without line endings
+
+    """
+    for line in file:
+        yield line[:-1] if line.endswith("\n") else line
+
+
+def collect_pages(
+    dir_path_content: str, dest_dir_path: str, sink: OutputSink = DISK_SINK
+) -> list[tuple[str, str]]:
+    """
+    Walks the content folder and lists the pages to generate.
+    Destination folders are created while walking so pages can be rendered
+    in any order.
+
+    Args:
+        dir_path_content: path of the content folder
+        dest_dir_path: path of the folder where pages are written
+        sink: sink the destination folders are created in
+
+    Returns: list of (markdown path, html path) tuples
+
+    """
+    pages: list[tuple[str, str]] = []
+
+    sink.makedirs(dest_dir_path)
+
+    for item in sorted(os.listdir(dir_path_content)):
+        item_path = os.path.join(dir_path_content, item)
+
+        if os.path.isdir(item_path):
+            dest_folder_path = os.path.join(dest_dir_path, item)
+            pages.extend(collect_pages(item_path, dest_folder_path, sink))
+        elif item.endswith(".md"):
+            item_name = os.path.splitext(item)[0]
+            pages.append((item_path, os.path.join(dest_dir_path, item_name + ".html")))
+
+    return pages
+
+
+def page_output_path(from_path: str, dir_path_content: str, dest_dir_path: str) -> str:
+    """
+    Maps a markdown file in the content folder to the path of its page.
+
+    Args:
+        from_path: path of the markdown file
+        dir_path_content: path of the content folder
+        dest_dir_path: path of the folder where pages are written
+
+    Returns: path of the generated html file
+
+    """
+    relative_path = os.path.relpath(from_path, dir_path_content)
+    return os.path.join(dest_dir_path, os.path.splitext(relative_path)[0] + ".html")
+
+
+def page_fragments(content: str, template: Template) -> Iterator[str]:
+    """
+    Renders a markdown document into the template.
+
+    Args:
+        content: markdown document
+        template: compiled page template
+
+    Raises:
+        Exception: when the document has no h1 title
+
+    Returns: iterator of html fragments of the page
+
+    """
+    title = extract_title(content)
+    html = markdown_to_html_node(content)
+    return template.stream({"Title": title, "Content": html.iter_html()})
+
+
+def generate_page(
+    from_path: str,
+    template_path: str,
+    dest_path: str,
+    profile: PageProfile = NULL_PROFILE,
+    stats: MinifyStats | None = None,
+    sink: OutputSink = DISK_SINK,
+) -> str:
+    """
+    Generates a single html page from the given markdown file and template.
+    Serialization, template filling and writing are streamed together, so
+    they are profiled as a single render stage. The page is only replaced
+    when its content changed.
+
+    Args:
+        from_path: path of the markdown file
+        template_path: path of the html template
+        dest_path: path of the generated html file
+        profile: profile the stage timings are recorded in
+        stats: counts the bytes removed by minification
+        sink: sink the page is written to
+
+    Returns: ADDED, CHANGED or UNCHANGED
+
+    """
+    with profile.stage("template"):
+        template = load_template(template_path)
+
+    with profile.stage("read"):
+        with open(from_path, "r", encoding="utf-8") as file:
+            content = file.read()
+            if profile:
+                profile.bytes_read += os.fstat(file.fileno()).st_size
+
+    with profile.stage("parse"):
+        title = extract_title(content)
+        html = markdown_to_html_node(content)
+    profile.count_nodes(html)
+
+    with profile.stage("render"):
+        fragments = template.stream({"Title": title, "Content": html.iter_html()}, stats)
+
+        output = sink.open(dest_path)
+        with output as output_file:
+            output_file.writelines(fragments)
+
+    return output.status
+
+
+def stream_page(
+    from_path: str,
+    template_path: str,
+    dest_path: str,
+    profile: PageProfile = NULL_PROFILE,
+    stats: MinifyStats | None = None,
+    sink: OutputSink = DISK_SINK,
+) -> str:
+    """
+    Generates a single html page like generate_page without holding the
+    document or its HTML tree in memory. The markdown file is read twice:
+    once up to the title, then block by block while every block is converted
+    and written into the content slot of the template. Memory use depends on
+    the largest block instead of the size of the file.
+
+    Args:
+        from_path: path of the markdown file
+        template_path: path of the html template
+        dest_path: path of the generated html file
+        profile: profile the stage timings are recorded in
+        stats: counts the bytes removed by minification
+        sink: sink the page is written to
+
+    Returns: ADDED, CHANGED or UNCHANGED
+
+    """
+    with profile.stage("template"):
+        template = load_template(template_path)
+
+    with profile.stage("title"):
+        with open(from_path, "r", encoding="utf-8") as file:
+            title = extract_title_lines(read_lines(file))
+
+    with profile.stage("render"):
+        with open(from_path, "r", encoding="utf-8") as file:
+            if profile:
+                profile.bytes_read += os.fstat(file.fileno()).st_size
+
+            content = markdown_lines_to_html(read_lines(file))
+            fragments = template.stream({"Title": title, "Content": content}, stats)
+
+            output = sink.open(dest_path)
+            with output as output_file:
+                output_file.writelines(fragments)
+
+    return output.status
+
+
+def render_page(
+    from_path: str,
+    template_path: str,
+    dest_path: str,
+    profile: bool = False,
+    stream: bool = False,
+    sink: OutputSink = DISK_SINK,
+) -> PageResult:
+    """
+    Generates a single page and reports the outcome instead of raising.
+
+    Args:
+        from_path: path of the markdown file
+        template_path: path of the html template
+        dest_path: path of the generated html file
+        profile: record the stage timings of the page
+        stream: generate the page block by block with stream_page
+        sink: sink the page is written to
+
+    Returns: result of the page
+
+    """
+    page_profile = PageProfile(from_path) if profile else NULL_PROFILE
+    generate = stream_page if stream else generate_page
+    stats = MinifyStats()
+
+    try:
+        status = generate(from_path, template_path, dest_path, page_profile, stats, sink)
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+        return PageResult(from_path, dest_path, error=error, profile=page_profile or None)
+
+    size = sink.size(dest_path)
+    return PageResult(
+        from_path,
+        dest_path,
+        size,
+        profile=page_profile or None,
+        status=status,
+        bytes_saved=stats.bytes_saved,
+    )
+
+
+def init_worker(
+    inline_cache_size: int,
+    assets: dict[str, str],
+    images: dict[str, tuple[int, int]] | None = None,
+    minify: bool = False,
+    inline_css: int = 0,
+) -> None:
+    """
+    Initializer of the worker processes rendering pages. Applies the inline
+    cache size, fingerprinted assets, image dimensions, minification setting
+    and stylesheet inlining limit of the main process.
+
+    Args:
+        inline_cache_size: maximum number of cached inline texts
+        assets: fingerprinted name of every asset keyed by its relative path
+        images: (width, height) of every image keyed by its relative path
+        minify: minify the generated pages
+        inline_css: size in bytes of the largest inlined stylesheet
+    """
+    configure_inline_cache(inline_cache_size)
+    configure_assets(assets)
+    configure_images(images or {})
+    configure_minify(minify)
+    configure_inline_css(inline_css)
+
+
+def build_pages(
+    pages: list[tuple[str, str]],
+    template_path: str,
+    jobs: int = 1,
+    fail_fast: bool = False,
+    profile: bool = False,
+    stream: bool = False,
+    sink: OutputSink = DISK_SINK,
+) -> list[PageResult]:
+    """
+    Renders the given pages. With more than one job the pages are rendered in
+    a pool of worker processes, which use the inline cache size, the
+    fingerprinted assets, the image dimensions and the template settings of
+    this process. Pages written to a sink that only exists in this process
+    are always rendered here. A failed page does not stop the other pages
+    unless fail_fast is set.
+
+    Args:
+        pages: list of (markdown path, html path) tuples
+        template_path: path of the html template
+        jobs: number of worker processes
+        fail_fast: stop at the first failed page
+        profile: record the stage timings of every page
+        stream: generate the pages block by block with stream_page
+        sink: sink the pages are written to
+
+    Raises:
+        BuildError: when a page fails and fail_fast is set
+
+    Returns: list of results in the order of the given pages
+
+    """
+    if jobs <= 1 or len(pages) <= 1 or sink.in_process:
+        results: list[PageResult] = []
+
+        for from_path, dest_path in pages:
+            result = render_page(from_path, template_path, dest_path, profile, stream, sink)
+            if fail_fast and result.error:
+                raise BuildError(result)
+            results.append(result)
+
+        return results
+
+    with ProcessPoolExecutor(
+        max_workers=jobs,
+        initializer=init_worker,
+        initargs=(
+            inline_cache.maxsize,
+            configured_assets(),
+            configured_images(),
+            minify_enabled(),
+            inline_css_limit(),
+        ),
+    ) as executor:
+        futures = [
+            executor.submit(render_page, from_path, template_path, dest_path, profile, stream)
+            for from_path, dest_path in pages
+        ]
+
+        if fail_fast:
+            for future in as_completed(futures):
+                result = future.result()
+                if result.error:
+                    executor.shutdown(cancel_futures=True)
+                    raise BuildError(result)
+
+        return [future.result() for future in futures]
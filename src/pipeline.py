@@ -0,0 +1,182 @@
+"""
+Asynchronous build pipeline that overlaps file I/O with rendering.
+
+Pages flow through three stages connected by bounded queues: sources are
+prefetched by a few reader tasks, parsed and rendered in an executor, and
+written by a few writer tasks. A full queue blocks the stage feeding it, so
+no more than a bounded number of sources and rendered pages are held in
+memory at once.
+
+"""
+
+import asyncio
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+
+from fingerprint import configured_assets
+from images import configured_images
+from inline_cache import inline_cache
+from markdown_handler import markdown_to_html_node
+from minify import MinifyStats, minify_enabled
+from pages import BuildError, PageResult, extract_title, init_worker
+from profiler import NULL_PROFILE, PageProfile, count_nodes
+from sinks import DISK_SINK, OutputSink
+from stylesheets import inline_css_limit
+from template import load_template
+
+
+def _read(from_path: str) -> tuple[str, int]:
+    with open(from_path, "r", encoding="utf-8") as file:
+        return file.read(), os.fstat(file.fileno()).st_size
+
+
+def _render(content: str, template_path: str, profile: bool) -> tuple[str, int, int]:
+    template = load_template(template_path)
+    title = extract_title(content)
+    html = markdown_to_html_node(content)
+    nodes = count_nodes(html) if profile else 0
+    stats = MinifyStats()
+    page = "".join(template.stream({"Title": title, "Content": html.iter_html()}, stats))
+    return page, nodes, stats.bytes_saved
+
+
+def _write(dest_path: str, page: str, sink: OutputSink) -> tuple[str | None, int]:
+    output = sink.open(dest_path)
+    with output as file:
+        file.write(page)
+    return output.status, sink.size(dest_path)
+
+
+def _failed(from_path: str, dest_path: str, e: Exception, profile: PageProfile) -> PageResult:
+    error = f"{type(e).__name__}: {e}"
+    return PageResult(from_path, dest_path, error=error, profile=profile or None)
+
+
+async def build_pages_async(
+    pages: list[tuple[str, str]],
+    template_path: str,
+    jobs: int = 1,
+    fail_fast: bool = False,
+    profile: bool = False,
+    prefetch: int = 16,
+    io_workers: int = 8,
+    sink: OutputSink = DISK_SINK,
+) -> list[PageResult]:
+    """
+    Renders the given pages like build_pages, reading and writing files in
+    threads while other pages are rendered. With more than one job the pages
+    are rendered in a pool of worker processes, otherwise in a single thread.
+    Pages are always written from this process, so any sink can be used.
+
+    Args:
+        pages: list of (markdown path, html path) tuples
+        template_path: path of the html template
+        jobs: number of worker processes
+        fail_fast: stop at the first failed page
+        profile: record the stage timings of every page
+        prefetch: maximum number of pages waiting between two stages
+        io_workers: number of files read and written at once
+        sink: sink the pages are written to
+
+    Raises:
+        BuildError: when a page fails and fail_fast is set
+
+    Returns: list of results in the order of the given pages
+
+    """
+    loop = asyncio.get_running_loop()
+    results: list[PageResult | None] = [None] * len(pages)
+    pending = iter(enumerate(pages))
+    rendering: asyncio.Queue = asyncio.Queue(prefetch)
+    writing: asyncio.Queue = asyncio.Queue(prefetch)
+
+    executor: Executor
+    if jobs > 1:
+        executor = ProcessPoolExecutor(
+            max_workers=jobs,
+            initializer=init_worker,
+            initargs=(
+                inline_cache.maxsize,
+                configured_assets(),
+                configured_images(),
+                minify_enabled(),
+                inline_css_limit(),
+            ),
+        )
+    else:
+        executor = ThreadPoolExecutor(max_workers=1)
+
+    def finish(index: int, result: PageResult) -> None:
+        results[index] = result
+        if fail_fast and result.error:
+            raise BuildError(result)
+
+    async def read() -> None:
+        for index, (from_path, dest_path) in pending:
+            page_profile = PageProfile(from_path) if profile else NULL_PROFILE
+            try:
+                with page_profile.stage("read"):
+                    content, size = await asyncio.to_thread(_read, from_path)
+            except Exception as e:
+                finish(index, _failed(from_path, dest_path, e, page_profile))
+                continue
+            page_profile.bytes_read += size
+            await rendering.put((index, from_path, dest_path, content, page_profile))
+
+    async def render() -> None:
+        while (item := await rendering.get()) is not None:
+            index, from_path, dest_path, content, page_profile = item
+            try:
+                with page_profile.stage("render"):
+                    page, nodes, bytes_saved = await loop.run_in_executor(
+                        executor, _render, content, template_path, profile
+                    )
+            except Exception as e:
+                finish(index, _failed(from_path, dest_path, e, page_profile))
+                continue
+            page_profile.nodes += nodes
+            await writing.put((index, from_path, dest_path, page, bytes_saved, page_profile))
+
+    async def write() -> None:
+        while (item := await writing.get()) is not None:
+            index, from_path, dest_path, page, bytes_saved, page_profile = item
+            try:
+                with page_profile.stage("write"):
+                    status, size = await asyncio.to_thread(_write, dest_path, page, sink)
+            except Exception as e:
+                finish(index, _failed(from_path, dest_path, e, page_profile))
+                continue
+            result = PageResult(
+                from_path,
+                dest_path,
+                size,
+                profile=page_profile or None,
+                status=status,
+                bytes_saved=bytes_saved,
+            )
+            finish(index, result)
+
+    readers = [asyncio.create_task(read()) for _ in range(io_workers)]
+    renderers = [asyncio.create_task(render()) for _ in range(max(jobs, 1))]
+    writers = [asyncio.create_task(write()) for _ in range(io_workers)]
+
+    async def close_stages() -> None:
+        await asyncio.gather(*readers)
+        for _ in renderers:
+            await rendering.put(None)
+        await asyncio.gather(*renderers)
+        for _ in writers:
+            await writing.put(None)
+        await asyncio.gather(*writers)
+
+    tasks = [*readers, *renderers, *writers]
+
+    try:
+        await asyncio.gather(close_stages(), *tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        executor.shutdown(wait=True, cancel_futures=True)
+
+    return results  # pyright: ignore
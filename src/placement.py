@@ -0,0 +1,200 @@
+"""
+Placement of static assets in the public folder.
+
+An asset can be placed by copying it, by hard linking it, by cloning it with
+a reflink on filesystems that share extents (btrfs, xfs, apfs) or with
+copy_file_range, which lets the kernel or a network filesystem copy the data
+without passing it through user space. Each strategy falls back to the next
+one when the filesystem does not support it, and the method that works is
+remembered per pair of source and destination devices.
+
+"""
+
+import errno
+import os
+import threading
+from shutil import copystat
+from typing import Self
+
+from output import ADDED, CHANGED, UNCHANGED, copy_file, same_content, temporary_path
+
+STRATEGIES = ("copy", "hardlink", "reflink", "copy_file_range")
+
+_FALLBACKS = {
+    "copy": ["copy"],
+    "hardlink": ["hardlink", "reflink", "copy_file_range", "copy"],
+    "reflink": ["reflink", "copy_file_range", "copy"],
+    "copy_file_range": ["copy_file_range", "copy"],
+}
+
+# errors raised when a filesystem or platform does not support a method
+_UNSUPPORTED = {
+    errno.EXDEV,
+    errno.EPERM,
+    errno.EINVAL,
+    errno.ENOSYS,
+    errno.ENOTTY,
+    errno.EOPNOTSUPP,
+    errno.ENOTSUP,
+    errno.EMLINK,
+}
+
+# ioctl request that clones a whole file on Linux
+_FICLONE = 0x40049409
+
+
+def _reflink(source_path: str, dest_path: str) -> None:
+    import fcntl
+
+    with open(source_path, "rb") as source, open(dest_path, "wb") as dest:
+        fcntl.ioctl(dest.fileno(), _FICLONE, source.fileno())
+    copystat(source_path, dest_path)
+
+
+def _copy_file_range(source_path: str, dest_path: str) -> None:
+    if not hasattr(os, "copy_file_range"):
+        raise OSError(errno.ENOSYS, "copy_file_range is not available")
+
+    with open(source_path, "rb") as source, open(dest_path, "wb") as dest:
+        remaining = os.fstat(source.fileno()).st_size
+        while remaining > 0:
+            copied = os.copy_file_range(source.fileno(), dest.fileno(), remaining)
+            if copied == 0:
+                break
+            remaining -= copied
+    copystat(source_path, dest_path)
+
+
+def _devices(source_path: str, dest_path: str) -> tuple[int, int]:
+    dest_folder = os.path.dirname(dest_path) or "."
+    return os.stat(source_path).st_dev, os.stat(dest_folder).st_dev
+
+
+_METHODS = {
+    "hardlink": os.link,
+    "reflink": _reflink,
+    "copy_file_range": _copy_file_range,
+}
+
+
+class Placer:
+    """
+    Places files with the configured strategy and falls back to the next
+    method when a filesystem does not support it.
+
+    Attributes:
+        strategy: preferred placement method, one of STRATEGIES
+        counts: number of files placed with each method
+    """
+
+    def __init__(self, strategy: str = "copy") -> None:
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Invalid placement strategy: {strategy}")
+
+        self.strategy: str = strategy
+        self.counts: dict[str, int] = {}
+        self._methods: dict[tuple[int, int], list[str]] = {}
+        self._lock = threading.Lock()
+
+    def methods(self: Self, source_path: str, dest_path: str) -> list[str]:
+        """
+        Looks up the methods that may work between the filesystems of the
+        given paths, in order of preference.
+
+        Args:
+            source_path: path of the file to place
+            dest_path: path of the placed file
+
+        Returns: list of method names
+
+        """
+        key = _devices(source_path, dest_path)
+
+        with self._lock:
+            return list(self._methods.setdefault(key, list(_FALLBACKS[self.strategy])))
+
+    def place(self: Self, source_path: str, dest_path: str) -> str:
+        """
+        Places a file through a temporary file, so the destination is never
+        left half written and existing links to it are not modified. A
+        destination with the same content is left in place.
+
+        Args:
+            source_path: path of the file to place
+            dest_path: path of the placed file
+
+        Returns: ADDED, CHANGED or UNCHANGED
+
+        """
+        if os.path.exists(dest_path) and os.path.samefile(source_path, dest_path):
+            return UNCHANGED
+
+        if same_content(source_path, dest_path):
+            copystat(source_path, dest_path)
+            return UNCHANGED
+
+        for method in self.methods(source_path, dest_path):
+            if method == "copy":
+                break
+
+            tmp_path = temporary_path(dest_path)
+            try:
+                _METHODS[method](source_path, tmp_path)
+            except OSError as e:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                if e.errno not in _UNSUPPORTED:
+                    raise
+                self._drop(source_path, dest_path, method)
+                continue
+
+            existed = os.path.exists(dest_path)
+            os.replace(tmp_path, dest_path)
+            self._count(method)
+            return CHANGED if existed else ADDED
+
+        status = copy_file(source_path, dest_path)
+        if status != UNCHANGED:
+            self._count("copy")
+        return status
+
+    def link(self: Self, source_path: str, dest_path: str) -> str:
+        """
+        Places a file as a hard link of another placed file, used for assets
+        that are byte-identical to an asset placed earlier. Falls back to
+        place when hard links are not supported.
+
+        Args:
+            source_path: path of the already placed file
+            dest_path: path of the placed file
+
+        Returns: ADDED, CHANGED or UNCHANGED
+
+        """
+        if os.path.exists(dest_path) and os.path.samefile(source_path, dest_path):
+            return UNCHANGED
+
+        tmp_path = temporary_path(dest_path)
+        try:
+            os.link(source_path, tmp_path)
+        except OSError as e:
+            if e.errno not in _UNSUPPORTED:
+                raise
+            return self.place(source_path, dest_path)
+
+        existed = os.path.exists(dest_path)
+        os.replace(tmp_path, dest_path)
+        self._count("dedup")
+        return CHANGED if existed else ADDED
+
+    def _drop(self: Self, source_path: str, dest_path: str, method: str) -> None:
+        key = _devices(source_path, dest_path)
+
+        with self._lock:
+            methods = self._methods[key]
+            if method in methods:
+                methods.remove(method)
+
+    def _count(self: Self, method: str) -> None:
+        with self._lock:
+            self.counts[method] = self.counts.get(method, 0) + 1
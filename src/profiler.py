@@ -0,0 +1,193 @@
+"""
+Build profiler that records the wall time of every stage of every page.
+
+Pages are profiled with a PageProfile, which is small enough to be sent back
+from a worker process with the page result. When profiling is turned off the
+shared NULL_PROFILE is used instead, whose methods do nothing.
+
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from typing import ContextManager, Iterator, Self
+
+from htmlnode import HTMLNode
+
+
+def count_nodes(node: HTMLNode) -> int:
+    """
+    Counts the nodes of the given tree.
+
+    Args:
+        node: root of the tree
+
+    Returns: number of nodes in the tree
+
+    """
+    count = 0
+    stack = [node]
+
+    while stack:
+        node = stack.pop()
+        count += 1
+        if node.children:
+            stack.extend(node.children)
+
+    return count
+
+
+class PageProfile:
+    """
+
+    Attributes:
+        source: path of the markdown source
+        pid: id of the process that rendered the page
+        tid: id of the thread that rendered the page
+        stages: (stage name, start ns, duration ns) of every recorded stage
+        bytes_read: number of bytes read from the source
+        nodes: number of HTML nodes created for the page
+    """
+
+    def __init__(self, source: str) -> None:
+        self.source: str = source
+        self.pid: int = os.getpid()
+        self.tid: int = threading.get_ident()
+        self.stages: list[tuple[str, int, int]] = []
+        self.bytes_read: int = 0
+        self.nodes: int = 0
+
+    @contextmanager
+    def stage(self: Self, name: str) -> Iterator[None]:
+        """
+        Records the wall time of the code run inside the context.
+
+        Args:
+            name: name of the stage
+        """
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            self.stages.append((name, start, time.perf_counter_ns() - start))
+
+    def count_nodes(self: Self, node: HTMLNode) -> None:
+        self.nodes += count_nodes(node)
+
+    @property
+    def duration(self: Self) -> int:
+        return sum(duration for _, _, duration in self.stages)
+
+    def __bool__(self: Self) -> bool:
+        return True
+
+
+class _NullProfile(PageProfile):
+    """PageProfile used when profiling is turned off. Records nothing."""
+
+    def __init__(self) -> None:
+        super().__init__("")
+        self._context = nullcontext()
+
+    def stage(self: Self, name: str) -> ContextManager[None]:  # pyright: ignore
+        return self._context
+
+    def count_nodes(self: Self, node: HTMLNode) -> None:
+        pass
+
+    def __bool__(self: Self) -> bool:
+        return False
+
+
+NULL_PROFILE: PageProfile = _NullProfile()
+
+
+class BuildProfile:
+    """
+    Collects the page profiles of a build together with the stages run by the
+    main process.
+
+    Attributes:
+        main: profile of the stages run by the main process
+        pages: profiles of the rendered pages
+        bytes_written: number of bytes written for the pages
+    """
+
+    def __init__(self) -> None:
+        self.main: PageProfile = PageProfile("build")
+        self.pages: list[PageProfile] = []
+        self.bytes_written: int = 0
+
+    def stage(self: Self, name: str) -> ContextManager[None]:
+        return self.main.stage(name)
+
+    def add(self: Self, profile: PageProfile | None, bytes_written: int = 0) -> None:
+        if profile:
+            self.pages.append(profile)
+            self.bytes_written += bytes_written
+
+    def report(self: Self, top: int = 10) -> str:
+        """
+        Summarises the build: totals, time per stage and the slowest pages.
+
+        Args:
+            top: number of slowest pages and stages to list
+
+        Returns: report as text
+
+        """
+        stage_totals: dict[str, int] = {}
+        for profile in self.pages:
+            for name, _, duration in profile.stages:
+                stage_totals[name] = stage_totals.get(name, 0) + duration
+
+        lines = [
+            f"pages: {len(self.pages)}, "
+            f"read {sum(p.bytes_read for p in self.pages)} bytes, "
+            f"wrote {self.bytes_written} bytes, "
+            f"created {sum(p.nodes for p in self.pages)} nodes",
+            "build stages:",
+        ]
+
+        for name, _, duration in self.main.stages:
+            lines.append(f"  {duration / 1e6:10.2f} ms  {name}")
+
+        lines.append("slowest page stages (summed over pages):")
+        for name, duration in sorted(stage_totals.items(), key=lambda x: -x[1])[:top]:
+            lines.append(f"  {duration / 1e6:10.2f} ms  {name}")
+
+        lines.append("slowest pages:")
+        for profile in sorted(self.pages, key=lambda p: -p.duration)[:top]:
+            lines.append(f"  {profile.duration / 1e6:10.2f} ms  {profile.source}")
+
+        return "\n".join(lines)
+
+    def write_trace(self: Self, path: str) -> None:
+        """
+        Writes the recorded stages as a Chrome trace event file, which can be
+        opened in chrome://tracing or Perfetto to see how work overlaps.
+
+        Args:
+            path: path of the trace file
+        """
+        events = []
+
+        for profile in [self.main, *self.pages]:
+            for name, start, duration in profile.stages:
+                events.append(
+                    {
+                        "name": name,
+                        "cat": "build" if profile is self.main else "page",
+                        "ph": "X",
+                        "ts": start / 1000,
+                        "dur": duration / 1000,
+                        "pid": profile.pid,
+                        "tid": profile.tid,
+                        "args": {"page": profile.source},
+                    }
+                )
+
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, file)
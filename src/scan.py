@@ -0,0 +1,85 @@
+"""
+Stat-cached scans of the files of a folder.
+
+The build keeps a record of some files between runs: the hash of every
+fingerprinted asset, the dimensions of every image, the hash of every output
+served with an ETag and of every compressed output. A record holds the mtime
+and size of the file, so files whose stat is unchanged keep their record
+without being read, and only the other files are processed, in a thread pool.
+
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
+
+def scan_files(
+    root: str,
+    records: dict[str, dict] | None,
+    compute: Callable[[str, dict | None], dict],
+    include: Callable[[str], bool] | None = None,
+    min_size: int = 0,
+    relative: bool = False,
+    skip_hidden: bool = False,
+    max_workers: int | None = None,
+) -> dict[str, dict]:
+    """
+    Walks a folder and returns a record of every included file. Files whose
+    stat matches their previous record keep it, compute is called in a
+    thread pool for the other files.
+
+    Args:
+        root: path of the folder
+        records: records of the previous scan
+        compute: called with the path of a new or modified file and its
+            previous record, or None, and returns the fields of its record
+        include: called with the path of every file, only files for which it
+            returns True are scanned
+        min_size: smallest file that is scanned
+        relative: key the records by the path relative to the folder with
+            forward slashes instead of the path
+        skip_hidden: skip files and folders whose name starts with a dot
+        max_workers: maximum number of files processed at once
+
+    Returns: mtime, size and computed fields of every scanned file, keyed by
+        its path
+
+    """
+    previous = records or {}
+    scanned: dict[str, dict] = {}
+    pending: list[tuple[str, str, os.stat_result]] = []
+
+    for folder, folders, files in os.walk(root):
+        if skip_hidden:
+            folders[:] = [name for name in folders if not name.startswith(".")]
+
+        for name in files:
+            if skip_hidden and name.startswith("."):
+                continue
+
+            path = os.path.join(folder, name)
+            if include and not include(path):
+                continue
+
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            if stat.st_size < min_size:
+                continue
+
+            key = os.path.relpath(path, root).replace(os.sep, "/") if relative else path
+            entry = previous.get(key)
+            if entry and entry["mtime_ns"] == stat.st_mtime_ns and entry["size"] == stat.st_size:
+                scanned[key] = entry
+            else:
+                pending.append((key, path, stat))
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        fields = executor.map(lambda item: compute(item[1], previous.get(item[0])), pending)
+
+        for (key, _, stat), computed in zip(pending, fields):
+            scanned[key] = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size, **computed}
+
+    return scanned
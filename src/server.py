@@ -0,0 +1,749 @@
+"""
+Static file server for the public folder.
+
+Persistent HTTP/1.1 connections wait in a selector while they are idle, and
+only a connection with a request ready is handed to a worker thread of a
+fixed size pool, so idle connections never hold a worker. Files are sent
+with sendfile, and small
+files that are requested often are kept in memory. Responses carry strong
+ETags, which the build computes for every output, and conditional requests
+are answered with 304 Not Modified. Byte ranges are supported, and the .gz
+siblings written by --gzip are served to clients accepting gzip as long as
+they match the current content of their file.
+Fingerprinted assets listed in the asset manifest are cached forever by
+browsers, every other file is revalidated.
+
+"""
+
+import argparse
+import json
+import mimetypes
+import os
+import re
+import selectors
+import socket
+import threading
+import time
+import urllib.parse
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from typing import Self
+
+from fingerprint import ASSET_MANIFEST
+from output import file_hash, write_bytes
+from scan import scan_files
+
+ETAGS_PATH = ".build-etags.json"
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+
+_RANGE_RE = re.compile(r"bytes=(\d*)-(\d*)")
+
+
+def build_etags(
+    root: str = "public",
+    records: dict[str, dict] | None = None,
+    max_workers: int | None = None,
+) -> dict[str, dict]:
+    """
+    Hashes every output of the public folder in a thread pool. Outputs
+    whose stat matches their previous record are not read again. Hidden
+    files, such as the temporary files of outputs being written, are skipped.
+
+    Args:
+        root: path of the public folder
+        records: stat and hash of every output from the previous build
+        max_workers: maximum number of files hashed at once
+
+    Returns: stat and hash of every output keyed by its path relative to the
+        public folder with forward slashes
+
+    """
+    hashed = scan_files(
+        root,
+        records,
+        lambda path, _: {"sha256": file_hash(path)},
+        relative=True,
+        skip_hidden=True,
+        max_workers=max_workers,
+    )
+    return dict(sorted(hashed.items()))
+
+
+def load_etags(path: str = ETAGS_PATH) -> dict[str, dict]:
+    """
+    Loads the hashes of the outputs written by the last build.
+
+    Args:
+        path: path of the ETag file
+
+    Returns: stat and hash of every output, empty when the file is missing
+        or unreadable
+
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+
+def write_etags(
+    root: str = "public", path: str = ETAGS_PATH, compressed: dict[str, dict] | None = None
+) -> dict[str, dict]:
+    """
+    Hashes the outputs of the public folder, reusing the hashes of unchanged
+    files from the previous ETag file, and writes the new ETag file. The
+    record of every .gz file written by the build keeps the hash of the
+    output it was compressed from, so the server never sends an outdated
+    .gz file.
+
+    Args:
+        root: path of the public folder
+        path: path of the ETag file
+        compressed: stat and hash of every compressed output keyed by its
+            path, as kept in the build manifest
+
+    Returns: stat and hash of every output keyed by its relative path
+
+    """
+    etags = build_etags(root, load_etags(path))
+    sources = {
+        os.path.relpath(output, root).replace(os.sep, "/") + ".gz": entry["sha256"]
+        for output, entry in (compressed or {}).items()
+    }
+    for relative_path, entry in etags.items():
+        if relative_path in sources:
+            entry["source_sha256"] = sources[relative_path]
+        else:
+            entry.pop("source_sha256", None)
+
+    write_bytes(path, (json.dumps(etags, indent=1, sort_keys=True) + "\n").encode())
+    return etags
+
+
+def parse_range(header: str, size: int) -> tuple[int, int] | None:
+    """
+    Parses a Range header with a single byte range. Headers with other units
+    or several ranges are ignored, so the whole file is sent.
+
+    Args:
+        header: value of the Range header
+        size: size of the file
+
+    Raises:
+        ValueError: if the range is outside of the file
+
+    Returns: first and last byte of the range, or None to send the whole file
+
+    """
+    match = _RANGE_RE.fullmatch(header.strip())
+    if not match or match.group(1) == match.group(2) == "":
+        return None
+
+    first, last = match.groups()
+    if first == "":
+        length = int(last)
+        if length == 0 or size == 0:
+            raise ValueError("unsatisfiable range")
+        return max(size - length, 0), size - 1
+
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError("unsatisfiable range")
+    return start, end
+
+
+def accepts_gzip(header: str | None) -> bool:
+    """
+    Checks if an Accept-Encoding header allows gzip responses.
+
+    Args:
+        header: value of the Accept-Encoding header
+
+    Returns: bool
+
+    """
+    for item in (header or "").split(","):
+        coding, _, parameters = item.strip().partition(";")
+        if coding.strip().lower() not in ("gzip", "*"):
+            continue
+
+        quality = parameters.strip()
+        if quality.startswith("q="):
+            try:
+                return float(quality[2:]) > 0
+            except ValueError:
+                return False
+        return True
+
+    return False
+
+
+def etag_matches(header: str, etag: str) -> bool:
+    """
+    Checks if an If-None-Match header matches an ETag, with the weak
+    comparison required for If-None-Match.
+
+    Args:
+        header: value of the If-None-Match header
+        etag: ETag of the file
+
+    Returns: bool
+
+    """
+    if header.strip() == "*":
+        return True
+
+    return any(item.strip().removeprefix("W/") == etag for item in header.split(","))
+
+
+class FileCache:
+    """
+    LRU cache of the content of small files. An entry is only used while the
+    file has the same mtime and size.
+
+    Attributes:
+        max_bytes: maximum number of cached bytes
+        max_file_size: size of the largest cached file
+        size: number of bytes cached
+        hits: number of reads served from the cache
+        misses: number of reads of files that were not cached
+    """
+
+    def __init__(self, max_bytes: int = 64 << 20, max_file_size: int = 256 << 10) -> None:
+        self.max_bytes: int = max_bytes
+        self.max_file_size: int = max_file_size
+        self.size: int = 0
+        self.hits: int = 0
+        self.misses: int = 0
+        self._entries: OrderedDict[str, tuple[int, int, bytes]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self: Self, path: str, stat: os.stat_result) -> bytes | None:
+        """
+        Returns the content of a small file, reading it into the cache when
+        it is not cached or has changed.
+
+        Args:
+            path: path of the file
+            stat: current stat of the file
+
+        Returns: content of the file, None if the file is too large to cache
+
+        """
+        if stat.st_size > self.max_file_size or stat.st_size > self.max_bytes:
+            return None
+
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry and entry[0] == stat.st_mtime_ns and entry[1] == stat.st_size:
+                self._entries.move_to_end(path)
+                self.hits += 1
+                return entry[2]
+
+        with open(path, "rb") as file:
+            data = file.read()
+        if len(data) != stat.st_size:
+            return data
+
+        with self._lock:
+            self.misses += 1
+            previous = self._entries.pop(path, None)
+            if previous:
+                self.size -= len(previous[2])
+
+            self._entries[path] = (stat.st_mtime_ns, stat.st_size, data)
+            self.size += len(data)
+            while self.size > self.max_bytes:
+                _, (_, _, dropped) = self._entries.popitem(last=False)
+                self.size -= len(dropped)
+
+        return data
+
+    def __len__(self: Self) -> int:
+        return len(self._entries)
+
+    def __repr__(self: Self) -> str:
+        return (
+            f"FileCache({len(self)} files, {self.size} bytes, "
+            f"{self.hits} hits, {self.misses} misses)"
+        )
+
+
+class StaticHandler(BaseHTTPRequestHandler):
+    """
+    Serves the files of the public folder over a persistent HTTP/1.1
+    connection. The handler lives as long as its connection and handles one
+    request at a time when the server finds the connection readable. A
+    request that does not arrive completely within timeout seconds closes
+    the connection.
+
+    Attributes:
+        parked_at: monotonic time the connection became idle
+    """
+
+    protocol_version = "HTTP/1.1"
+    timeout = 5
+    server: "StaticServer"
+
+    def __init__(self, request: socket.socket, client_address, server: "StaticServer") -> None:
+        self.request = request
+        self.client_address = client_address
+        self.server = server
+        self.parked_at: float = time.monotonic()
+        self.setup()
+
+    def handle_next(self: Self) -> bool:
+        """
+        Handles the next request of the connection, and the requests the
+        client pipelined after it.
+
+        Returns: True if the connection stays open, False otherwise
+
+        """
+        while True:
+            self.close_connection = True
+            self.handle_one_request()
+            if self.close_connection:
+                return False
+            if not self._buffered():
+                return True
+
+    def _buffered(self: Self) -> bool:
+        """Checks without blocking whether the next request has arrived."""
+        self.connection.setblocking(False)
+        try:
+            return bool(self.rfile.peek(1))
+        except OSError:
+            return False
+        finally:
+            self.connection.settimeout(self.timeout)
+
+    def do_GET(self: Self) -> None:
+        self._serve(head=False)
+
+    def do_HEAD(self: Self) -> None:
+        self._serve(head=True)
+
+    def log_message(self: Self, format: str, *args) -> None:
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+    def _serve(self: Self, head: bool) -> None:
+        url_path = urllib.parse.unquote(self.path.split("?", 1)[0].split("#", 1)[0])
+        path = self.server.resolve(url_path)
+
+        if path is None:
+            self.send_error(404)
+            return
+
+        if os.path.isdir(path):
+            self.send_response(301)
+            self.send_header("Location", urllib.parse.quote(url_path) + "/")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        content_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        if content_type.startswith("text/") or content_type.endswith(("javascript", "json")):
+            content_type += "; charset=utf-8"
+
+        relative_path = os.path.relpath(path, self.server.root).replace(os.sep, "/")
+        range_header = self.headers.get("Range")
+        encoding = None
+
+        try:
+            stat = os.stat(path)
+            gzip_path = self.server.gzip_path(path, stat)
+            if gzip_path and not range_header and accepts_gzip(self.headers.get("Accept-Encoding")):
+                path, stat = gzip_path, os.stat(gzip_path)
+                encoding = "gzip"
+            etag = self.server.etag(path, stat)
+        except OSError:
+            self.send_error(404)
+            return
+
+        headers = {
+            "ETag": etag,
+            "Last-Modified": formatdate(stat.st_mtime, usegmt=True),
+            "Cache-Control": self.server.cache_control(relative_path),
+        }
+        if gzip_path:
+            headers["Vary"] = "Accept-Encoding"
+
+        if self._not_modified(etag, stat):
+            self.send_response(304)
+            self._send_headers(headers)
+            return
+
+        start, end = 0, stat.st_size - 1
+        status = 200
+
+        if range_header and self._range_applies(etag, stat):
+            try:
+                byte_range = parse_range(range_header, stat.st_size)
+            except ValueError:
+                self.send_response(416)
+                headers["Content-Range"] = f"bytes */{stat.st_size}"
+                headers["Content-Length"] = "0"
+                self._send_headers(headers)
+                return
+
+            if byte_range:
+                start, end = byte_range
+                status = 206
+                headers["Content-Range"] = f"bytes {start}-{end}/{stat.st_size}"
+
+        headers["Content-Type"] = content_type
+        headers["Content-Length"] = str(end - start + 1)
+        headers["Accept-Ranges"] = "bytes"
+        if encoding:
+            headers["Content-Encoding"] = encoding
+
+        self.send_response(status)
+        self._send_headers(headers)
+
+        if not head and end >= start:
+            self._send_body(path, stat, start, end - start + 1)
+
+    def _not_modified(self: Self, etag: str, stat: os.stat_result) -> bool:
+        if_none_match = self.headers.get("If-None-Match")
+        if if_none_match is not None:
+            return etag_matches(if_none_match, etag)
+
+        if_modified_since = self.headers.get("If-Modified-Since")
+        if not if_modified_since:
+            return False
+
+        try:
+            since = parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+        return int(stat.st_mtime) <= since
+
+    def _range_applies(self: Self, etag: str, stat: os.stat_result) -> bool:
+        if_range = self.headers.get("If-Range")
+        if not if_range:
+            return True
+        if if_range.startswith('"'):
+            return if_range == etag
+
+        try:
+            return int(stat.st_mtime) <= parsedate_to_datetime(if_range).timestamp()
+        except (TypeError, ValueError):
+            return False
+
+    def _send_headers(self: Self, headers: dict[str, str]) -> None:
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+
+    def _send_body(self: Self, path: str, stat: os.stat_result, offset: int, count: int) -> None:
+        data = self.server.cache.get(path, stat)
+
+        try:
+            if data is not None:
+                self.wfile.write(memoryview(data)[offset : offset + count])
+            else:
+                with open(path, "rb") as file:
+                    self.connection.sendfile(file, offset, count)
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True
+
+
+class StaticServer(HTTPServer):
+    """
+    HTTP server answering requests on a fixed pool of worker threads. Idle
+    connections are watched by a selector thread and only handed to a
+    worker once a request can be read, and closed after idle_timeout
+    seconds without one.
+
+    Attributes:
+        root: absolute path of the served folder
+        etags: stat and hash of every file keyed by its relative path
+        cache: cache of the content of small files
+        quiet: whether requests are not logged
+        idle_timeout: seconds an idle connection is kept open
+    """
+
+    def __init__(
+        self,
+        address: tuple[str, int],
+        root: str = "public",
+        etags: dict[str, dict] | None = None,
+        cache: FileCache | None = None,
+        workers: int = 64,
+        quiet: bool = False,
+        idle_timeout: float = 15,
+    ) -> None:
+        super().__init__(address, StaticHandler)
+        self.root: str = os.path.abspath(root)
+        self.etags: dict[str, dict] = etags or {}
+        self.cache: FileCache = cache or FileCache()
+        self.quiet: bool = quiet
+        self.idle_timeout: float = idle_timeout
+        self._executor = ThreadPoolExecutor(workers, thread_name_prefix="static")
+        self._lock = threading.Lock()
+        self._immutable: tuple[int, set[str]] = (0, set())
+        self._closed = False
+        self._parked: deque[StaticHandler] = deque()
+        self._selector = selectors.DefaultSelector()
+        self._wakeup, self._waker = socket.socketpair()
+        self._wakeup.setblocking(False)
+        self._selector.register(self._wakeup, selectors.EVENT_READ)
+        self._poller = threading.Thread(target=self._poll, name="static-poller", daemon=True)
+        self._poller.start()
+
+    def process_request(self: Self, request, client_address) -> None:
+        self._park(StaticHandler(request, client_address, self))
+
+    def _park(self: Self, handler: StaticHandler) -> None:
+        """Hands an idle connection to the selector thread."""
+        handler.parked_at = time.monotonic()
+        self._parked.append(handler)
+        try:
+            self._waker.send(b"\0")
+        except OSError:
+            self._close(handler)
+
+    def _poll(self: Self) -> None:
+        """
+        Selector loop: registers parked connections, hands the readable ones
+        to the workers and closes the ones idle for too long.
+        """
+        swept = time.monotonic()
+
+        while not self._closed:
+            for key, _ in self._selector.select(timeout=min(1.0, self.idle_timeout)):
+                if key.fileobj is self._wakeup:
+                    try:
+                        self._wakeup.recv(4096)
+                    except BlockingIOError:
+                        pass
+                    continue
+
+                self._selector.unregister(key.fileobj)
+                self._executor.submit(self._serve, key.data)
+
+            while self._parked:
+                handler = self._parked.popleft()
+                self._selector.register(handler.connection, selectors.EVENT_READ, handler)
+
+            now = time.monotonic()
+            if now - swept >= min(1.0, self.idle_timeout):
+                swept = now
+                for key in list(self._selector.get_map().values()):
+                    if key.data and now - key.data.parked_at > self.idle_timeout:
+                        self._selector.unregister(key.fileobj)
+                        self._close(key.data)
+
+        for key in list(self._selector.get_map().values()):
+            if key.data:
+                self._close(key.data)
+        self._selector.close()
+
+    def _serve(self: Self, handler: StaticHandler) -> None:
+        try:
+            keep_open = handler.handle_next()
+        except Exception:
+            self.handle_error(handler.request, handler.client_address)
+            keep_open = False
+
+        if keep_open and not self._closed:
+            self._park(handler)
+        else:
+            self._close(handler)
+
+    def _close(self: Self, handler: StaticHandler) -> None:
+        try:
+            handler.finish()
+        except OSError:
+            pass
+        self.shutdown_request(handler.request)
+
+    def server_close(self: Self) -> None:
+        super().server_close()
+        self._closed = True
+        self._waker.send(b"\0")
+        self._poller.join()
+        self._wakeup.close()
+        self._waker.close()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        while self._parked:
+            self._close(self._parked.popleft())
+
+    def resolve(self: Self, url_path: str) -> str | None:
+        """
+        Maps the path of a request to a file or folder of the served folder.
+        Folders map to their index.html file when the url ends with a slash.
+        Hidden files and paths outside of the folder are never served.
+
+        Args:
+            url_path: unquoted path of the request
+
+        Returns: path of the file or of a folder to redirect to, None if
+            there is none
+
+        """
+        if "\0" in url_path or any(part.startswith(".") for part in url_path.split("/") if part):
+            return None
+
+        path = os.path.normpath(os.path.join(self.root, url_path.lstrip("/")))
+        if path != self.root and not path.startswith(self.root + os.sep):
+            return None
+
+        if os.path.isdir(path):
+            if not url_path.endswith("/"):
+                return path
+            path = os.path.join(path, "index.html")
+
+        return path if os.path.isfile(path) else None
+
+    def etag(self: Self, path: str, stat: os.stat_result) -> str:
+        """
+        Returns the strong ETag of a file. The hash computed by the build is
+        used while the file has the same stat, otherwise the file is hashed
+        again and the new hash is kept.
+
+        Args:
+            path: path of the file
+            stat: current stat of the file
+
+        Returns: quoted ETag
+
+        """
+        return f'"{self._record(path, stat)["sha256"][:32]}"'
+
+    def gzip_path(self: Self, path: str, stat: os.stat_result) -> str | None:
+        """
+        Returns the .gz sibling of a file if it holds the current content of
+        the file. Siblings written by the build are checked against the hash
+        of the output they were compressed from, other siblings must not be
+        older than the file.
+
+        Args:
+            path: path of the file
+            stat: current stat of the file
+
+        Returns: path of the .gz file, None if there is no current one
+
+        """
+        gzip_path = path + ".gz"
+        try:
+            gzip_stat = os.stat(gzip_path)
+        except OSError:
+            return None
+
+        source = self._record(gzip_path, gzip_stat).get("source_sha256")
+        if source is None:
+            current = gzip_stat.st_mtime_ns >= stat.st_mtime_ns
+        else:
+            current = source == self._record(path, stat)["sha256"]
+        return gzip_path if current else None
+
+    def _record(self: Self, path: str, stat: os.stat_result) -> dict:
+        """
+        Returns the stat and hash record of a file, hashing the file again
+        when its stat changed since the record was made. The other fields of
+        the record are kept while the hash is the same.
+        """
+        relative_path = os.path.relpath(path, self.root).replace(os.sep, "/")
+
+        with self._lock:
+            previous = entry = self.etags.get(relative_path)
+
+        if not entry or entry["mtime_ns"] != stat.st_mtime_ns or entry["size"] != stat.st_size:
+            sha256 = file_hash(path)
+            kept = previous if previous and previous["sha256"] == sha256 else {}
+            entry = {**kept, "mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "sha256": sha256}
+            with self._lock:
+                self.etags[relative_path] = entry
+
+        return entry
+
+    def cache_control(self: Self, relative_path: str) -> str:
+        """
+        Returns the Cache-Control header of a file. Fingerprinted assets are
+        immutable, every other file is revalidated with its ETag.
+
+        Args:
+            relative_path: path of the file relative to the served folder
+
+        Returns: header value
+
+        """
+        return IMMUTABLE if relative_path in self._fingerprinted() else REVALIDATE
+
+    def _fingerprinted(self: Self) -> set[str]:
+        manifest_path = os.path.join(self.root, ASSET_MANIFEST)
+
+        try:
+            mtime = os.stat(manifest_path).st_mtime_ns
+        except OSError:
+            return set()
+
+        if mtime != self._immutable[0]:
+            try:
+                with open(manifest_path, "r", encoding="utf-8") as file:
+                    names = set(json.load(file).values())
+            except (OSError, ValueError):
+                names = set()
+            self._immutable = (mtime, names)
+
+        return self._immutable[1]
+
+
+def serve_static(
+    root: str = "public",
+    port: int = 8888,
+    host: str = "",
+    etags_path: str = ETAGS_PATH,
+    workers: int = 64,
+    quiet: bool = False,
+) -> None:
+    """
+    Runs the static file server until it is interrupted.
+
+    Args:
+        root: path of the folder to serve
+        port: port to listen on
+        host: address to listen on, every address when empty
+        etags_path: path of the ETag file written by the build
+        workers: number of requests served at once
+        quiet: do not log requests
+    """
+    etags = load_etags(etags_path)
+
+    with StaticServer((host, port), root, etags, workers=workers, quiet=quiet) as server:
+        print(f"serving {root}/ on http://{host or 'localhost'}:{port}")
+        server.serve_forever()
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Runs the static file server from the command line."""
+    parser = argparse.ArgumentParser(description="Serve the generated site.")
+    parser.add_argument("root", nargs="?", default="public", help="folder to serve")
+    parser.add_argument("--port", type=int, default=8888, help="port to listen on")
+    parser.add_argument("--host", default="", help="address to listen on")
+    parser.add_argument(
+        "--etags", default=ETAGS_PATH, help="path of the ETag file written by the build"
+    )
+    parser.add_argument(
+        "--workers", type=int, default=64, help="number of requests served at once"
+    )
+    parser.add_argument("--quiet", action="store_true", help="do not log requests")
+    args = parser.parse_args(argv)
+
+    try:
+        serve_static(args.root, args.port, args.host, args.etags, args.workers, args.quiet)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
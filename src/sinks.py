@@ -0,0 +1,397 @@
+"""
+Output sinks the build writes its pages and static files to.
+
+A sink receives every output under the path it has in the public folder.
+DiskSink writes the outputs to the filesystem through temporary files, as
+the rest of the build does. MemorySink keeps them as bytes in a dictionary,
+so a build can run in tests or inside a server process without touching the
+output folder at all.
+
+"""
+
+import hashlib
+import io
+import os
+import threading
+import time
+from shutil import rmtree
+from typing import IO, Iterator, Self
+
+from output import ADDED, CHANGED, UNCHANGED, OutputFile, copy_file, file_hash, write_bytes
+from placement import Placer
+
+
+class OutputSink:
+    """
+    Destination of the build outputs. Implemented by the subclasses.
+
+    Attributes:
+        in_process: whether the outputs only exist in this process, in which
+            case worker processes can not write to the sink
+    """
+
+    in_process: bool = False
+
+    def open(self: Self, path: str) -> "OutputFile | MemoryOutputFile":
+        """
+        Opens a text output. The returned context manager gives a text file
+        and sets its status once the block exits without an error.
+
+        Args:
+            path: path of the output
+
+        Returns: context manager with a status attribute
+
+        """
+        raise NotImplementedError
+
+    def write_bytes(self: Self, path: str, data: bytes) -> str:
+        """
+        Writes a binary output.
+
+        Args:
+            path: path of the output
+            data: content of the output
+
+        Returns: ADDED, CHANGED or UNCHANGED
+
+        """
+        raise NotImplementedError
+
+    def copy_file(self: Self, source_path: str, path: str) -> str:
+        """
+        Copies a file into an output.
+
+        Args:
+            source_path: path of the file to copy
+            path: path of the output
+
+        Returns: ADDED, CHANGED or UNCHANGED
+
+        """
+        raise NotImplementedError
+
+    def link(self: Self, primary: str, path: str) -> str:
+        """
+        Makes an output share the content of another output, used for files
+        that are byte-identical to a file written earlier.
+
+        Args:
+            primary: path of the output written earlier
+            path: path of the output
+
+        Returns: ADDED, CHANGED or UNCHANGED
+
+        """
+        raise NotImplementedError
+
+    def remove(self: Self, path: str) -> bool:
+        """
+        Deletes an output.
+
+        Args:
+            path: path of the output
+
+        Returns: True if the output existed, False otherwise
+
+        """
+        raise NotImplementedError
+
+    def makedirs(self: Self, path: str) -> None:
+        """
+        Creates an output folder and its parents when they do not exist.
+
+        Args:
+            path: path of the folder
+        """
+        raise NotImplementedError
+
+    def reset(self: Self, path: str) -> None:
+        """
+        Deletes every output in a folder and leaves the folder empty.
+
+        Args:
+            path: path of the folder
+        """
+        raise NotImplementedError
+
+    def size(self: Self, path: str) -> int:
+        """
+        Returns the size of an output.
+
+        Args:
+            path: path of the output
+
+        Returns: size in bytes
+
+        """
+        raise NotImplementedError
+
+    def stat(self: Self, path: str) -> tuple[int, int] | None:
+        """
+        Looks up the size and modification time of an output. Copied files
+        keep the modification time of their source.
+
+        Args:
+            path: path of the output
+
+        Returns: (size, mtime ns) of the output, None if it does not exist
+
+        """
+        raise NotImplementedError
+
+    def sha256(self: Self, path: str) -> str:
+        """
+        Returns the sha256 hash of an output.
+
+        Args:
+            path: path of the output
+
+        Returns: hex digest of the content
+
+        """
+        raise NotImplementedError
+
+
+class DiskSink(OutputSink):
+    """
+    Writes the outputs to the filesystem.
+
+    Attributes:
+        placer: places copied files with its strategy, None to copy them
+    """
+
+    def __init__(self, placer: Placer | None = None) -> None:
+        self.placer: Placer | None = placer
+
+    def open(self: Self, path: str) -> OutputFile:
+        return OutputFile(path)
+
+    def write_bytes(self: Self, path: str, data: bytes) -> str:
+        return write_bytes(path, data)
+
+    def copy_file(self: Self, source_path: str, path: str) -> str:
+        if self.placer:
+            return self.placer.place(source_path, path)
+        return copy_file(source_path, path)
+
+    def link(self: Self, primary: str, path: str) -> str:
+        return (self.placer or Placer()).link(primary, path)
+
+    def remove(self: Self, path: str) -> bool:
+        if not os.path.isfile(path):
+            return False
+        os.remove(path)
+        return True
+
+    def makedirs(self: Self, path: str) -> None:
+        os.makedirs(path, exist_ok=True)
+
+    def reset(self: Self, path: str) -> None:
+        if os.path.exists(path):
+            rmtree(path)
+        os.mkdir(path)
+
+    def size(self: Self, path: str) -> int:
+        return os.path.getsize(path)
+
+    def stat(self: Self, path: str) -> tuple[int, int] | None:
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return stat.st_size, stat.st_mtime_ns
+
+    def sha256(self: Self, path: str) -> str:
+        return file_hash(path)
+
+    def __repr__(self: Self) -> str:
+        return f"DiskSink({self.placer.strategy if self.placer else 'copy'})"
+
+
+DISK_SINK = DiskSink()
+
+
+class MemoryOutput:
+    """
+    Output held in memory.
+
+    Attributes:
+        data: content of the output
+        mtime_ns: time the content was last changed, or the mtime of the
+            source for copied files, in nanoseconds
+        sha256: hex digest of the content
+    """
+
+    __slots__ = ("data", "mtime_ns", "sha256")
+
+    def __init__(self, data: bytes, mtime_ns: int) -> None:
+        self.data: bytes = data
+        self.mtime_ns: int = mtime_ns
+        self.sha256: str = hashlib.sha256(data).hexdigest()
+
+    @property
+    def size(self: Self) -> int:
+        """Size of the output in bytes."""
+        return len(self.data)
+
+    def __repr__(self: Self) -> str:
+        return f"MemoryOutput({self.size} bytes, {self.sha256[:12]})"
+
+
+class MemoryOutputFile:
+    """
+    Context manager collecting a text output for a MemorySink. The output
+    is only stored when the block exits without an error.
+
+    Attributes:
+        path: path of the output
+        status: ADDED, CHANGED or UNCHANGED once the output is stored
+    """
+
+    def __init__(self, sink: "MemorySink", path: str) -> None:
+        self.path: str = path
+        self.status: str | None = None
+        self._sink: MemorySink = sink
+        self._file: io.StringIO | None = None
+
+    def __enter__(self: Self) -> IO[str]:
+        self._file = io.StringIO()
+        return self._file
+
+    def __exit__(self: Self, exc_type, exc, traceback) -> None:
+        if exc_type is None:
+            self.status = self._sink.write_bytes(self.path, self._file.getvalue().encode("utf-8"))
+        self._file.close()
+
+
+class MemorySink(OutputSink):
+    """
+    Keeps the outputs in memory, keyed by their normalized path. Outputs
+    with unchanged content keep their mtime and copied files take the mtime
+    of their source, like files on disk. Linked outputs share one
+    MemoryOutput, like hard links.
+
+    Attributes:
+        outputs: every output keyed by its path
+    """
+
+    in_process = True
+
+    def __init__(self) -> None:
+        self.outputs: dict[str, MemoryOutput] = {}
+        self._lock = threading.Lock()
+
+    def open(self: Self, path: str) -> MemoryOutputFile:
+        return MemoryOutputFile(self, path)
+
+    def write_bytes(self: Self, path: str, data: bytes) -> str:
+        return self._store(path, data)
+
+    def copy_file(self: Self, source_path: str, path: str) -> str:
+        with open(source_path, "rb") as file:
+            data = file.read()
+            mtime_ns = os.fstat(file.fileno()).st_mtime_ns
+        return self._store(path, data, mtime_ns)
+
+    def _store(self: Self, path: str, data: bytes, mtime_ns: int | None = None) -> str:
+        """
+        Stores an output. Unchanged content keeps its mtime unless mtime_ns
+        is given, which copied files take from their source.
+        """
+        path = os.path.normpath(path)
+
+        with self._lock:
+            previous = self.outputs.get(path)
+            if previous and previous.data == data:
+                if mtime_ns is not None:
+                    previous.mtime_ns = mtime_ns
+                return UNCHANGED
+
+            if mtime_ns is None:
+                mtime_ns = time.time_ns()
+            self.outputs[path] = MemoryOutput(data, mtime_ns)
+
+        return CHANGED if previous else ADDED
+
+    def link(self: Self, primary: str, path: str) -> str:
+        path = os.path.normpath(path)
+
+        with self._lock:
+            output = self.outputs[os.path.normpath(primary)]
+            previous = self.outputs.get(path)
+            if previous is output:
+                return UNCHANGED
+            self.outputs[path] = output
+
+        return CHANGED if previous else ADDED
+
+    def remove(self: Self, path: str) -> bool:
+        with self._lock:
+            return self.outputs.pop(os.path.normpath(path), None) is not None
+
+    def makedirs(self: Self, path: str) -> None:
+        pass
+
+    def reset(self: Self, path: str) -> None:
+        prefix = os.path.normpath(path) + os.sep
+
+        with self._lock:
+            for output_path in [p for p in self.outputs if p.startswith(prefix)]:
+                del self.outputs[output_path]
+
+    def size(self: Self, path: str) -> int:
+        return self.get(path).size
+
+    def stat(self: Self, path: str) -> tuple[int, int] | None:
+        with self._lock:
+            output = self.outputs.get(os.path.normpath(path))
+        return (output.size, output.mtime_ns) if output else None
+
+    def sha256(self: Self, path: str) -> str:
+        return self.get(path).sha256
+
+    def get(self: Self, path: str) -> MemoryOutput:
+        """
+        Looks up an output.
+
+        Args:
+            path: path of the output
+
+        Raises:
+            KeyError: if there is no output at the path
+
+        Returns: MemoryOutput
+
+        """
+        with self._lock:
+            return self.outputs[os.path.normpath(path)]
+
+    def read(self: Self, path: str) -> bytes:
+        """
+        Returns the content of an output.
+
+        Args:
+            path: path of the output
+
+        Raises:
+            KeyError: if there is no output at the path
+
+        Returns: bytes
+
+        """
+        return self.get(path).data
+
+    def __contains__(self: Self, path: str) -> bool:
+        return os.path.normpath(path) in self.outputs
+
+    def __iter__(self: Self) -> Iterator[str]:
+        with self._lock:
+            return iter(sorted(self.outputs))
+
+    def __len__(self: Self) -> int:
+        return len(self.outputs)
+
+    def __repr__(self: Self) -> str:
+        size = sum(output.size for output in self.outputs.values())
+        return f"MemorySink({len(self)} outputs, {size} bytes)"
@@ -0,0 +1,258 @@
+"""
+Incremental synchronisation of the static folder into the public folder.
+
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Self
+
+from manifest import BuildManifest, file_hash
+from output import UNCHANGED, ChangeSet
+from placement import Placer
+from sinks import DISK_SINK, DiskSink, OutputSink
+
+
+class SyncStats:
+    """
+
+    Attributes:
+        copied: number of files copied
+        copied_bytes: number of bytes copied
+        skipped: number of unchanged files skipped
+        skipped_bytes: number of bytes in the skipped files
+        deleted: number of files deleted from the destination
+        deleted_bytes: number of bytes in the deleted files
+        linked: number of duplicate files linked to an identical file
+        linked_bytes: number of bytes in the linked files
+    """
+
+    def __init__(self) -> None:
+        self.copied: int = 0
+        self.copied_bytes: int = 0
+        self.skipped: int = 0
+        self.skipped_bytes: int = 0
+        self.deleted: int = 0
+        self.deleted_bytes: int = 0
+        self.linked: int = 0
+        self.linked_bytes: int = 0
+
+    def __repr__(self: Self) -> str:
+        summary = (
+            f"copied {self.copied} files ({self.copied_bytes} bytes), "
+            f"skipped {self.skipped} files ({self.skipped_bytes} bytes), "
+            f"deleted {self.deleted} files ({self.deleted_bytes} bytes)"
+        )
+        if self.linked:
+            summary += f", linked {self.linked} duplicates ({self.linked_bytes} bytes)"
+        return summary
+
+
+def needs_copy(
+    source_path: str, dest_path: str, use_hash: bool = False, sink: OutputSink = DISK_SINK
+) -> bool:
+    """
+    Determines if the source file differs from the destination output.
+    Files are compared by size and modification time. When use_hash is set,
+    files with the same size but a different modification time are compared
+    by content hash before they are copied.
+
+    Args:
+        source_path: path of the source file
+        dest_path: path of the destination output
+        use_hash: compare content hashes when the modification times differ
+        sink: sink holding the destination output
+
+    Returns: True if the file has to be copied, False otherwise
+
+    """
+    dest_stat = sink.stat(dest_path)
+    if dest_stat is None:
+        return True
+
+    source_stat = os.stat(source_path)
+    size, mtime_ns = dest_stat
+
+    if source_stat.st_size != size:
+        return True
+
+    if source_stat.st_mtime_ns == mtime_ns:
+        return False
+
+    if use_hash and file_hash(source_path) == sink.sha256(dest_path):
+        return False
+
+    return True
+
+
+def find_duplicates(files: list[tuple[str, str]]) -> dict[str, str]:
+    """
+    Finds byte-identical files. Only files that share their size with another
+    file are hashed.
+
+    Args:
+        files: list of (source path, destination path) tuples
+
+    Returns: destination path of every duplicate mapped to the destination
+        path of the first file with the same content
+
+    """
+    by_size: dict[int, list[tuple[str, str]]] = {}
+    for source_path, dest_path in files:
+        by_size.setdefault(os.path.getsize(source_path), []).append((source_path, dest_path))
+
+    duplicates: dict[str, str] = {}
+
+    for group in by_size.values():
+        if len(group) < 2:
+            continue
+
+        first: dict[str, str] = {}
+        for source_path, dest_path in sorted(group):
+            primary = first.setdefault(file_hash(source_path), dest_path)
+            if primary != dest_path:
+                duplicates[dest_path] = primary
+
+    return duplicates
+
+
+def sync_static(
+    path: str = "static",
+    dest: str = "public",
+    manifest: BuildManifest | None = None,
+    use_hash: bool = False,
+    max_workers: int = 8,
+    changes: ChangeSet | None = None,
+    placer: Placer | None = None,
+    dedup: bool = False,
+    names: dict[str, str] | None = None,
+    stylesheets: dict[str, bytes] | None = None,
+    sink: OutputSink | None = None,
+) -> SyncStats:
+    """
+    Copies new and changed files from the static folder to the public folder.
+    Unlike copy_static the public folder is not wiped, so generated pages are
+    left alone. Files copied by a previous sync whose source no longer exists
+    are deleted; the list of synced files is kept in the manifest. Copies
+    whose content turns out to be identical only update the metadata and are
+    counted as skipped. Fingerprinted assets are published under the names
+    given in names and under their original names, so references that are
+    not rewritten, such as raw html in pages, keep working. Stylesheets given
+    in stylesheets are published with that content. Files are placed with
+    the strategy of the placer; with dedup, files that are byte-identical to
+    another static file become hard links of the first copy. Everything,
+    deletions included, goes through the sink, so a MemorySink leaves the
+    public folder untouched.
+
+    Args:
+        path: path of the static folder
+        dest: path of the public folder
+        manifest: manifest used to remember which files are static assets
+        use_hash: compare content hashes when the modification times differ
+        max_workers: maximum number of files copied at once
+        changes: change list the copied and deleted files are recorded in
+        placer: places the files when no sink is given, copies them when
+            not given either
+        dedup: link byte-identical files instead of placing them again
+        names: fingerprinted name of every fingerprinted asset keyed by its
+            path relative to the static folder
+        stylesheets: rewritten content of the fingerprinted stylesheets keyed
+            by their path relative to the static folder
+        sink: sink the files are written to, the disk when None
+
+    Returns: statistics of the sync
+
+    """
+    stats = SyncStats()
+    if sink is None:
+        sink = DiskSink(placer or Placer())
+    files: list[tuple[str, str]] = []
+    rewritten: list[tuple[str, bytes]] = []
+    pending: list[tuple[str, str]] = []
+    synced: set[str] = set()
+
+    for root, _, file_names in os.walk(path):
+        relative_root = os.path.relpath(root, path)
+        sink.makedirs(os.path.join(dest, relative_root))
+
+        for name in file_names:
+            relative_path = os.path.normpath(os.path.join(relative_root, name))
+            key = relative_path.replace(os.sep, "/")
+            source_path = os.path.join(root, name)
+            published = [relative_path]
+            if names and key in names:
+                published.append(names[key])
+
+            for published_path in published:
+                dest_path = os.path.normpath(os.path.join(dest, published_path))
+                synced.add(dest_path)
+                if stylesheets and key in stylesheets:
+                    rewritten.append((dest_path, stylesheets[key]))
+                else:
+                    files.append((source_path, dest_path))
+
+    duplicates = find_duplicates(files) if dedup else {}
+
+    for source_path, dest_path in files:
+        if dest_path in duplicates:
+            continue
+
+        if needs_copy(source_path, dest_path, use_hash, sink):
+            pending.append((source_path, dest_path))
+        else:
+            stats.skipped += 1
+            stats.skipped_bytes += os.path.getsize(source_path)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        statuses = executor.map(lambda item: sink.copy_file(*item), pending)
+
+        for (_, dest_path), status in zip(pending, statuses):
+            if status == UNCHANGED:
+                stats.skipped += 1
+                stats.skipped_bytes += sink.size(dest_path)
+                continue
+
+            stats.copied += 1
+            stats.copied_bytes += sink.size(dest_path)
+            if changes is not None:
+                changes.record(dest_path, status)
+
+    for dest_path, data in rewritten:
+        status = sink.write_bytes(dest_path, data)
+
+        if status == UNCHANGED:
+            stats.skipped += 1
+            stats.skipped_bytes += len(data)
+            continue
+
+        stats.copied += 1
+        stats.copied_bytes += len(data)
+        if changes is not None:
+            changes.record(dest_path, status)
+
+    for dest_path, primary in duplicates.items():
+        status = sink.link(primary, dest_path)
+        size = sink.size(dest_path)
+
+        if status == UNCHANGED:
+            stats.skipped += 1
+            stats.skipped_bytes += size
+            continue
+
+        stats.linked += 1
+        stats.linked_bytes += size
+        if changes is not None:
+            changes.record(dest_path, status)
+
+    if manifest is not None:
+        for dest_path in manifest.assets - synced:
+            dest_stat = sink.stat(dest_path)
+            if dest_stat is not None and sink.remove(dest_path):
+                stats.deleted += 1
+                stats.deleted_bytes += dest_stat[0]
+                if changes is not None:
+                    changes.record_removed(dest_path)
+
+        manifest.assets = synced
+
+    return stats
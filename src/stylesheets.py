@@ -0,0 +1,247 @@
+"""
+Inlining of small stylesheets into the page templates.
+
+A page waits for its external stylesheets before it is first rendered. When
+inlining is enabled, the stylesheet links of a template that point at small
+files of the static folder are replaced by a style element holding the
+minified stylesheet. Links to larger stylesheets are kept and get a preload
+hint in front of them. Templates are compiled once, so every stylesheet is
+read and minified once per build and not for every page.
+
+Fingerprinted stylesheets are published with their url() references
+rewritten to the fingerprinted names of the assets they use.
+
+"""
+
+import hashlib
+import os
+import posixpath
+import re
+
+from fingerprint import asset_url, configure_assets, fingerprint_name
+
+DEFAULT_MAX_SIZE = 8192
+
+_LINK_RE = re.compile(r"<link\b[^>]*>", re.IGNORECASE)
+
+_ATTRIBUTE_RE = re.compile(
+    r"""([^\s"'>/=]+)(?:\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s"'>]+)))?"""
+)
+
+_CSS_TOKEN_RE = re.compile(
+    r"""(?P<comment>/\*.*?\*/)"""
+    r"""|(?P<url>url\(\s*(?:"(?P<double>[^"]*)"|'(?P<single>[^']*)'|(?P<bare>[^)'"\s]*))\s*\))"""
+    r"""|(?P<string>"(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*')"""
+    r"""|(?P<space>\s+)""",
+    re.DOTALL | re.IGNORECASE,
+)
+
+_max_size: int = 0
+_static_path: str = "static"
+
+
+def minify_css(css: str) -> str:
+    """
+    Removes comments and the whitespace css does not need. Strings and urls
+    are kept as they are, and whitespace is only dropped next to braces,
+    semicolons, commas, parentheses and after colons, so selectors and calc()
+    keep their meaning.
+
+    Args:
+        css: stylesheet
+
+    Returns: minified stylesheet
+
+    """
+    out: list[str] = []
+    last = ""
+    position = 0
+
+    for match in _CSS_TOKEN_RE.finditer(css):
+        if text := css[position : match.start()]:
+            out.append(text)
+            last = text[-1]
+        position = match.end()
+
+        if match.group("comment"):
+            continue
+
+        if match.group("space") is None:
+            out.append(match.group(0))
+            last = match.group(0)[-1]
+            continue
+
+        following = css[position : position + 1]
+        if last and following and last not in "{};,:(" and following not in "{};,)":
+            out.append(" ")
+            last = " "
+
+    out.append(css[position:])
+    return "".join(out)
+
+
+def _absolute_urls(css: str, href: str) -> str:
+    """
+    Rewrites the url() references of a stylesheet to the fingerprinted names
+    of the assets. Relative urls, which are relative to the stylesheet, are
+    made root relative so they keep working once it is inlined into a page
+    or published under its fingerprinted name.
+
+    Args:
+        css: stylesheet
+        href: root relative url of the stylesheet
+
+    Returns: stylesheet with root relative urls
+
+    """
+    directory = posixpath.dirname(href)
+
+    def absolute(match: re.Match) -> str:
+        if not match.group("url"):
+            return match.group(0)
+
+        url = match.group("double") or match.group("single") or match.group("bare") or ""
+        if not url or url.startswith(("//", "#")) or ":" in url.split("/")[0]:
+            return match.group(0)
+
+        if not url.startswith("/"):
+            url = posixpath.normpath(posixpath.join(directory, url))
+        url = asset_url(url)
+        return f'url("{url}")' if match.group("bare") is None else f"url({url})"
+
+    return _CSS_TOKEN_RE.sub(absolute, css)
+
+
+def fingerprint_stylesheets(
+    path: str, names: dict[str, str]
+) -> tuple[dict[str, str], dict[str, bytes]]:
+    """
+    Rewrites the url() references of the fingerprinted stylesheets to the
+    fingerprinted names of the other assets and names every stylesheet after
+    the hash of its rewritten content, so a stylesheet gets a new name when
+    an asset it uses changes. References between stylesheets keep the
+    original names, which are published as well. The names of the other
+    assets are configured for url rewriting.
+
+    Args:
+        path: path of the static folder
+        names: fingerprinted path of every asset keyed by its relative path,
+            named after the hash of the files
+
+    Returns: names with the stylesheets renamed, and the rewritten content of
+        every stylesheet keyed by its relative path
+
+    """
+    configure_assets(
+        {name: fingerprinted for name, fingerprinted in names.items() if not _is_stylesheet(name)}
+    )
+    renamed = dict(names)
+    contents: dict[str, bytes] = {}
+
+    for name in filter(_is_stylesheet, names):
+        with open(os.path.join(path, *name.split("/")), "r", encoding="utf-8") as file:
+            data = _absolute_urls(file.read(), "/" + name).encode("utf-8")
+
+        contents[name] = data
+        renamed[name] = fingerprint_name(name, hashlib.sha256(data).hexdigest())
+
+    return renamed, contents
+
+
+def _is_stylesheet(name: str) -> bool:
+    return name.lower().endswith(".css")
+
+
+def _attributes(tag: str) -> dict[str, str]:
+    attributes: dict[str, str] = {}
+
+    for match in _ATTRIBUTE_RE.finditer(tag, len("<link")):
+        name, double, single, bare = match.groups()
+        value = double if double is not None else single if single is not None else bare
+        attributes[name.lower()] = value or ""
+
+    return attributes
+
+
+def _stylesheet_path(href: str) -> str | None:
+    """
+    Resolves the root relative url of a stylesheet to its path in the
+    static folder.
+
+    Returns: path of the stylesheet, or None for urls of other hosts
+
+    """
+    if not href.startswith("/") or href.startswith("//"):
+        return None
+
+    path = re.split(r"[?#]", href, maxsplit=1)[0]
+    return os.path.join(_static_path, *path[1:].split("/"))
+
+
+def inline_stylesheets(html: str) -> tuple[str, list[str]]:
+    """
+    Inlines the stylesheet links of a template segment that point at files
+    of the static folder below the configured size, and adds a preload hint
+    in front of the other ones. Stylesheets using @import or containing a
+    closing style tag are never inlined.
+
+    Args:
+        html: literal segment of a template
+
+    Returns: rewritten segment and the paths of the stylesheets it depends on
+
+    """
+    if not _max_size:
+        return html, []
+
+    dependencies: list[str] = []
+
+    def inline(match: re.Match) -> str:
+        tag = match.group(0)
+        attributes = _attributes(tag)
+        href = attributes.get("href", "")
+        path = _stylesheet_path(href)
+
+        if "stylesheet" not in attributes.get("rel", "").lower().split() or not path:
+            return tag
+        if not os.path.isfile(path):
+            return tag
+
+        dependencies.append(path)
+        if os.path.getsize(path) <= _max_size:
+            with open(path, "r", encoding="utf-8") as file:
+                css = file.read()
+
+            if "@import" not in css and "</style" not in css.lower():
+                media = attributes.get("media")
+                media = f' media="{media}"' if media and media != "all" else ""
+                return f"<style{media}>{minify_css(_absolute_urls(css, href))}</style>"
+
+        return f'<link rel="preload" href="{href}" as="style">{tag}'
+
+    return _LINK_RE.sub(inline, html), dependencies
+
+
+def configure_inline_css(max_size: int, static_path: str = "static") -> None:
+    """
+    Sets the largest stylesheet that is inlined into templates, 0 disables
+    inlining. Also used as part of the initializer of worker processes.
+
+    Args:
+        max_size: size in bytes of the largest inlined stylesheet
+        static_path: path of the static folder stylesheets are read from
+    """
+    global _max_size, _static_path
+
+    _max_size = max_size
+    _static_path = static_path
+
+
+def inline_css_limit() -> int:
+    """
+    Returns the size of the largest stylesheet inlined into templates.
+
+    Returns: size in bytes, 0 when inlining is disabled
+
+    """
+    return _max_size
@@ -0,0 +1,360 @@
+"""
+Small template engine for the html page templates.
+
+Templates support {{ Name }} variables, {% include "partial.html" %} tags and
+one level of layout inheritance with {% extends "layout.html" %} and
+{% block name %}...{% endblock %}. A template is compiled once into a list of
+literal segments and variable slots, so rendering only has to fill the slots
+and join the segments.
+
+"""
+
+import os
+import re
+from typing import Iterable, Iterator, Self
+
+from fingerprint import assets_digest, rewrite_references
+from minify import Minifier, MinifyStats, minify_enabled
+from stylesheets import inline_css_limit, inline_stylesheets
+
+_TOKEN_RE = re.compile(
+    r"\{\{\s*(\w+)\s*\}\}|\{%\s*(\w+)\s*(?:\"([^\"]*)\"|(\w+))?\s*%\}"
+)
+
+_cache: dict[str, tuple[list[tuple[str, int]], str, tuple, "Template"]] = {}
+
+
+class TemplateError(Exception):
+    """Raised when a template can not be compiled or rendered."""
+
+
+class Template:
+    """
+
+    Attributes:
+        path: path of the template file
+        segments: literal segments with an empty placeholder for every slot
+        slots: (segment index, variable name) of every variable
+        dependencies: paths of the template and every layout, partial and
+            inlined stylesheet it uses
+        minified: whether the segments are minified, in which case streamed
+            variables are minified as well
+        bytes_saved: number of bytes removed from the segments by minification
+    """
+
+    def __init__(
+        self, path, segments, slots, dependencies, minified=False, bytes_saved=0, preserved=None
+    ) -> None:
+        self.path: str = path
+        self.segments: list[str] = segments
+        self.slots: list[tuple[int, str]] = slots
+        self.dependencies: list[str] = dependencies
+        self.minified: bool = minified
+        self.bytes_saved: int = bytes_saved
+        self._names: dict[int, str] = dict(slots)
+        names = [name for _, name in slots]
+        self._repeated: set[str] = {name for name in names if names.count(name) > 1}
+        self._preserved: dict[int, tuple[str, ...]] = preserved or {}
+
+    def render(self: Self, context: dict[str, str]) -> str:
+        """
+        Renders the template with the given variables.
+
+        Args:
+            context: values of the template variables
+
+        Raises:
+            TemplateError: if a variable used by the template is missing
+
+        Returns: rendered template
+
+        """
+        segments = self.segments.copy()
+
+        for index, name in self.slots:
+            try:
+                segments[index] = context[name]
+            except KeyError:
+                raise TemplateError(f"{self.path}: undefined variable {name}") from None
+
+        return "".join(segments)
+
+    def stream(
+        self: Self, context: dict[str, str | Iterable[str]], stats: MinifyStats | None = None
+    ) -> Iterator[str]:
+        """
+        Yields the rendered template as fragments. Variables can be strings or
+        iterables of strings, such as HTMLNode.iter_html(), which are streamed
+        into their slot. An iterable used by more than one slot is collected
+        into a list first, so every slot gets the whole value. Iterables
+        streamed into a minified template are minified on the way.
+
+        Args:
+            context: values of the template variables
+            stats: counts the bytes removed from the segments and the
+                streamed variables by minification
+
+        Raises:
+            TemplateError: if a variable used by the template is missing
+
+        Returns: iterator of rendered fragments
+
+        """
+        for _, name in self.slots:
+            if name not in context:
+                raise TemplateError(f"{self.path}: undefined variable {name}")
+
+        return self._stream(context, stats)
+
+    def _stream(
+        self: Self, context: dict[str, str | Iterable[str]], stats: MinifyStats | None
+    ) -> Iterator[str]:
+        if stats is not None:
+            stats.bytes_saved += self.bytes_saved
+
+        repeated = {
+            name: list(context[name])
+            for name in self._repeated
+            if not isinstance(context[name], str)
+        }
+        if repeated:
+            context = {**context, **repeated}
+
+        for index, segment in enumerate(self.segments):
+            name = self._names.get(index)
+
+            if name is None:
+                yield segment
+            elif isinstance(value := context[name], str):
+                yield value
+            elif self.minified:
+                minifier = Minifier(self._preserved.get(index, ()), block=False)
+                yield from minifier.fragments(value)
+                if stats is not None:
+                    stats.bytes_saved += minifier.bytes_saved
+            else:
+                yield from value
+
+    def __repr__(self: Self) -> str:
+        return f"Template({self.path}, {[name for _, name in self.slots]})"
+
+
+def _parse(path: str) -> tuple[str | None, list, dict[str, list]]:
+    """
+    Parses a template file into a tree of nodes. Literals are kept as strings,
+    tags become ("var", name), ("include", path) and ("block", name, children)
+    tuples.
+
+    Args:
+        path: path of the template file
+
+    Raises:
+        TemplateError: if the template has invalid tags
+
+    Returns: layout path or None, list of nodes and the blocks keyed by name
+
+    """
+    with open(path, "r", encoding="utf-8") as file:
+        text = file.read()
+
+    directory = os.path.dirname(path)
+    extends: str | None = None
+    blocks: dict[str, list] = {}
+    stack: list[list] = [[]]
+    names: list[str] = []
+    position = 0
+
+    for match in _TOKEN_RE.finditer(text):
+        if match.start() > position:
+            stack[-1].append(text[position : match.start()])
+        position = match.end()
+
+        variable, tag, quoted, word = match.groups()
+
+        if variable:
+            stack[-1].append(("var", variable))
+        elif tag == "include" and quoted:
+            stack[-1].append(("include", os.path.join(directory, quoted)))
+        elif tag == "extends" and quoted:
+            if extends:
+                raise TemplateError(f"{path}: only one extends tag is allowed")
+            extends = os.path.join(directory, quoted)
+        elif tag == "block" and word:
+            names.append(word)
+            stack.append([])
+        elif tag == "endblock" and names:
+            children = stack.pop()
+            name = names.pop()
+            blocks[name] = children
+            stack[-1].append(("block", name, children))
+        else:
+            raise TemplateError(f"{path}: invalid tag {match.group(0)}")
+
+    if names:
+        raise TemplateError(f"{path}: block {names[-1]} is not closed")
+
+    if position < len(text):
+        stack[-1].append(text[position:])
+
+    return extends, stack[0], blocks
+
+
+def _flatten(
+    nodes: list,
+    overrides: dict[str, list],
+    segments: list[str],
+    slots: list[tuple[int, str]],
+    dependencies: list[str],
+    including: list[str],
+) -> None:
+    """
+    Flattens a tree of nodes into literal segments and variable slots.
+    Partials are inlined and blocks are replaced by their overrides.
+
+    Args:
+        nodes: nodes to flatten
+        overrides: blocks defined by the child template keyed by name
+        segments: list the segments are appended to
+        slots: list the slots are appended to
+        dependencies: list the paths of included partials are appended to
+        including: paths of the partials currently being included
+    """
+    for node in nodes:
+        if isinstance(node, str):
+            last_is_slot = bool(slots) and slots[-1][0] == len(segments) - 1
+            if segments and not last_is_slot:
+                segments[-1] += node
+            else:
+                segments.append(node)
+        elif node[0] == "var":
+            slots.append((len(segments), node[1]))
+            segments.append("")
+        elif node[0] == "include":
+            path = node[1]
+            if path in including:
+                raise TemplateError(f"{path}: recursive include")
+
+            extends, children, _ = _parse(path)
+            if extends:
+                raise TemplateError(f"{path}: partials can not extend a layout")
+
+            dependencies.append(path)
+            _flatten(children, overrides, segments, slots, dependencies, including + [path])
+        else:
+            children = overrides.get(node[1], node[2])
+            _flatten(children, overrides, segments, slots, dependencies, including)
+
+
+def _minify_segments(
+    segments: list[str], slots: list[tuple[int, str]]
+) -> tuple[list[str], dict[int, tuple[str, ...]], int]:
+    """
+    Minifies the literal segments of a template as one document, flushing
+    the minifier at every slot since the value of the slot is not known.
+
+    Args:
+        segments: literal segments with an empty placeholder for every slot
+        slots: (segment index, variable name) of every variable
+
+    Returns: minified segments, the preserved elements open at every slot
+        and the number of bytes saved
+
+    """
+    minifier = Minifier()
+    names = dict(slots)
+    minified: list[str] = []
+    preserved: dict[int, tuple[str, ...]] = {}
+
+    for index, segment in enumerate(segments):
+        if index in names:
+            if flushed := minifier.flush():
+                minified[-1] += flushed
+            preserved[index] = minifier.preserving
+            minified.append(segment)
+        else:
+            minified.append(minifier.feed(segment))
+
+    minified[-1] += minifier.close()
+    return minified, preserved, minifier.bytes_saved
+
+
+def compile_options() -> tuple[bool, int]:
+    """
+    Returns the settings that change how templates are compiled, so compiled
+    templates and the pages built with them can be invalidated when they change.
+
+    Returns: minification setting and size limit of inlined stylesheets
+
+    """
+    return minify_enabled(), inline_css_limit()
+
+
+def compile_template(path: str) -> Template:
+    """
+    Compiles the template at the given path. Small stylesheets are inlined
+    and the others preloaded when stylesheet inlining is enabled. The href and
+    src attributes of the literal segments point at the fingerprinted assets,
+    if any. When minification is enabled the segments are minified once here.
+
+    Args:
+        path: path of the template file
+
+    Raises:
+        TemplateError: if the template or one of its layouts or partials is invalid
+
+    Returns: compiled template
+
+    """
+    extends, nodes, blocks = _parse(path)
+    dependencies = [path]
+    overrides: dict[str, list] = {}
+
+    if extends:
+        layout_extends, nodes, _ = _parse(extends)
+        if layout_extends:
+            raise TemplateError(f"{extends}: layouts can not extend another layout")
+        dependencies.append(extends)
+        overrides = blocks
+
+    segments: list[str] = []
+    slots: list[tuple[int, str]] = []
+    _flatten(nodes, overrides, segments, slots, dependencies, [path])
+    for index, segment in enumerate(segments):
+        segments[index], stylesheets = inline_stylesheets(segment)
+        dependencies.extend(sheet for sheet in stylesheets if sheet not in dependencies)
+    segments = [rewrite_references(segment) for segment in segments]
+
+    if not minify_enabled() or not segments:
+        return Template(path, segments, slots, dependencies)
+
+    segments, preserved, bytes_saved = _minify_segments(segments, slots)
+    return Template(path, segments, slots, dependencies, True, bytes_saved, preserved)
+
+
+def load_template(path: str) -> Template:
+    """
+    Returns the compiled template at the given path. Compiled templates are
+    cached and only compiled again when the template or one of its layouts or
+    partials or inlined stylesheets has been modified, or when the
+    fingerprinted assets or the compile options change.
+
+    Args:
+        path: path of the template file
+
+    Returns: compiled template
+
+    """
+    cached = _cache.get(path)
+
+    if cached:
+        stamps, digest, options, template = cached
+        if digest == assets_digest() and options == compile_options() and all(
+            os.stat(dependency).st_mtime_ns == mtime for dependency, mtime in stamps
+        ):
+            return template
+
+    template = compile_template(path)
+    stamps = [(dependency, os.stat(dependency).st_mtime_ns) for dependency in template.dependencies]
+    _cache[path] = (stamps, assets_digest(), compile_options(), template)
+
+    return template
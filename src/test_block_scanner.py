@@ -0,0 +1,77 @@
+"""
+Unit tests for block_scanner.py
+
+"""
+
+from unittest import TestCase
+
+from block_scanner import lines_to_block_type, scan_blocks
+from markdown_handler import block_to_block_type, markdown_to_blocks
+
+
+class TestBlockScanner(TestCase):
+    """
+    Collection of unit tests for block_scanner.py
+    """
+
+    def test_scan_blocks(self):
+        """
+        Test scan_blocks splits and strips blocks like markdown_to_blocks
+        """
+        markdown = """
+        # This is a heading
+
+  This is a paragraph
+with two lines
+
+
+* first item
+* second item
+"""
+        self.assertEqual(
+            list(scan_blocks(markdown.split("\n"))),
+            [
+                ("heading", ["# This is a heading"]),
+                ("paragraph", ["This is a paragraph", "with two lines"]),
+                ("unordered_list", ["* first item", "* second item"]),
+            ],
+        )
+        self.assertEqual(
+            ["\n".join(lines) for _, lines in scan_blocks(markdown.split("\n"))],
+            markdown_to_blocks(markdown),
+        )
+
+    def test_whitespace_only_blocks_are_skipped(self):
+        """
+        Test scan_blocks skips blocks that only contain whitespace
+        """
+        self.assertEqual(list(scan_blocks(["a", "", "  ", "\t", "", "b"])), [
+            ("paragraph", ["a"]),
+            ("paragraph", ["b"]),
+        ])
+
+    def test_lines_to_block_type(self):
+        """
+        Test lines_to_block_type agrees with block_to_block_type
+        """
+        blocks = [
+            "# heading",
+            "####### too deep",
+            "#no space",
+            "```python\nprint('Hello, World!')\n```",
+            "```\nnot closed",
+            "> quote\n> block",
+            "> quote\nnot a quote",
+            "- list\n* item",
+            "- list\nnot an item",
+            "1. one\n2. two",
+            "1. one\n3. three",
+            "2. two",
+            "plain paragraph",
+        ]
+
+        for block in blocks:
+            with self.subTest(block=block):
+                self.assertEqual(
+                    lines_to_block_type(block.split("\n")), block_to_block_type(block)
+                )
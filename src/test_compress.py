@@ -0,0 +1,92 @@
+"""
+Unit tests for the compress module.
+
+"""
+
+import gzip
+import os
+import unittest
+
+from compress import compress_outputs, remove_compressed
+from fixtures import TempDirTestCase
+from manifest import BuildManifest
+from output import ChangeSet
+
+
+class TestCompressOutputs(TempDirTestCase):
+    """Tests for writing .gz siblings of text outputs."""
+
+    def setUp(self):
+        super().setUp()
+        self.public = os.path.join(self.tmp.name, "public")
+        self.root = self.public
+        self.manifest = BuildManifest(os.path.join(self.tmp.name, "manifest.json"), "")
+        self.page = self.write("blog/index.html", "<p>hello</p>" * 100)
+        self.write("index.css", "body {}")
+        self.write("logo.png", "x" * 2000)
+
+    def compress(self, **kwargs):
+        return compress_outputs(self.public, self.manifest, min_size=100, **kwargs)
+
+    def test_compresses_large_text_outputs(self):
+        stats = self.compress()
+
+        self.assertEqual((stats.compressed, stats.compressed_bytes), (1, 1200))
+        self.assertFalse(os.path.exists(os.path.join(self.public, "index.css.gz")))
+        self.assertFalse(os.path.exists(os.path.join(self.public, "logo.png.gz")))
+        with gzip.open(self.page + ".gz", "rb") as file:
+            self.assertEqual(file.read(), b"<p>hello</p>" * 100)
+
+    def test_skips_unchanged_outputs(self):
+        self.compress()
+        self.assertEqual((self.compress().compressed, self.compress().skipped), (0, 1))
+
+        os.utime(self.page, ns=(0, 0))
+        stats = self.compress()
+        self.assertEqual((stats.compressed, stats.skipped), (0, 1))
+
+        self.write("blog/index.html", "<p>changed</p>" * 100)
+        changes = ChangeSet(self.public)
+        self.assertEqual(self.compress(changes=changes).compressed, 1)
+        self.assertEqual(changes.to_dict()["changed"], ["blog/index.html.gz"])
+
+    def test_removes_stale_gzip_files(self):
+        self.write("archive.tar.gz", "not ours")
+        self.compress()
+        os.remove(self.page)
+
+        changes = ChangeSet(self.public)
+        stats = self.compress(changes=changes)
+
+        self.assertEqual(stats.removed, 1)
+        self.assertFalse(os.path.exists(self.page + ".gz"))
+        self.assertTrue(os.path.exists(os.path.join(self.public, "archive.tar.gz")))
+        self.assertEqual(changes.to_dict()["removed"], ["blog/index.html.gz"])
+
+    def test_remove_compressed(self):
+        self.write("archive.tar.gz", "not ours")
+        self.compress()
+
+        changes = ChangeSet(self.public)
+        self.assertEqual(remove_compressed(self.manifest, changes), 1)
+
+        self.assertFalse(os.path.exists(self.page + ".gz"))
+        self.assertTrue(os.path.exists(os.path.join(self.public, "archive.tar.gz")))
+        self.assertEqual(changes.to_dict()["removed"], ["blog/index.html.gz"])
+        self.assertEqual(self.manifest.compressed, {})
+
+    def test_manifest_keeps_records(self):
+        self.compress()
+        self.manifest.save()
+
+        with open(os.path.join(self.tmp.name, "template.html"), "w", encoding="utf-8") as file:
+            file.write("{{ Content }}")
+        loaded = BuildManifest.load(
+            self.manifest.path, os.path.join(self.tmp.name, "template.html"), force=True
+        )
+
+        self.assertEqual(loaded.compressed, self.manifest.compressed)
+
+
+if __name__ == "__main__":
+    unittest.main()
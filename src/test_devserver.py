@@ -0,0 +1,77 @@
+"""
+Unit tests for the devserver module.
+
+"""
+
+import os
+
+from devserver import PageCache, resolve_source
+from fixtures import TempDirTestCase
+
+
+class TestDevServer(TempDirTestCase):
+    """Tests for resolving and caching pages rendered on demand."""
+
+    def setUp(self):
+        super().setUp()
+        self.content = os.path.join(self.tmp.name, "content")
+        self.template = self.write("template.html", "<title>{{ Title }}</title>{{ Content }}")
+        self.index = self.write("content/index.md", "# Home")
+        self.blog = self.write("content/blog/index.md", "# Blog")
+        self.post = self.write("content/blog/first.md", "# First")
+
+    def touch(self, path):
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    def test_resolve_source(self):
+        cases = [
+            ("/", self.index),
+            ("/index.html", self.index),
+            ("/blog", self.blog),
+            ("/blog/", self.blog),
+            ("/blog/first", self.post),
+            ("/blog/first.html", self.post),
+            ("/blog/first/", None),
+            ("/missing", None),
+            ("/../template", None),
+            ("/..", None),
+        ]
+
+        for url_path, expected in cases:
+            with self.subTest(url_path=url_path):
+                self.assertEqual(resolve_source(url_path, self.content), expected)
+
+    def test_resolve_source_stays_in_the_content_folder(self):
+        self.write("content.md", "# Outside")
+        self.write("content/blog.md", "# Blog page")
+
+        self.assertEqual(resolve_source("/", self.content), self.index)
+        self.assertEqual(resolve_source("/blog/", self.content), self.blog)
+        blog_page = os.path.join(self.content, "blog.md")
+        self.assertEqual(resolve_source("/blog", self.content), blog_page)
+        self.assertIsNone(resolve_source("/..", self.content))
+
+    def test_cache(self):
+        cache = PageCache(self.template, maxsize=1)
+
+        self.assertEqual(cache.get(self.index), b"<title>Home</title><div><h1>Home</h1></div>")
+        cache.get(self.index)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+        cache.get(self.post)
+        cache.get(self.index)
+        self.assertEqual((cache.hits, cache.misses), (1, 3))
+
+    def test_cache_invalidation(self):
+        cache = PageCache(self.template)
+        cache.get(self.index)
+
+        self.write("content/index.md", "# Welcome")
+        self.touch(self.index)
+        self.assertEqual(cache.get(self.index), b"<title>Welcome</title><div><h1>Welcome</h1></div>")
+
+        self.write("template.html", "<h1>{{ Title }}</h1>")
+        self.touch(self.template)
+        self.assertEqual(cache.get(self.index), b"<h1>Welcome</h1>")
+        self.assertEqual(cache.misses, 3)
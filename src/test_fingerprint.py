@@ -0,0 +1,139 @@
+"""
+Unit tests for the fingerprint module.
+
+"""
+
+import os
+import re
+import unittest
+
+from fingerprint import (
+    asset_names,
+    asset_url,
+    configure_assets,
+    fingerprint_name,
+    hash_assets,
+    rewrite_references,
+    split_url,
+)
+from fixtures import TempDirTestCase
+from main import fingerprint_static
+from manifest import BuildManifest
+from markdown_handler import markdown_to_html_node
+from static_sync import sync_static
+from template import load_template
+
+
+class TestFingerprint(TempDirTestCase):
+    """Tests for hashing assets and rewriting their urls."""
+
+    def setUp(self):
+        super().setUp()
+        self.addCleanup(configure_assets, {})
+        self.static = os.path.join(self.tmp.name, "static")
+        self.css = self.write("static/index.css", "body {}")
+        self.write("static/images/logo.png", "png")
+        self.write("static/robots.txt", "User-agent: *")
+
+    def test_fingerprint_name(self):
+        self.assertEqual(fingerprint_name("a/index.css", "0123456789abcdef"), "a/index.01234567.css")
+        self.assertEqual(fingerprint_name("LICENSE", "0123456789abcdef"), "LICENSE.01234567")
+
+    def test_split_url(self):
+        self.assertEqual(split_url("/a.png?v=2#top"), ("/a.png", "?v=2#top"))
+        self.assertEqual(split_url("/a.png#top?v"), ("/a.png", "#top?v"))
+        self.assertEqual(split_url("/a.png"), ("/a.png", ""))
+
+    def test_hash_assets_reuses_unchanged_records(self):
+        records = hash_assets(self.static)
+        self.assertEqual(
+            sorted(os.path.relpath(path, self.static) for path in records),
+            [os.path.join("images", "logo.png"), "index.css"],
+        )
+
+        records[self.css] = dict(records[self.css], sha256="cached")
+        self.assertEqual(hash_assets(self.static, records)[self.css]["sha256"], "cached")
+
+        self.write("static/index.css", "body { margin: 0 }")
+        self.assertNotEqual(hash_assets(self.static, records)[self.css]["sha256"], "cached")
+
+    def test_rewrites_urls(self):
+        configure_assets({"index.css": "index.abcd1234.css", "images/logo.png": "images/logo.1.png"})
+
+        self.assertEqual(asset_url("/index.css?v=2#top"), "/index.abcd1234.css?v=2#top")
+        self.assertEqual(asset_url("/other.css"), "/other.css")
+        self.assertEqual(asset_url(None), None)
+        self.assertEqual(
+            rewrite_references('<link href="/index.css"><a href=\'/images/logo.png\'>'),
+            '<link href="/index.abcd1234.css"><a href=\'/images/logo.1.png\'>',
+        )
+        self.assertEqual(
+            markdown_to_html_node("![logo](/images/logo.png) [css](/index.css)").to_html(),
+            '<div><p><img src="/images/logo.1.png" alt="logo" loading="lazy" decoding="async">'
+            '</img> '
+            '<a href="/index.abcd1234.css">css</a></p></div>',
+        )
+
+    def test_changed_names_drop_cached_output(self):
+        template_path = self.write("template.html", '<link href="/index.css">{{ Content }}')
+        markdown = "![logo](/images/logo.png)"
+
+        configure_assets({"index.css": "index.1.css", "images/logo.png": "images/logo.1.png"})
+        self.assertIn("index.1.css", load_template(template_path).segments[0])
+        self.assertIn("logo.1.png", markdown_to_html_node(markdown).to_html())
+
+        configure_assets({"index.css": "index.2.css", "images/logo.png": "images/logo.2.png"})
+        self.assertIn("index.2.css", load_template(template_path).segments[0])
+        self.assertIn("logo.2.png", markdown_to_html_node(markdown).to_html())
+
+    def test_sync_publishes_fingerprinted_names(self):
+        names = asset_names(self.static, hash_assets(self.static))
+        public = os.path.join(self.tmp.name, "public")
+        sync_static(self.static, public, names=names)
+
+        published = sorted(
+            os.path.relpath(os.path.join(root, name), public).replace(os.sep, "/")
+            for root, _, files in os.walk(public)
+            for name in files
+        )
+        self.assertEqual(
+            published,
+            sorted([names["index.css"], names["images/logo.png"], *names, "robots.txt"]),
+        )
+
+    def test_stylesheet_urls_resolve_in_the_public_folder(self):
+        self.write("static/fonts/a.woff", "font")
+        self.write("static/css/print.css", "p {}")
+        self.write(
+            "static/css/site.css",
+            "@import url(print.css);\n"
+            "@font-face { src: url('../fonts/a.woff?#iefix') }\n"
+            'body { background: url("/images/logo.png") }\n'
+            "a { background: url(data:image/png;base64,AAAA) }\n",
+        )
+        template = self.write("template.html", "{{ Content }}")
+        manifest = BuildManifest.load(os.path.join(self.tmp.name, "manifest.json"), template)
+        public = os.path.join(self.tmp.name, "public")
+
+        names, stylesheets = fingerprint_static(manifest, self.static)
+        sync_static(self.static, public, names=names, stylesheets=stylesheets)
+
+        with open(os.path.join(public, names["css/site.css"]), "r", encoding="utf-8") as file:
+            css = file.read()
+        urls = re.findall(r"""url\(["']?([^"')]*)""", css)
+
+        self.assertEqual(len(urls), 4)
+        self.assertIn(f"/{names['images/logo.png']}", urls)
+        for url in urls:
+            if not url.startswith("data:"):
+                path = os.path.join(public, *url.split("?")[0].lstrip("/").split("/"))
+                self.assertTrue(os.path.isfile(path), url)
+
+        self.write("static/images/logo.png", "another png")
+        renamed, _ = fingerprint_static(manifest, self.static)
+        self.assertNotEqual(renamed["css/site.css"], names["css/site.css"])
+        self.assertEqual(renamed["css/print.css"], names["css/print.css"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -3,6 +3,7 @@ Unit tests for the HTMLNode and LeafNode classes.
 
 """
 
+import io
 import unittest
 
 from htmlnode import HTMLNode, LeafNode, ParentNode
@@ -14,6 +15,13 @@ class TestHTMLNode(unittest.TestCase):
         node = HTMLNode("p", "This is a paragraph", None, {"class": "paragraph"})
         self.assertEqual(node.props_to_html(), ' class="paragraph"')
 
+    def test_props_to_html_escapes_values(self):
+        node = HTMLNode("a", "link", None, {"href": "/a?x=1&y=2", "title": 'say "hi" <b>'})
+        self.assertEqual(
+            node.props_to_html(),
+            ' href="/a?x=1&amp;y=2" title="say &quot;hi&quot; &lt;b&gt;"',
+        )
+
     def test_props_to_html_no_props(self):
         node = HTMLNode("p", "This is a paragraph")
         self.assertEqual(node.props_to_html(), "")
@@ -102,3 +110,35 @@ class TestParentNode(unittest.TestCase):
         self.assertEqual(
             node.to_html(), "<div><div><p>This is a paragraph</p></div></div>"
         )
+
+    def test_iter_html(self):
+        node = ParentNode(
+            "div", [ParentNode("p", [LeafNode("b", "bold"), LeafNode(None, " text")])]
+        )
+        self.assertEqual(
+            list(node.iter_html()),
+            ["<div>", "<p>", "<b>bold</b>", " text", "</p>", "</div>"],
+        )
+
+    def test_write_html(self):
+        node = ParentNode("div", [LeafNode("p", "This is a paragraph")])
+        fp = io.StringIO()
+        node.write_html(fp)
+        self.assertEqual(fp.getvalue(), "<div><p>This is a paragraph</p></div>")
+
+    def test_deep_nesting(self):
+        node = LeafNode(None, "deep")
+        for _ in range(5000):
+            node = ParentNode("span", [node])
+
+        html = node.to_html()
+        self.assertTrue(html.startswith("<span>" * 5000 + "deep</span>"))
+
+    def test_nested_no_children(self):
+        with self.assertRaises(ValueError):
+            ParentNode("div", [ParentNode("p", [])]).to_html()
+
+    def test_slots(self):
+        node = ParentNode("div", [LeafNode("p", "This is a paragraph")])
+        self.assertFalse(hasattr(node, "__dict__"))
+        self.assertFalse(hasattr(node.children[0], "__dict__"))
@@ -0,0 +1,106 @@
+"""
+Unit tests for the images module.
+
+"""
+
+import os
+import struct
+import unittest
+
+from fixtures import TempDirTestCase
+from images import configure_images, image_props, image_size, image_sizes, measure_images
+from markdown_handler import markdown_to_html_node
+
+PNG = b"\x89PNG\r\n\x1a\n" + struct.pack(">I", 13) + b"IHDR" + struct.pack(">II", 640, 480)
+GIF = b"GIF89a" + struct.pack("<HH", 32, 16) + b"\x00" * 8
+JPEG = (
+    b"\xff\xd8"
+    + b"\xff\xe0" + struct.pack(">H", 16) + b"JFIF\x00" + b"\x00" * 9
+    + b"\xff\xc4" + struct.pack(">H", 4) + b"\x00\x00"
+    + b"\xff\xc2" + struct.pack(">HBHH", 11, 8, 300, 400) + b"\x03" + b"\x00" * 3
+)
+WEBP_LOSSY = (
+    b"RIFF" + b"\x00" * 4 + b"WEBPVP8 " + b"\x00" * 4 + b"\x00" * 3
+    + b"\x9d\x01\x2a" + struct.pack("<HH", 100, 50)
+)
+WEBP_LOSSLESS = (
+    b"RIFF" + b"\x00" * 4 + b"WEBPVP8L" + b"\x00" * 4 + b"\x2f"
+    + ((200 - 1) | (150 - 1) << 14).to_bytes(4, "little") + b"\x00" * 7
+)
+WEBP_EXTENDED = (
+    b"RIFF" + b"\x00" * 4 + b"WEBPVP8X" + b"\x00" * 4 + b"\x00" * 4
+    + (4000 - 1).to_bytes(3, "little") + (3000 - 1).to_bytes(3, "little") + b"\x00" * 2
+)
+
+
+class TestImageSize(TempDirTestCase):
+    """Tests for reading dimensions from image headers."""
+
+    def setUp(self):
+        super().setUp()
+        self.addCleanup(configure_images, {})
+        self.static = os.path.join(self.tmp.name, "static")
+        self.root = self.static
+
+    def test_image_size(self):
+        cases = [
+            ("a.png", PNG, (640, 480)),
+            ("a.gif", GIF, (32, 16)),
+            ("a.jpg", JPEG, (400, 300)),
+            ("a.webp", WEBP_LOSSY, (100, 50)),
+            ("b.webp", WEBP_LOSSLESS, (200, 150)),
+            ("c.webp", WEBP_EXTENDED, (4000, 3000)),
+            ("truncated.png", PNG[:20], None),
+            ("truncated.jpg", JPEG[:30], None),
+            ("text.png", b"not an image", None),
+        ]
+        for name, content, size in cases:
+            with self.subTest(name):
+                self.assertEqual(image_size(self.write(name, content)), size)
+
+    def test_measure_images_reuses_unchanged_records(self):
+        png = self.write("images/a.png", PNG)
+        self.write("images/broken.gif", b"GIF")
+        self.write("index.css", b"body {}")
+
+        records = measure_images(self.static)
+        self.assertEqual(image_sizes(self.static, records), {"images/a.png": (640, 480)})
+        self.assertEqual(len(records), 2)
+
+        records[png] = dict(records[png], width=1)
+        self.assertEqual(measure_images(self.static, records)[png]["width"], 1)
+
+        self.write("images/a.png", GIF)
+        self.assertEqual(measure_images(self.static, records)[png]["width"], 32)
+
+    def test_image_props(self):
+        configure_images({"images/a.png": (640, 480)})
+
+        self.assertEqual(
+            image_props("/images/a.png?v=1", "a"),
+            {"alt": "a", "width": "640", "height": "480", "loading": "lazy", "decoding": "async"},
+        )
+        self.assertEqual(
+            image_props("https://example.com/a.png", "b"),
+            {"alt": "b", "loading": "lazy", "decoding": "async"},
+        )
+
+    def test_alt_text_is_escaped(self):
+        self.assertEqual(
+            markdown_to_html_node('![say "hi" & <wave>](/x.png)').to_html(),
+            '<div><p><img src="/x.png" alt="say &quot;hi&quot; &amp; &lt;wave&gt;" '
+            'loading="lazy" decoding="async"></img></p></div>',
+        )
+
+    def test_changed_sizes_drop_cached_output(self):
+        markdown = "![logo](/images/a.png)"
+
+        configure_images({"images/a.png": (640, 480)})
+        self.assertIn('width="640" height="480"', markdown_to_html_node(markdown).to_html())
+
+        configure_images({"images/a.png": (320, 240)})
+        self.assertIn('width="320" height="240"', markdown_to_html_node(markdown).to_html())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+"""
+Unit tests for the inline_cache module.
+
+"""
+
+import unittest
+
+from htmlnode import LeafNode
+from inline_cache import InlineCache, inline_cache
+from markdown_handler import markdown_to_html_node, text_to_children
+
+
+def parse(text):
+    return [LeafNode(None, text)]
+
+
+class TestInlineCache(unittest.TestCase):
+    """Tests for the LRU cache of inline nodes."""
+
+    def test_hit_returns_same_nodes(self):
+        cache = InlineCache(2)
+        first = cache.get("a", parse)
+        second = cache.get("a", parse)
+
+        self.assertIsInstance(first, tuple)
+        self.assertIs(first, second)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_evicts_least_recently_used(self):
+        cache = InlineCache(2)
+        cache.get("a", parse)
+        cache.get("b", parse)
+        cache.get("a", parse)
+        cache.get("c", parse)
+        cache.get("a", parse)
+        cache.get("b", parse)
+
+        self.assertEqual(len(cache), 2)
+        self.assertEqual((cache.hits, cache.misses, cache.evictions), (2, 4, 2))
+
+    def test_size_zero_disables(self):
+        cache = InlineCache(2)
+        cache.get("a", parse)
+        cache.configure(0)
+
+        self.assertEqual(len(cache), 0)
+        self.assertIsNot(cache.get("a", parse), cache.get("a", parse))
+        self.assertEqual((cache.hits, cache.misses, cache.evictions), (0, 1, 1))
+
+    def test_errors_are_not_cached(self):
+        cache = InlineCache(2)
+
+        def fail(text):
+            raise ValueError(text)
+
+        with self.assertRaises(ValueError):
+            cache.get("a", fail)
+        self.assertEqual(len(cache), 0)
+
+    def test_repeated_text_in_page(self):
+        inline_cache.clear()
+        md = "- **same** item\n- **same** item\n\n**same** item"
+        html = markdown_to_html_node(md).to_html()
+
+        self.assertEqual(
+            html,
+            "<div><ul><li><b>same</b> item</li><li><b>same</b> item</li></ul>"
+            "<p><b>same</b> item</p></div>",
+        )
+        self.assertIs(text_to_children("**same** item"), text_to_children("**same** item"))
+        self.assertGreaterEqual(inline_cache.hits, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
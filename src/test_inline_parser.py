@@ -0,0 +1,122 @@
+"""
+Unit tests for the inline_parser module.
+
+"""
+
+from unittest import TestCase
+
+from inline_parser import (
+    spans_to_html_nodes,
+    spans_to_textnodes,
+    tokenize_inline,
+    tokenize_spans,
+)
+from markdown_handler import split_nodes_delimiter, split_nodes_image, split_nodes_link
+from textnode import TextNode, text_node_to_html_node
+
+
+def split_pipeline(text):
+    nodes = [TextNode(text, "text")]
+    nodes = split_nodes_delimiter(nodes, "`", "code")
+    nodes = split_nodes_delimiter(nodes, "**", "bold")
+    nodes = split_nodes_delimiter(nodes, "*", "italic")
+    return split_nodes_link(split_nodes_image(nodes))
+
+
+class TestTokenizeInline(TestCase):
+    """
+    Test class for inline_parser.py
+    """
+
+    def test_all_token_types(self):
+        """
+        Test tokenize_inline with every supported token type
+        """
+        text = "**b** *i* `c` ![alt](/a.png) [link](/a)"
+        self.assertEqual(
+            tokenize_inline(text),
+            [
+                TextNode("b", "bold"),
+                TextNode(" ", "text"),
+                TextNode("i", "italic"),
+                TextNode(" ", "text"),
+                TextNode("c", "code"),
+                TextNode(" ", "text"),
+                TextNode("alt", "image", "/a.png"),
+                TextNode(" ", "text"),
+                TextNode("link", "link", "/a"),
+            ],
+        )
+
+    def test_matches_split_pipeline(self):
+        """
+        Test tokenize_inline produces the same nodes as the split functions
+        """
+        texts = [
+            "",
+            "plain text",
+            "`code with *stars*` and **bold *star* text**",
+            "*see [x](/y)* and [*a*](/b)",
+            "[![image](/i.png)](/link) and ![no url]()",
+            "[not a link] (/x) and [ [link](/y)",
+            "``empty code`` and ****",
+        ]
+
+        for text in texts:
+            with self.subTest(text=text):
+                self.assertEqual(tokenize_inline(text), split_pipeline(text))
+
+    def test_unclosed_delimiter(self):
+        """
+        Test tokenize_inline raises on an unclosed delimiter
+        """
+        for text in ["`code", "**bold", "*italic"]:
+            with self.subTest(text=text):
+                with self.assertRaises(Exception):
+                    tokenize_inline(text)
+
+
+class TestTokenizeSpans(TestCase):
+    """
+    Test class for the span based tokenizer
+    """
+
+    def test_spans(self):
+        """
+        Test tokenize_spans returns offsets into the text
+        """
+        text = "a **b** [c](/d)"
+        self.assertEqual(
+            tokenize_spans(text),
+            [
+                ("text", 0, 2, -1, -1),
+                ("bold", 4, 5, -1, -1),
+                ("text", 7, 8, -1, -1),
+                ("link", 9, 10, 12, 14),
+            ],
+        )
+
+    def test_spans_to_textnodes(self):
+        """
+        Test spans_to_textnodes slices the spans into text nodes
+        """
+        text = "a ![b](/c.png) `d`"
+        self.assertEqual(
+            spans_to_textnodes(text, tokenize_spans(text)),
+            [
+                TextNode("a ", "text"),
+                TextNode("b", "image", "/c.png"),
+                TextNode(" ", "text"),
+                TextNode("d", "code"),
+            ],
+        )
+
+    def test_spans_to_html_nodes(self):
+        """
+        Test spans_to_html_nodes builds the same nodes as text_node_to_html_node
+        """
+        text = "a *b* [c](/d) ![e](/f.png)"
+        self.assertEqual(
+            [repr(node) for node in spans_to_html_nodes(text, tokenize_spans(text))],
+            [repr(text_node_to_html_node(node)) for node in tokenize_inline(text)],
+        )
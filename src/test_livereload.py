@@ -0,0 +1,60 @@
+"""
+Unit tests for the livereload module.
+
+"""
+
+import http.client
+import io
+import threading
+import unittest
+from contextlib import redirect_stderr
+
+from livereload import LIVERELOAD_SCRIPT, LiveReload, inject_livereload, start_server
+from sinks import MemorySink
+
+
+class TestLiveReload(unittest.TestCase):
+    """Tests for the live reload helpers."""
+
+    def test_inject_before_body(self):
+        html = inject_livereload(b"<body><p>hi</p></body></html>")
+        self.assertEqual(
+            html, b"<body><p>hi</p>" + LIVERELOAD_SCRIPT.encode() + b"</body></html>"
+        )
+
+    def test_inject_without_body(self):
+        html = inject_livereload(b"<p>hi</p>")
+        self.assertEqual(html, b"<p>hi</p>" + LIVERELOAD_SCRIPT.encode())
+
+    def test_wait_for_notify(self):
+        livereload = LiveReload()
+        threading.Timer(0.01, livereload.notify).start()
+        self.assertEqual(livereload.wait(0, timeout=5), 1)
+
+    def test_wait_timeout(self):
+        livereload = LiveReload()
+        self.assertEqual(livereload.wait(0, timeout=0.01), 0)
+
+    def test_serves_memory_sink(self):
+        sink = MemorySink()
+        sink.write_bytes("public/blog/index.html", b"<body>post</body>")
+        sink.write_bytes("public/index.css", b"a {}")
+        self.enterContext(redirect_stderr(io.StringIO()))
+        server = start_server("public", 0, LiveReload(), sink)
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+
+        def get(path):
+            connection = http.client.HTTPConnection("127.0.0.1", server.server_port, timeout=5)
+            self.addCleanup(connection.close)
+            connection.request("GET", path)
+            response = connection.getresponse()
+            return response, response.read()
+
+        response, body = get("/blog/")
+        self.assertEqual(body, inject_livereload(b"<body>post</body>"))
+        response, body = get("/index.css")
+        self.assertEqual((response.getheader("Content-Type"), body), ("text/css", b"a {}"))
+        response, _ = get("/blog")
+        self.assertEqual((response.status, response.getheader("Location")), (301, "/blog/"))
+        self.assertEqual(get("/missing.html")[0].status, 404)
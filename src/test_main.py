@@ -1,5 +1,13 @@
+import gzip
+import os
 from unittest import TestCase
-from main import extract_title
+from fixtures import TempDirTestCase
+from main import extract_title, generate_pages_recursive, rebuild_changes
+from manifest import BuildManifest
+from output import ChangeSet
+from placement import Placer
+from sinks import DiskSink
+from static_sync import sync_static
 
 
 class TestMain(TestCase):
@@ -36,3 +44,109 @@ class TestMain(TestCase):
         """
         test_input = """# Title 1\n## Title 2"""
         self.assertEqual(extract_title(test_input), "Title 1")
+
+
+class TestRebuildChanges(TempDirTestCase):
+    """Tests for rebuilding the outputs affected by changed paths."""
+
+    def setUp(self):
+        super().setUp()
+        self.content = os.path.join(self.tmp.name, "content")
+        self.static = os.path.join(self.tmp.name, "static")
+        self.public = os.path.join(self.tmp.name, "public")
+        self.template = self.write("template.html", "<title>{{ Title }}</title>{{ Content }}")
+        self.index = self.write("content/index.md", "# Home")
+        self.post = self.write("content/blog/post.md", "# Post")
+        self.css = self.write("static/site.css", "a {}")
+
+        manifest_path = os.path.join(self.tmp.name, "manifest.json")
+        self.manifest = BuildManifest.load(manifest_path, self.template)
+        generate_pages_recursive(self.content, self.template, self.public, self.manifest)
+        sync_static(self.static, self.public, self.manifest)
+
+    def read(self, name):
+        with open(os.path.join(self.public, name), "r", encoding="utf-8") as file:
+            return file.read()
+
+    def rebuild(self, *changed, **kwargs):
+        return rebuild_changes(
+            set(changed),
+            self.manifest,
+            self.content,
+            self.template,
+            self.static,
+            self.public,
+            **kwargs,
+        )
+
+    def test_page_edit(self):
+        self.write("content/blog/post.md", "# Edited")
+        results = self.rebuild(self.post)
+
+        self.assertEqual([r.source for r in results], [self.post])
+        self.assertEqual(
+            self.read("blog/post.html"), "<title>Edited</title><div><h1>Edited</h1></div>"
+        )
+        self.assertEqual(self.read("index.html"), "<title>Home</title><div><h1>Home</h1></div>")
+
+    def test_page_delete(self):
+        os.remove(self.post)
+
+        self.assertEqual(self.rebuild(self.post), [])
+        self.assertFalse(os.path.exists(os.path.join(self.public, "blog", "post.html")))
+        self.assertNotIn(self.post, self.manifest.pages)
+
+    def test_template_change(self):
+        os.remove(self.post)
+        self.write("template.html", "<main>{{ Content }}</main>")
+        results = self.rebuild(self.template, self.post)
+
+        self.assertEqual([r.source for r in results], [self.index])
+        self.assertEqual(self.read("index.html"), "<main><div><h1>Home</h1></div></main>")
+        self.assertFalse(os.path.exists(os.path.join(self.public, "blog", "post.html")))
+
+    def test_static_change(self):
+        self.write("static/site.css", "b {}")
+        added = self.write("static/fonts/a.txt", "font")
+
+        self.assertEqual(self.rebuild(self.css, added), [])
+        self.assertEqual(self.read("site.css"), "b {}")
+        self.assertEqual(self.read("fonts/a.txt"), "font")
+
+        os.remove(self.css)
+        self.rebuild(self.css)
+        self.assertFalse(os.path.exists(os.path.join(self.public, "site.css")))
+        self.assertEqual(self.read("index.html"), "<title>Home</title><div><h1>Home</h1></div>")
+
+    def test_gzip_files_follow_rewritten_pages(self):
+        page = os.path.join(self.public, "blog", "post.html")
+        self.write("content/blog/post.md", "# Edited")
+        self.rebuild(self.post, gzip_min_size=0)
+        with gzip.open(page + ".gz", "rt", encoding="utf-8") as file:
+            self.assertEqual(file.read(), self.read("blog/post.html"))
+
+        self.write("content/blog/post.md", "# Again")
+        self.rebuild(self.post)
+        self.assertFalse(os.path.exists(page + ".gz"))
+        self.assertEqual(self.manifest.compressed, {})
+
+    def test_rebuild_keeps_build_options(self):
+        changes = ChangeSet(self.public)
+        self.write("static/site.css", "b {}")
+        copy = self.write("static/copy.css", "b {}")
+        self.write("content/blog/post.md", "# Edited")
+        os.remove(self.index)
+        sink = DiskSink(Placer("hardlink"))
+        self.rebuild(self.css, copy, self.post, self.index, sink=sink, changes=changes, dedup=True)
+
+        public_copy = os.path.join(self.public, "copy.css")
+        self.assertTrue(os.path.samefile(public_copy, copy))
+        self.assertTrue(os.path.samefile(os.path.join(self.public, "site.css"), public_copy))
+        self.assertEqual(
+            changes.to_dict(),
+            {
+                "added": ["copy.css"],
+                "changed": ["blog/post.html", "site.css"],
+                "removed": ["index.html"],
+            },
+        )
@@ -0,0 +1,142 @@
+"""
+Unit tests for the BuildManifest class.
+
+"""
+
+import os
+
+from fingerprint import configure_assets
+from fixtures import TempDirTestCase
+from images import configure_images
+from manifest import BuildManifest
+from minify import configure_minify
+from stylesheets import configure_inline_css
+
+
+class TestBuildManifest(TempDirTestCase):
+    """Tests for the BuildManifest class."""
+
+    def setUp(self):
+        super().setUp()
+        self.template = self.write("template.html", "{{ Content }}")
+        self.source = self.write("index.md", "# Title")
+        self.output = self.write("index.html", "<h1>Title</h1>")
+        self.path = os.path.join(self.tmp.name, "manifest.json")
+
+    def built_manifest(self):
+        manifest = BuildManifest.load(self.path, self.template)
+        manifest.record(self.source, self.output)
+        manifest.save()
+        return BuildManifest.load(self.path, self.template)
+
+    def test_unknown_page_is_not_fresh(self):
+        manifest = BuildManifest.load(self.path, self.template)
+        self.assertFalse(manifest.is_fresh(self.source, self.output))
+
+    def test_unchanged_page_is_fresh(self):
+        manifest = self.built_manifest()
+        self.assertTrue(manifest.is_fresh(self.source, self.output))
+
+    def test_touched_but_identical_page_is_fresh(self):
+        manifest = self.built_manifest()
+        stat = os.stat(self.source)
+        os.utime(self.source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        self.assertTrue(manifest.is_fresh(self.source, self.output))
+
+    def test_changed_page_is_not_fresh(self):
+        manifest = self.built_manifest()
+        self.write("index.md", "# Another title")
+        self.assertFalse(manifest.is_fresh(self.source, self.output))
+
+    def test_missing_output_is_not_fresh(self):
+        manifest = self.built_manifest()
+        os.remove(self.output)
+        self.assertFalse(manifest.is_fresh(self.source, self.output))
+
+    def test_template_change_invalidates_pages(self):
+        self.built_manifest()
+        self.write("template.html", "<main>{{ Content }}</main>")
+        manifest = BuildManifest.load(self.path, self.template)
+        self.assertFalse(manifest.is_fresh(self.source, self.output))
+
+    def test_compile_options_invalidate_pages(self):
+        self.addCleanup(configure_minify, False)
+        self.addCleanup(configure_inline_css, 0)
+        self.built_manifest()
+
+        for configure in [lambda: configure_minify(True), lambda: configure_inline_css(1024)]:
+            configure()
+            manifest = BuildManifest.load(self.path, self.template)
+            self.assertFalse(manifest.is_fresh(self.source, self.output))
+
+    def test_force_invalidates_pages(self):
+        self.built_manifest()
+        manifest = BuildManifest.load(self.path, self.template, force=True)
+        self.assertFalse(manifest.is_fresh(self.source, self.output))
+
+    def test_asset_names_change_invalidates_pages(self):
+        self.addCleanup(configure_assets, {})
+        manifest = self.built_manifest()
+        self.assertFalse(manifest.refresh_assets())
+
+        configure_assets({"index.css": "index.1.css"})
+        self.assertTrue(manifest.refresh_assets())
+        self.assertFalse(manifest.is_fresh(self.source, self.output))
+
+        manifest.record(self.source, self.output)
+        manifest.save()
+        manifest = BuildManifest.load(self.path, self.template)
+        self.assertFalse(manifest.refresh_assets())
+        self.assertTrue(manifest.is_fresh(self.source, self.output))
+
+    def test_image_sizes_change_invalidates_pages(self):
+        self.addCleanup(configure_images, {})
+        manifest = self.built_manifest()
+
+        configure_images({"images/a.png": (640, 480)})
+        self.assertTrue(manifest.refresh_assets())
+        self.assertFalse(manifest.refresh_assets())
+
+        configure_images({"images/a.png": (320, 240)})
+        self.assertTrue(manifest.refresh_assets())
+
+    def test_remove_stale(self):
+        manifest = self.built_manifest()
+        self.assertEqual(manifest.remove_stale(), [self.output])
+        self.assertFalse(os.path.exists(self.output))
+        self.assertEqual(manifest.pages, {})
+
+    def test_deleted_page_is_removed_after_template_change(self):
+        other_source = self.write("other.md", "# Other")
+        other_output = self.write("other.html", "<h1>Other</h1>")
+        manifest = BuildManifest.load(self.path, self.template)
+        manifest.record(self.source, self.output)
+        manifest.record(other_source, other_output)
+        manifest.save()
+
+        os.remove(other_source)
+        self.write("template.html", "<main>{{ Content }}</main>")
+        manifest = BuildManifest.load(self.path, self.template)
+        self.assertFalse(manifest.is_fresh(self.source, self.output))
+
+        manifest.record(self.source, self.output)
+        self.assertEqual(manifest.remove_stale(), [other_output])
+        self.assertFalse(os.path.exists(other_output))
+
+        manifest.save()
+        manifest = BuildManifest.load(self.path, self.template)
+        self.assertTrue(manifest.is_fresh(self.source, self.output))
+
+    def test_refresh_keeps_records_for_stale_cleanup(self):
+        self.addCleanup(configure_assets, {})
+        manifest = self.built_manifest()
+
+        configure_assets({"index.css": "index.1.css"})
+        self.assertTrue(manifest.refresh_assets())
+        self.write("template.html", "<main>{{ Content }}</main>")
+        self.assertTrue(manifest.refresh_template(self.template))
+
+        self.assertFalse(manifest.is_fresh(self.source, self.output))
+        manifest.seen.clear()
+        self.assertEqual(manifest.remove_stale(), [self.output])
+
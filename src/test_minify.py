@@ -0,0 +1,119 @@
+"""
+Unit tests for the minify module.
+
+"""
+
+import unittest
+
+from fixtures import TempDirTestCase
+from minify import Minifier, MinifyStats, configure_minify, minify
+from template import compile_template, load_template
+
+DOCUMENT = """<!DOCTYPE html>
+<html>
+  <!-- navigation -->
+  <body class="page"  id='main'>
+    <p>Some   <b>bold</b>
+       <a href="/blog/" title="a  title">text</a> </p>
+    <pre><code>keep   this
+  <!-- and this -->
+    </code></pre>
+    <br/>  <img src="/a.png" alt=""/>
+  </body>
+</html>
+"""
+
+MINIFIED = (
+    "<!DOCTYPE html><html><body class=page id=main><p>Some <b>bold</b> "
+    '<a href=/blog/ title="a  title">text</a></p><pre><code>keep   this\n'
+    "  <!-- and this -->\n    </code></pre><br/><img src=/a.png alt=\"\"/></body></html>"
+)
+
+
+class TestMinifier(unittest.TestCase):
+    """Tests for minifying html."""
+
+    def test_minify(self):
+        self.assertEqual(minify(DOCUMENT), MINIFIED)
+
+    def test_fragments_match_whole_document(self):
+        for size in [1, 3, 7, 64]:
+            minifier = Minifier()
+            fragments = [DOCUMENT[i : i + size] for i in range(0, len(DOCUMENT), size)]
+            html = "".join(minifier.feed(fragment) for fragment in fragments) + minifier.close()
+
+            with self.subTest(size=size):
+                self.assertEqual(html, MINIFIED)
+                self.assertEqual(minifier.bytes_saved, len(DOCUMENT) - len(MINIFIED))
+
+    def test_safe_rewrites(self):
+        cases = [
+            ("<a href=/x/>a</a>", "<a href=/x/>a</a>"),
+            ('<input value="x"/>', "<input value=x />"),
+            ("<i>a</i>\n<i>b</i>", "<i>a</i> <i>b</i>"),
+            ("1 < 2 and 3 > 2", "1 < 2 and 3 > 2"),
+            ("<!--[if IE]><p>old</p><![endif]-->", "<!--[if IE]><p>old</p><![endif]-->"),
+            ("<script>if (a  <b) {}</script>  <p>x</p>", "<script>if (a  <b) {}</script><p>x</p>"),
+            ("a <!-- é --> b", "a b"),
+        ]
+        for html, expected in cases:
+            with self.subTest(html):
+                self.assertEqual(minify(html), expected)
+
+        minifier = Minifier()
+        minifier.feed("a <!-- é --> b")
+        minifier.close()
+        self.assertEqual(minifier.bytes_saved, len("a <!-- é --> b".encode()) - len("a b"))
+
+    def test_bytes_saved_counts_encoded_bytes(self):
+        html = "<p>\n  héllo   wörld  \n</p>\n  <p>日本  語</p>"
+        minifier = Minifier()
+        minified = "".join(minifier.fragments([html[:9], html[9:30], html[30:]]))
+
+        self.assertEqual(minified, "<p>héllo wörld</p><p>日本 語</p>")
+        self.assertEqual(minifier.bytes_saved, len(html.encode()) - len(minified.encode()))
+
+
+class TestMinifiedTemplate(TempDirTestCase):
+    """Tests for templates compiled with minification."""
+
+    def setUp(self):
+        super().setUp()
+        configure_minify(True)
+        self.addCleanup(configure_minify, False)
+
+    def test_segments_and_content_are_minified(self):
+        path = self.write(
+            "page.html",
+            "<html>\n  <title> {{ Title }} </title>\n"
+            "  <main>\n    {{ Content }}\n  </main>\n</html>\n",
+        )
+        template = compile_template(path)
+        self.assertEqual(
+            template.segments, ["<html><title>", "", "</title><main>", "", "</main></html>"]
+        )
+
+        stats = MinifyStats()
+        content = iter(["<p>a  ", "b</p>\n<p>", "c</p>"])
+        html = "".join(template.stream({"Title": "Home", "Content": content}, stats))
+
+        self.assertEqual(html, "<html><title>Home</title><main><p>a b</p><p>c</p></main></html>")
+        self.assertEqual(stats.bytes_saved, template.bytes_saved + 2)
+
+    def test_content_inside_pre_is_preserved(self):
+        path = self.write("page.html", "<pre>  {{ Content }}  </pre>")
+        template = compile_template(path)
+
+        html = "".join(template.stream({"Content": iter(["a  ", " b"])}))
+        self.assertEqual(html, "<pre>  a   b  </pre>")
+
+    def test_setting_change_recompiles(self):
+        path = self.write("page.html", "<p>\n  {{ Content }}\n</p>")
+        self.assertTrue(load_template(path).minified)
+
+        configure_minify(False)
+        self.assertFalse(load_template(path).minified)
+
+
+if __name__ == "__main__":
+    unittest.main()
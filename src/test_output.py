@@ -0,0 +1,81 @@
+"""
+Unit tests for the output module.
+
+"""
+
+import json
+import os
+import unittest
+
+from fixtures import TempDirTestCase
+from output import ADDED, CHANGED, UNCHANGED, ChangeSet, OutputFile, copy_file
+
+
+class TestOutput(TempDirTestCase):
+    """Tests for the write-if-changed output helpers."""
+
+    def setUp(self):
+        super().setUp()
+        self.path = os.path.join(self.tmp.name, "index.html")
+
+    def write_output(self, text):
+        output = OutputFile(self.path)
+        with output as file:
+            file.write(text)
+        return output.status
+
+    def test_output_file_statuses(self):
+        self.assertEqual(self.write_output("<p>a</p>"), ADDED)
+        os.utime(self.path, ns=(0, 0))
+
+        self.assertEqual(self.write_output("<p>a</p>"), UNCHANGED)
+        self.assertEqual(os.stat(self.path).st_mtime_ns, 0)
+
+        self.assertEqual(self.write_output("<p>b</p>"), CHANGED)
+        self.assertEqual(self.read(self.path), b"<p>b</p>")
+        self.assertEqual(os.listdir(self.tmp.name), ["index.html"])
+
+    def test_output_file_error_keeps_destination(self):
+        self.write_output("<p>a</p>")
+
+        with self.assertRaises(ValueError):
+            with OutputFile(self.path) as file:
+                file.write("<p>half")
+                raise ValueError("render failed")
+
+        self.assertEqual(self.read(self.path), b"<p>a</p>")
+        self.assertEqual(os.listdir(self.tmp.name), ["index.html"])
+
+    def test_copy_file(self):
+        source = self.write("source.css", "body {}")
+
+        self.assertEqual(copy_file(source, self.path), ADDED)
+        os.utime(source, ns=(5, 5))
+        self.assertEqual(copy_file(source, self.path), UNCHANGED)
+        self.assertEqual(os.stat(self.path).st_mtime_ns, 5)
+
+        self.write("source.css", "p {}   ")
+        self.assertEqual(copy_file(source, self.path), CHANGED)
+        self.assertEqual(self.read(self.path), b"p {}   ")
+
+    def test_change_set(self):
+        changes = ChangeSet(self.tmp.name)
+        changes.record(os.path.join(self.tmp.name, "blog", "a.html"), ADDED)
+        changes.record(os.path.join(self.tmp.name, "blog", "a.html"), CHANGED)
+        changes.record(os.path.join(self.tmp.name, "b.html"), CHANGED)
+        changes.record(os.path.join(self.tmp.name, "c.html"), UNCHANGED)
+        changes.record_removed(os.path.join(self.tmp.name, "d.html"))
+
+        path = os.path.join(self.tmp.name, "changes.json")
+        changes.write(path)
+        with open(path, "r", encoding="utf-8") as file:
+            data = json.load(file)
+
+        self.assertEqual(
+            data, {"added": ["blog/a.html"], "changed": ["b.html"], "removed": ["d.html"]}
+        )
+        self.assertEqual(len(changes), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
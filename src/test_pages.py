@@ -0,0 +1,129 @@
+"""
+Unit tests for the pages module.
+
+"""
+
+import os
+
+from fixtures import TempDirTestCase
+from minify import configure_minify
+from pages import BuildError, build_pages, collect_pages, extract_title, extract_title_lines
+
+
+class TestBuildPages(TempDirTestCase):
+    """Tests for collecting and rendering pages."""
+
+    def setUp(self):
+        super().setUp()
+        self.content = os.path.join(self.tmp.name, "content")
+        self.template = self.write("template.html", "<title>{{ Title }}</title>{{ Content }}")
+        self.write("content/index.md", "# Home\n\nSome **bold** text")
+        self.write("content/blog/first.md", "# First\n\n* one\n* two")
+        self.write("content/blog/notes.txt", "not a page")
+
+    def test_collect_pages(self):
+        dest = os.path.join(self.tmp.name, "public")
+        pages = collect_pages(self.content, dest)
+        self.assertEqual(
+            pages,
+            [
+                (
+                    os.path.join(self.content, "blog", "first.md"),
+                    os.path.join(dest, "blog", "first.html"),
+                ),
+                (
+                    os.path.join(self.content, "index.md"),
+                    os.path.join(dest, "index.html"),
+                ),
+            ],
+        )
+        self.assertTrue(os.path.isdir(os.path.join(dest, "blog")))
+
+    def test_parallel_matches_serial(self):
+        serial = collect_pages(self.content, os.path.join(self.tmp.name, "serial"))
+        parallel = collect_pages(self.content, os.path.join(self.tmp.name, "parallel"))
+
+        build_pages(serial, self.template)
+        results = build_pages(parallel, self.template, jobs=2)
+
+        for (_, serial_path), (_, parallel_path) in zip(serial, parallel):
+            self.assertEqual(self.read(serial_path), self.read(parallel_path))
+
+        self.assertEqual(
+            [result.bytes_written for result in results],
+            [os.path.getsize(path) for _, path in parallel],
+        )
+
+    def test_unchanged_pages_are_not_rewritten(self):
+        pages = collect_pages(self.content, os.path.join(self.tmp.name, "public"))
+        self.assertEqual([r.status for r in build_pages(pages, self.template)], ["added"] * 2)
+
+        self.write("content/index.md", "# Home\n\nSome *other* text")
+        statuses = [r.status for r in build_pages(pages, self.template)]
+        self.assertEqual(statuses, ["unchanged", "changed"])
+
+    def test_stream_matches_full_render(self):
+        self.write(
+            "content/big.md",
+            "intro\n\n## Sub\n# Big Title\n\n```\ncode\n```\n\n> a\n> b\n\n   \n\n1. x\n2. y\n",
+        )
+        full = collect_pages(self.content, os.path.join(self.tmp.name, "full"))
+        streamed = collect_pages(self.content, os.path.join(self.tmp.name, "streamed"))
+
+        build_pages(full, self.template)
+        results = build_pages(streamed, self.template, stream=True)
+
+        self.assertEqual([r.error for r in results], [None] * 3)
+        for (_, full_path), (_, streamed_path) in zip(full, streamed):
+            self.assertEqual(self.read(full_path), self.read(streamed_path))
+
+    def test_minified_pages_report_bytes_saved(self):
+        self.write("template.html", "<html>\n  <title>{{ Title }}</title>\n  {{ Content }}\n")
+        self.addCleanup(configure_minify, False)
+        plain = collect_pages(self.content, os.path.join(self.tmp.name, "plain"))
+        build_pages(plain, self.template)
+
+        configure_minify(True)
+        for jobs, stream in [(1, False), (2, False), (1, True)]:
+            public = os.path.join(self.tmp.name, f"public{jobs}{stream}")
+            pages = collect_pages(self.content, public)
+            results = build_pages(pages, self.template, jobs=jobs, stream=stream)
+
+            with self.subTest(jobs=jobs, stream=stream):
+                saved = [
+                    os.path.getsize(path) - os.path.getsize(minified)
+                    for (_, path), (_, minified) in zip(plain, pages)
+                ]
+                self.assertEqual([result.bytes_saved for result in results], saved)
+                self.assertNotIn(b"\n", self.read(pages[0][1]))
+
+    def test_stream_failures(self):
+        self.write("content/broken.md", "no title here")
+        self.write("content/empty.md", "# \n\n#\n")
+        pages = collect_pages(self.content, os.path.join(self.tmp.name, "public"))
+
+        results = build_pages(pages, self.template, stream=True)
+        errors = [r.error for r in results if r.error]
+
+        self.assertEqual(errors, ["Exception: Title not found", "Exception: Title not found"])
+
+    def test_extract_title_lines(self):
+        for text in ["a\n# T\n# U", "#  spaced ", "x\n##  no\n# \n# ok"]:
+            self.assertEqual(extract_title_lines(text.split("\n")), extract_title(text))
+
+    def test_failed_page_is_reported(self):
+        self.write("content/broken.md", "no title here")
+        pages = collect_pages(self.content, os.path.join(self.tmp.name, "public"))
+
+        results = build_pages(pages, self.template, jobs=2)
+        errors = [(os.path.basename(r.source), r.error) for r in results if r.error]
+
+        self.assertEqual(errors, [("broken.md", "Exception: Title not found")])
+        self.assertEqual(len([r for r in results if not r.error]), 2)
+
+    def test_fail_fast(self):
+        self.write("content/broken.md", "no title here")
+        pages = collect_pages(self.content, os.path.join(self.tmp.name, "public"))
+
+        with self.assertRaises(BuildError):
+            build_pages(pages, self.template, fail_fast=True)
@@ -0,0 +1,59 @@
+"""
+Unit tests for the pipeline module.
+
+"""
+
+import asyncio
+import os
+import unittest
+
+from fixtures import TempDirTestCase
+from pages import BuildError, build_pages, collect_pages
+from pipeline import build_pages_async
+
+
+class TestBuildPagesAsync(TempDirTestCase):
+    """Tests for the asyncio build pipeline."""
+
+    def setUp(self):
+        super().setUp()
+        self.content = os.path.join(self.tmp.name, "content")
+        self.template = self.write("template.html", "<title>{{ Title }}</title>{{ Content }}")
+        for i in range(12):
+            self.write(f"content/blog/post{i}.md", f"# Post {i}\n\nSome **bold** text\n\n* {i}")
+
+    def build(self, dest, **kwargs):
+        pages = collect_pages(self.content, os.path.join(self.tmp.name, dest))
+        return pages, asyncio.run(build_pages_async(pages, self.template, **kwargs))
+
+    def test_matches_serial(self):
+        serial = collect_pages(self.content, os.path.join(self.tmp.name, "serial"))
+        build_pages(serial, self.template)
+
+        for kwargs in [{"prefetch": 1, "io_workers": 1}, {"jobs": 2}]:
+            pages, results = self.build("async", **kwargs)
+
+            self.assertEqual([r.source for r in results], [source for source, _ in pages])
+            for (_, serial_path), (_, async_path) in zip(serial, pages):
+                self.assertEqual(self.read(serial_path), self.read(async_path))
+
+        self.assertEqual({r.status for r in results}, {"unchanged"})
+
+    def test_failed_page_is_reported(self):
+        self.write("content/broken.md", "no title here")
+        _, results = self.build("public", profile=True)
+        errors = [(os.path.basename(r.source), r.error) for r in results if r.error]
+
+        self.assertEqual(errors, [("broken.md", "Exception: Title not found")])
+        stages = [[name for name, _, _ in r.profile.stages] for r in (results[0], results[-1])]
+        self.assertEqual(stages, [["read", "render", "write"], ["read", "render"]])
+
+    def test_fail_fast(self):
+        self.write("content/broken.md", "no title here")
+
+        with self.assertRaises(BuildError):
+            self.build("public", fail_fast=True, prefetch=2)
+
+
+if __name__ == "__main__":
+    unittest.main()
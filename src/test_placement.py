@@ -0,0 +1,89 @@
+"""
+Unit tests for the placement module.
+
+"""
+
+import os
+import unittest
+
+from fixtures import TempDirTestCase
+from output import ADDED, CHANGED, UNCHANGED
+from placement import STRATEGIES, Placer
+from static_sync import find_duplicates, sync_static
+
+
+class TestPlacer(TempDirTestCase):
+    """Tests for placing files with the different strategies."""
+
+    def setUp(self):
+        super().setUp()
+        self.source = self.write("static/logo.png", b"png" * 1000)
+
+    def test_every_strategy_places_the_file(self):
+        for strategy in STRATEGIES:
+            placer = Placer(strategy)
+            dest = os.path.join(self.tmp.name, strategy + ".png")
+
+            self.assertEqual(placer.place(self.source, dest), ADDED)
+            self.assertEqual(self.read(dest), b"png" * 1000)
+            self.assertEqual(os.stat(dest).st_mtime_ns, os.stat(self.source).st_mtime_ns)
+            self.assertEqual(placer.place(self.source, dest), UNCHANGED)
+            self.assertEqual(sum(placer.counts.values()), 1)
+            self.assertEqual(os.listdir(self.tmp.name).count(strategy + ".png"), 1)
+
+    def test_hardlink_shares_the_file(self):
+        dest = os.path.join(self.tmp.name, "public", "logo.png")
+        os.makedirs(os.path.dirname(dest))
+        Placer("hardlink").place(self.source, dest)
+
+        self.assertTrue(os.path.samefile(self.source, dest))
+
+    def test_replacing_a_link_keeps_the_source(self):
+        dest = os.path.join(self.tmp.name, "logo.png")
+        Placer("hardlink").place(self.source, dest)
+        other = self.write("static/other.png", b"other")
+
+        self.assertEqual(Placer("copy").place(other, dest), CHANGED)
+        self.assertEqual(self.read(self.source), b"png" * 1000)
+
+    def test_unknown_strategy(self):
+        with self.assertRaises(ValueError):
+            Placer("symlink")
+
+
+class TestDeduplication(TempDirTestCase):
+    """Tests for linking byte-identical static files."""
+
+    def setUp(self):
+        super().setUp()
+        self.static = os.path.join(self.tmp.name, "static")
+        self.public = os.path.join(self.tmp.name, "public")
+        for name, content in [("a.png", "same"), ("b/c.png", "same"), ("d.png", "diff")]:
+            self.write(os.path.join("static", name), content)
+
+    def test_find_duplicates(self):
+        files = [
+            (os.path.join(self.static, name), os.path.join(self.public, name))
+            for name in ["a.png", "b/c.png", "d.png"]
+        ]
+        self.assertEqual(
+            find_duplicates(files),
+            {os.path.join(self.public, "b/c.png"): os.path.join(self.public, "a.png")},
+        )
+
+    def test_sync_links_duplicates(self):
+        stats = sync_static(self.static, self.public, dedup=True)
+
+        self.assertEqual((stats.copied, stats.linked), (2, 1))
+        self.assertTrue(
+            os.path.samefile(
+                os.path.join(self.public, "a.png"), os.path.join(self.public, "b/c.png")
+            )
+        )
+
+        stats = sync_static(self.static, self.public, dedup=True)
+        self.assertEqual((stats.copied, stats.linked, stats.skipped), (0, 0, 3))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+"""
+Unit tests for the profiler module.
+
+"""
+
+import json
+import os
+import tempfile
+import unittest
+
+from htmlnode import LeafNode, ParentNode
+from profiler import NULL_PROFILE, BuildProfile, PageProfile, count_nodes
+
+
+class TestProfiler(unittest.TestCase):
+    """Tests for the page and build profiles."""
+
+    def test_count_nodes(self):
+        node = ParentNode("div", [ParentNode("p", [LeafNode(None, "a")]), LeafNode("b", "c")])
+        self.assertEqual(count_nodes(node), 4)
+
+    def test_stage(self):
+        profile = PageProfile("index.md")
+        with profile.stage("parse"):
+            pass
+        with profile.stage("render"):
+            pass
+
+        self.assertEqual([name for name, _, _ in profile.stages], ["parse", "render"])
+        self.assertGreaterEqual(profile.duration, 0)
+
+    def test_null_profile_records_nothing(self):
+        with NULL_PROFILE.stage("parse"):
+            pass
+        NULL_PROFILE.count_nodes(LeafNode(None, "a"))
+
+        self.assertFalse(NULL_PROFILE)
+        self.assertEqual((NULL_PROFILE.stages, NULL_PROFILE.nodes), ([], 0))
+
+    def test_report_and_trace(self):
+        build = BuildProfile()
+        with build.stage("pages"):
+            for source in ["a.md", "b.md"]:
+                profile = PageProfile(source)
+                with profile.stage("parse"):
+                    profile.bytes_read += 10
+                build.add(profile, 20)
+
+        report = build.report(top=1)
+        self.assertIn("pages: 2, read 20 bytes, wrote 40 bytes", report)
+        self.assertEqual(report.count(".md"), 1)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "trace.json")
+            build.write_trace(path)
+            with open(path, "r", encoding="utf-8") as file:
+                events = json.load(file)["traceEvents"]
+
+        self.assertEqual([event["name"] for event in events], ["pages", "parse", "parse"])
+        self.assertTrue(all(event["ph"] == "X" for event in events))
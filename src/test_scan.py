@@ -0,0 +1,63 @@
+"""
+Unit tests for the scan module.
+
+"""
+
+import os
+import unittest
+
+from fixtures import TempDirTestCase
+from scan import scan_files
+
+
+class TestScanFiles(TempDirTestCase):
+    """Tests for the stat-cached folder scan."""
+
+    def setUp(self):
+        super().setUp()
+        self.a = self.write("a.txt", "aaa")
+        self.b = self.write("sub/b.txt", "b")
+        self.write("sub/c.png", "png")
+        self.write(".hidden/d.txt", "d")
+        self.computed = []
+
+    def compute(self, path, entry):
+        self.computed.append(path)
+        return {"length": len(self.read(path)), "previous": entry is not None}
+
+    def scan(self, records=None, **kwargs):
+        return scan_files(
+            self.tmp.name,
+            records,
+            self.compute,
+            lambda path: path.endswith(".txt"),
+            skip_hidden=True,
+            **kwargs,
+        )
+
+    def test_reuses_records_of_unchanged_files(self):
+        records = self.scan()
+        self.assertEqual(sorted(self.computed), [self.a, self.b])
+        self.assertEqual(records[self.a]["length"], 3)
+        self.assertEqual(records[self.a]["size"], 3)
+
+        self.computed.clear()
+        self.write("a.txt", "aaaa")
+        records = self.scan(records)
+        self.assertEqual(self.computed, [self.a])
+        self.assertEqual((records[self.a]["length"], records[self.a]["previous"]), (4, True))
+        self.assertEqual(records[self.b]["previous"], False)
+
+        os.remove(self.b)
+        self.assertEqual(list(self.scan(records)), [self.a])
+
+    def test_relative_keys_and_min_size(self):
+        records = self.scan(relative=True, min_size=2)
+        self.assertEqual(list(records), ["a.txt"])
+
+        records = self.scan(relative=True)
+        self.assertEqual(sorted(records), ["a.txt", "sub/b.txt"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,216 @@
+"""
+Unit tests for the server module.
+
+"""
+
+import gzip
+import http.client
+import json
+import os
+import socket
+import threading
+import time
+import unittest
+
+from fixtures import TempDirTestCase
+from server import FileCache, StaticServer, build_etags, parse_range, write_etags
+
+
+class TestStaticServer(TempDirTestCase):
+    """Tests for serving the public folder."""
+
+    def setUp(self):
+        super().setUp()
+        self.public = os.path.join(self.tmp.name, "public")
+        self.root = self.public
+        self.page = self.write("blog/index.html", b"<p>hello</p>" * 10)
+        self.write("blog/index.html.gz", gzip.compress(b"<p>hello</p>" * 10))
+        self.write("index.1234abcd.css", b"body {}")
+        self.write("asset-manifest.json", json.dumps({"index.css": "index.1234abcd.css"}).encode())
+        self.write(".index.html.1.tmp", b"partial")
+
+        self.etags = write_etags(self.public, os.path.join(self.tmp.name, "etags.json"))
+        self.server = self.start(workers=4)
+        self.connection = self.connect(self.server)
+
+    def start(self, **kwargs):
+        server = StaticServer(("127.0.0.1", 0), self.public, self.etags, quiet=True, **kwargs)
+        threading.Thread(target=server.serve_forever, args=(0.01,), daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        return server
+
+    def connect(self, server):
+        connection = http.client.HTTPConnection("127.0.0.1", server.server_port, timeout=5)
+        self.addCleanup(connection.close)
+        return connection
+
+    def get(self, path, **headers):
+        self.connection.request("GET", path, headers=headers)
+        response = self.connection.getresponse()
+        return response, response.read()
+
+    def test_keep_alive_and_conditional_requests(self):
+        response, body = self.get("/blog/")
+        etag = response.getheader("ETag")
+
+        self.assertEqual((response.status, body), (200, b"<p>hello</p>" * 10))
+        self.assertEqual(response.getheader("Content-Type"), "text/html; charset=utf-8")
+        self.assertEqual(response.getheader("Cache-Control"), "no-cache")
+        self.assertEqual(response.getheader("Vary"), "Accept-Encoding")
+        self.assertTrue(etag.startswith('"'))
+
+        response, body = self.get("/blog/index.html", **{"If-None-Match": etag})
+        self.assertEqual((response.status, body), (304, b""))
+
+        last_modified = response.getheader("Last-Modified")
+        response, _ = self.get("/blog/index.html", **{"If-Modified-Since": last_modified})
+        self.assertEqual(response.status, 304)
+
+        with open(self.page, "ab") as file:
+            file.write(b"!")
+        response, _ = self.get("/blog/index.html", **{"If-None-Match": etag})
+        self.assertEqual(response.status, 200)
+        self.assertNotEqual(response.getheader("ETag"), etag)
+
+    def test_ranges(self):
+        response, body = self.get("/blog/index.html", Range="bytes=3-10")
+        self.assertEqual((response.status, body), (206, b"hello</p"))
+        self.assertEqual(response.getheader("Content-Range"), "bytes 3-10/120")
+
+        response, body = self.get("/blog/index.html", Range="bytes=-4")
+        self.assertEqual((response.status, body), (206, b"</p>"))
+
+        response, _ = self.get("/blog/index.html", Range="bytes=500-")
+        self.assertEqual(response.status, 416)
+        self.assertEqual(response.getheader("Content-Range"), "bytes */120")
+
+        response, body = self.get("/blog/index.html", Range="bytes=0-1", **{"If-Range": '"old"'})
+        self.assertEqual((response.status, len(body)), (200, 120))
+
+    def test_gzip_sibling(self):
+        response, body = self.get("/blog/index.html", **{"Accept-Encoding": "br, gzip"})
+
+        self.assertEqual(response.getheader("Content-Encoding"), "gzip")
+        self.assertEqual(gzip.decompress(body), b"<p>hello</p>" * 10)
+
+        response, body = self.get("/blog/index.html", **{"Accept-Encoding": "gzip;q=0"})
+        self.assertIsNone(response.getheader("Content-Encoding"))
+
+    def test_outdated_gzip_sibling(self):
+        self.write("blog/index.html", b"<p>changed</p>")
+        os.utime(self.page + ".gz", ns=(0, 0))
+
+        response, body = self.get("/blog/index.html", **{"Accept-Encoding": "gzip"})
+        self.assertIsNone(response.getheader("Content-Encoding"))
+        self.assertEqual(body, b"<p>changed</p>")
+
+    def test_gzip_sibling_compressed_by_the_build(self):
+        compressed = {self.page: {"sha256": self.etags["blog/index.html"]["sha256"]}}
+        self.etags = write_etags(self.public, os.path.join(self.tmp.name, "etags.json"), compressed)
+        self.assertEqual(
+            self.etags["blog/index.html.gz"]["source_sha256"], compressed[self.page]["sha256"]
+        )
+        self.assertNotIn("source_sha256", self.etags["blog/index.html"])
+        self.connection = self.connect(self.start())
+
+        os.utime(self.page + ".gz", ns=(0, 0))
+        response, _ = self.get("/blog/index.html", **{"Accept-Encoding": "gzip"})
+        self.assertEqual(response.getheader("Content-Encoding"), "gzip")
+
+        self.write("blog/index.html", b"<p>changed</p>")
+        os.utime(self.page + ".gz")
+        response, body = self.get("/blog/index.html", **{"Accept-Encoding": "gzip"})
+        self.assertIsNone(response.getheader("Content-Encoding"))
+        self.assertEqual(body, b"<p>changed</p>")
+
+    def test_cache_control_and_missing_files(self):
+        response, _ = self.get("/index.1234abcd.css")
+        self.assertEqual(response.getheader("Cache-Control"), "public, max-age=31536000, immutable")
+
+        response, _ = self.get("/blog")
+        self.assertEqual((response.status, response.getheader("Location")), (301, "/blog/"))
+
+        for path in ["/missing", "/.index.html.1.tmp", "/../etags.json"]:
+            with self.subTest(path=path):
+                self.connection.close()
+                self.assertEqual(self.get(path)[0].status, 404)
+
+    def test_idle_connections_do_not_hold_workers(self):
+        server = self.start(workers=2)
+        idle = [self.connect(server) for _ in range(5)]
+        for connection in idle:
+            connection.request("GET", "/blog/")
+            self.assertEqual(connection.getresponse().read(), b"<p>hello</p>" * 10)
+
+        start = time.monotonic()
+        connection = self.connect(server)
+        connection.request("GET", "/index.1234abcd.css")
+        self.assertEqual(connection.getresponse().read(), b"body {}")
+        self.assertLess(time.monotonic() - start, 1)
+
+        for connection in idle:
+            connection.request("GET", "/index.1234abcd.css")
+            self.assertEqual(connection.getresponse().status, 200)
+
+    def test_pipelined_requests(self):
+        with socket.create_connection(("127.0.0.1", self.server.server_port), 5) as client:
+            client.sendall(
+                b"GET /index.1234abcd.css HTTP/1.1\r\nHost: a\r\n\r\n"
+                b"HEAD /blog/ HTTP/1.1\r\nHost: a\r\nConnection: close\r\n\r\n"
+            )
+            responses = b""
+            while data := client.recv(4096):
+                responses += data
+
+        self.assertEqual(responses.count(b"HTTP/1.1 200 OK"), 2)
+        self.assertIn(b"\r\n\r\nbody {}HTTP/1.1 200 OK", responses)
+
+    def test_idle_connections_are_closed(self):
+        server = self.start(workers=1, idle_timeout=0.05)
+
+        with socket.create_connection(("127.0.0.1", server.server_port), 5) as client:
+            client.sendall(b"GET /index.1234abcd.css HTTP/1.1\r\nHost: a\r\n\r\n")
+            response = b""
+            while not response.endswith(b"body {}"):
+                response += client.recv(4096)
+
+            start = time.monotonic()
+            self.assertEqual(client.recv(4096), b"")
+            self.assertLess(time.monotonic() - start, 2)
+
+
+class TestServerHelpers(TempDirTestCase):
+    """Tests for ranges, ETag records and the file cache."""
+
+    def test_parse_range(self):
+        self.assertEqual(parse_range("bytes=0-", 10), (0, 9))
+        self.assertEqual(parse_range("bytes=5-100", 10), (5, 9))
+        self.assertEqual(parse_range("bytes=-20", 10), (0, 9))
+        self.assertIsNone(parse_range("bytes=0-1,3-4", 10))
+        self.assertIsNone(parse_range("items=0-1", 10))
+        with self.assertRaises(ValueError):
+            parse_range("bytes=10-", 10)
+
+    def test_build_etags_reuses_unchanged_records(self):
+        self.write("index.html", "<p>hi</p>")
+
+        records = build_etags(self.tmp.name)
+        records["index.html"] = dict(records["index.html"], sha256="cached")
+        self.assertEqual(build_etags(self.tmp.name, records)["index.html"]["sha256"], "cached")
+
+    def test_file_cache(self):
+        path = self.write("a.css", b"x" * 10)
+
+        cache = FileCache(max_bytes=15, max_file_size=10)
+        self.assertEqual(cache.get(path, os.stat(path)), b"x" * 10)
+        self.assertEqual(cache.get(path, os.stat(path)), b"x" * 10)
+        self.assertEqual((cache.hits, cache.misses, cache.size), (1, 1, 10))
+
+        with open(path, "ab") as file:
+            file.write(b"y")
+        self.assertIsNone(cache.get(path, os.stat(path)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,138 @@
+"""
+Unit tests for the sinks module.
+
+"""
+
+import os
+import unittest
+
+from fixtures import TempDirTestCase
+from main import copy_static, generate_pages_recursive
+from manifest import BuildManifest
+from sinks import DISK_SINK, MemorySink
+from static_sync import sync_static
+
+
+class TestMemorySink(TempDirTestCase):
+    """Tests for building into memory."""
+
+    def setUp(self):
+        super().setUp()
+        self.content = os.path.join(self.tmp.name, "content")
+        self.static = os.path.join(self.tmp.name, "static")
+        self.template = self.write("template.html", "<title>{{ Title }}</title>{{ Content }}")
+        self.write("static/css/site.css", "a {}")
+        self.write("content/index.md", "# Home\n\nSome **bold** text")
+        for i in range(3):
+            self.write(f"content/blog/post{i}.md", f"# Post {i}\n\n* {i}")
+
+    def build(self, dest, sink=DISK_SINK, **kwargs):
+        dest = os.path.join(self.tmp.name, dest)
+        copy_static(self.static, dest, sink=sink)
+        return generate_pages_recursive(self.content, self.template, dest, sink=sink, **kwargs)
+
+    def test_matches_disk_build_without_writing(self):
+        self.build("disk")
+        disk = os.path.join(self.tmp.name, "disk")
+
+        for kwargs in [{}, {"jobs": 2}, {"use_async": True, "jobs": 2}, {"stream": True}]:
+            with self.subTest(**kwargs):
+                sink = MemorySink()
+                results = self.build("memory", sink, **kwargs)
+
+                self.assertFalse(os.path.exists(os.path.join(self.tmp.name, "memory")))
+                self.assertEqual({r.status for r in results}, {"added"})
+                self.assertEqual(len(sink), 5)
+                for root, _, files in os.walk(disk):
+                    for name in files:
+                        path = os.path.join(root, name)
+                        memory_path = os.path.join(
+                            self.tmp.name, "memory", os.path.relpath(path, disk)
+                        )
+                        with open(path, "rb") as file:
+                            self.assertEqual(sink.read(memory_path), file.read())
+
+    def test_statuses_and_reset(self):
+        sink = MemorySink()
+        self.build("public", sink)
+        page = os.path.join(self.tmp.name, "public", "blog", "post0.html")
+        mtime_ns = sink.get(page).mtime_ns
+
+        public = os.path.join(self.tmp.name, "public")
+        results = generate_pages_recursive(self.content, self.template, public, sink=sink)
+        self.assertEqual({r.status for r in results}, {"unchanged"})
+        self.assertEqual(sink.get(page).mtime_ns, mtime_ns)
+        self.assertEqual(results[1].bytes_written, sink.size(page))
+
+        self.write("content/blog/post0.md", "# Changed")
+        results = generate_pages_recursive(self.content, self.template, public, sink=sink)
+        self.assertEqual([r.status for r in results if r.path == page], ["changed"])
+
+        copy_static(self.static, os.path.join(public, "blog"), sink=sink)
+        self.assertNotIn(page, sink)
+        self.assertIn(os.path.join(public, "blog", "css", "site.css"), sink)
+        self.assertIn(os.path.join(public, "index.html"), sink)
+
+    def test_sync_static_leaves_public_untouched(self):
+        self.write("static/images/a.png", "png")
+        self.write("static/images/b.png", "png")
+        self.write("static/old.txt", "old")
+        public = os.path.join(self.tmp.name, "public")
+        manifest = BuildManifest(os.path.join(self.tmp.name, "manifest.json"), "")
+        sink = MemorySink()
+
+        def sync():
+            return sync_static(
+                self.static,
+                public,
+                manifest,
+                dedup=True,
+                names={"images/a.png": "images/a.123.png"},
+                stylesheets={"css/site.css": b"b {}"},
+                sink=sink,
+            )
+
+        stats = sync()
+        self.assertEqual((stats.copied, stats.linked, stats.skipped), (3, 2, 0))
+        self.assertEqual(sink.read(os.path.join(public, "css", "site.css")), b"b {}")
+        self.assertIs(
+            sink.get(os.path.join(public, "images", "b.png")),
+            sink.get(os.path.join(public, "images", "a.png")),
+        )
+
+        os.remove(os.path.join(self.static, "old.txt"))
+        stats = sync()
+        self.assertEqual((stats.copied, stats.deleted, stats.skipped), (0, 1, 4))
+        self.assertNotIn(os.path.join(public, "old.txt"), sink)
+        self.assertIn(os.path.join(public, "images", "a.123.png"), sink)
+        self.assertFalse(os.path.exists(public))
+
+    def test_deleted_source_is_removed(self):
+        public = os.path.join(self.tmp.name, "public")
+        manifest = BuildManifest(os.path.join(self.tmp.name, "manifest.json"), "")
+        sink = MemorySink()
+        generate_pages_recursive(self.content, self.template, public, manifest, sink=sink)
+        self.assertEqual(manifest.remove_stale(sink), [])
+
+        os.remove(os.path.join(self.content, "blog", "post1.md"))
+        manifest.seen.clear()
+        results = generate_pages_recursive(self.content, self.template, public, manifest, sink=sink)
+
+        page = os.path.join(public, "blog", "post1.html")
+        self.assertEqual(len(results), 3)
+        self.assertEqual(manifest.remove_stale(sink), [page])
+        self.assertNotIn(page, sink)
+        self.assertEqual(len(sink), 3)
+        self.assertFalse(os.path.exists(manifest.path))
+
+    def test_failed_page_is_not_stored(self):
+        self.write("content/broken.md", "no title here")
+        sink = MemorySink()
+        results = self.build("public", sink)
+
+        self.assertEqual([r.error for r in results if r.error], ["Exception: Title not found"])
+        self.assertNotIn(os.path.join(self.tmp.name, "public", "broken.html"), sink)
+
+
+if __name__ == "__main__":
+    unittest.main()
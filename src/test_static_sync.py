@@ -0,0 +1,74 @@
+"""
+Unit tests for the static_sync module.
+
+"""
+
+import os
+
+from fixtures import TempDirTestCase
+from manifest import BuildManifest
+from output import ChangeSet
+from static_sync import sync_static
+
+
+class TestSyncStatic(TempDirTestCase):
+    """Tests for the sync_static function."""
+
+    def setUp(self):
+        super().setUp()
+        self.static = os.path.join(self.tmp.name, "static")
+        self.public = os.path.join(self.tmp.name, "public")
+        self.manifest = BuildManifest(os.path.join(self.tmp.name, "manifest.json"), "")
+        self.write("static/index.css", "body {}")
+        self.write("static/images/logo.png", "png")
+
+    def sync(self, **kwargs):
+        return sync_static(self.static, self.public, self.manifest, **kwargs)
+
+    def test_copies_new_files(self):
+        stats = self.sync()
+        self.assertEqual((stats.copied, stats.copied_bytes), (2, 10))
+        self.assertTrue(os.path.exists(os.path.join(self.public, "images/logo.png")))
+
+    def test_skips_unchanged_files(self):
+        self.sync()
+        stats = self.sync()
+        self.assertEqual((stats.copied, stats.skipped, stats.skipped_bytes), (0, 2, 10))
+
+    def test_copies_changed_files(self):
+        self.sync()
+        self.write("static/index.css", "body { margin: 0 }")
+        stats = self.sync()
+        self.assertEqual((stats.copied, stats.skipped), (1, 1))
+
+    def test_hash_skips_touched_files(self):
+        self.sync()
+        path = os.path.join(self.static, "index.css")
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        stats = self.sync()
+        self.assertEqual((stats.copied, stats.skipped), (0, 2))
+        dest_stat = os.stat(os.path.join(self.public, "index.css"))
+        self.assertEqual(dest_stat.st_mtime_ns, stat.st_mtime_ns + 10**9)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 2 * 10**9))
+        self.assertEqual(self.sync(use_hash=True).copied, 0)
+
+    def test_records_changes(self):
+        self.sync()
+        self.write("static/index.css", "body { margin: 0 }")
+        os.remove(os.path.join(self.static, "images/logo.png"))
+        changes = ChangeSet(self.public)
+        self.sync(changes=changes)
+
+        self.assertEqual(
+            changes.to_dict(), {"added": [], "changed": ["index.css"], "removed": ["images/logo.png"]}
+        )
+
+    def test_deletes_removed_files_only(self):
+        self.sync()
+        page = self.write("public/index.html", "<html></html>")
+        os.remove(os.path.join(self.static, "images/logo.png"))
+        stats = self.sync()
+        self.assertEqual((stats.deleted, stats.deleted_bytes), (1, 3))
+        self.assertFalse(os.path.exists(os.path.join(self.public, "images/logo.png")))
+        self.assertTrue(os.path.exists(page))
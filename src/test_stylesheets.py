@@ -0,0 +1,83 @@
+"""
+Unit tests for the stylesheets module.
+
+"""
+
+import os
+import unittest
+
+from fingerprint import configure_assets
+from fixtures import TempDirTestCase
+from stylesheets import configure_inline_css, inline_stylesheets, minify_css
+from template import compile_template, load_template
+
+
+class TestInlineStylesheets(TempDirTestCase):
+    """Tests for inlining and preloading the stylesheets of templates."""
+
+    def setUp(self):
+        super().setUp()
+        self.addCleanup(configure_inline_css, 0)
+        self.static = os.path.join(self.tmp.name, "static")
+        configure_inline_css(100, self.static)
+        self.css = self.write("static/css/site.css", "a {\n  color : red;  /* note */\n}\n")
+        self.write("static/big.css", "p { margin: 0 }\n" * 20)
+
+    def test_minify_css(self):
+        css = 'a :hover , b > c {\n  width: calc( 1px + 2px );\n  content: "a  b"; }\n'
+        self.assertEqual(
+            minify_css(css), 'a :hover,b > c{width:calc(1px + 2px);content:"a  b";}'
+        )
+
+    def test_small_stylesheets_are_inlined(self):
+        html, dependencies = inline_stylesheets(
+            '<link rel="stylesheet" href="/css/site.css">'
+            '<link rel="stylesheet" href="/big.css" media="print">'
+            '<link rel="icon" href="/favicon.ico">'
+            '<link rel="stylesheet" href="https://example.com/a.css">'
+        )
+
+        self.assertEqual(
+            html,
+            "<style>a{color :red;}</style>"
+            '<link rel="preload" href="/big.css" as="style">'
+            '<link rel="stylesheet" href="/big.css" media="print">'
+            '<link rel="icon" href="/favicon.ico">'
+            '<link rel="stylesheet" href="https://example.com/a.css">',
+        )
+        self.assertEqual(dependencies, [self.css, os.path.join(self.static, "big.css")])
+
+    def test_relative_urls_are_rewritten(self):
+        self.addCleanup(configure_assets, {})
+        configure_assets({"css/fonts/a.woff": "css/fonts/a.1.woff", "b.png": "b.1.png"})
+        self.write(
+            "static/css/site.css", "@font-face { src: url('fonts/a.woff') } b { x: url(/b.png) }"
+        )
+
+        html, _ = inline_stylesheets('<link href="/css/site.css" rel="stylesheet">')
+        self.assertEqual(
+            html, '<style>@font-face{src:url("/css/fonts/a.1.woff")}b{x:url(/b.1.png)}</style>'
+        )
+
+    def test_template_inlines_once_and_tracks_the_stylesheet(self):
+        template_path = self.write(
+            "template.html", '<link href="/css/site.css" rel="stylesheet">{{ Content }}'
+        )
+        template = compile_template(template_path)
+
+        self.assertEqual(template.segments[0], "<style>a{color :red;}</style>")
+        self.assertIn(self.css, template.dependencies)
+
+        self.write("static/css/site.css", "a { color: blue }")
+        os.utime(self.css, ns=(0, 0))
+        self.assertEqual(load_template(template_path).segments[0], "<style>a{color:blue}</style>")
+
+        configure_inline_css(0)
+        self.assertEqual(
+            load_template(template_path).segments[0],
+            '<link href="/css/site.css" rel="stylesheet">',
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+"""
+Unit tests for the template module.
+
+"""
+
+import os
+
+from fixtures import TempDirTestCase
+from template import TemplateError, compile_template, load_template
+
+
+class TestTemplate(TempDirTestCase):
+    """Tests for compiling and rendering templates."""
+
+    def test_variables(self):
+        path = self.write("page.html", "<title> {{ Title }} </title>{{Content}}{{ Title }}")
+        template = compile_template(path)
+        self.assertEqual(
+            template.render({"Title": "Home", "Content": "<p>hi</p>"}),
+            "<title> Home </title><p>hi</p>Home",
+        )
+
+    def test_segments(self):
+        path = self.write("page.html", "<h1>{{ Title }}</h1>")
+        template = compile_template(path)
+        self.assertEqual(template.segments, ["<h1>", "", "</h1>"])
+        self.assertEqual(template.slots, [(1, "Title")])
+
+    def test_missing_variable(self):
+        path = self.write("page.html", "{{ Title }}")
+        with self.assertRaises(TemplateError):
+            compile_template(path).render({})
+
+    def test_include(self):
+        self.write("header.html", "<header>{{ Title }}</header>")
+        path = self.write("page.html", '{% include "header.html" %}<main>{{ Content }}</main>')
+        template = compile_template(path)
+        self.assertEqual(
+            template.render({"Title": "Home", "Content": "hi"}),
+            "<header>Home</header><main>hi</main>",
+        )
+        self.assertEqual(len(template.dependencies), 2)
+
+    def test_recursive_include(self):
+        path = self.write("page.html", '{% include "page.html" %}')
+        with self.assertRaises(TemplateError):
+            compile_template(path)
+
+    def test_layout(self):
+        self.write(
+            "layout.html",
+            "<title>{% block title %}Default{% endblock %}</title>"
+            "<body>{% block body %}{% endblock %}</body>",
+        )
+        path = self.write(
+            "page.html",
+            '{% extends "layout.html" %}{% block body %}<p>{{ Content }}</p>{% endblock %}',
+        )
+        self.assertEqual(
+            compile_template(path).render({"Content": "hi"}),
+            "<title>Default</title><body><p>hi</p></body>",
+        )
+
+    def test_nested_layout(self):
+        self.write("base.html", "{% block body %}{% endblock %}")
+        self.write("layout.html", '{% extends "base.html" %}')
+        path = self.write("page.html", '{% extends "layout.html" %}')
+        with self.assertRaises(TemplateError):
+            compile_template(path)
+
+    def test_unclosed_block(self):
+        path = self.write("page.html", "{% block body %}")
+        with self.assertRaises(TemplateError):
+            compile_template(path)
+
+    def test_load_template_cache(self):
+        path = self.write("page.html", "<p>{{ Content }}</p>")
+        template = load_template(path)
+        self.assertIs(load_template(path), template)
+
+        self.write("page.html", "<div>{{ Content }}</div>")
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        self.assertEqual(load_template(path).render({"Content": "hi"}), "<div>hi</div>")
+
+    def test_stream(self):
+        path = self.write("page.html", "<h1>{{ Title }}</h1>{{ Content }}")
+        fragments = compile_template(path).stream(
+            {"Title": "Home", "Content": iter(["<p>", "hi", "</p>"])}
+        )
+        self.assertEqual(list(fragments), ["<h1>", "Home", "</h1>", "<p>", "hi", "</p>"])
+
+    def test_stream_repeated_variable(self):
+        path = self.write("page.html", "<main>{{ Content }}</main><aside>{{ Content }}</aside>")
+        fragments = compile_template(path).stream({"Content": iter(["<p>", "hi", "</p>"])})
+        self.assertEqual("".join(fragments), "<main><p>hi</p></main><aside><p>hi</p></aside>")
+
+    def test_stream_missing_variable(self):
+        path = self.write("page.html", "{{ Title }}")
+        with self.assertRaises(TemplateError):
+            compile_template(path).stream({})
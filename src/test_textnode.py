@@ -43,7 +43,11 @@ class TestTextNode(unittest.TestCase):
         node = text_node_to_html_node(
             TextNode("This is a paragraph", "image", "https://example.com")
         )
-        self.assertEqual(repr(node), "LeafNode(img, , {'src': 'https://example.com'})")
+        self.assertEqual(
+            repr(node),
+            "LeafNode(img, , {'src': 'https://example.com', 'alt': 'This is a paragraph', "
+            "'loading': 'lazy', 'decoding': 'async'})",
+        )
 
     def test_italic_text_node_to_html_node(self):
         node = text_node_to_html_node(TextNode("This is a paragraph", "italic"))
@@ -60,3 +64,7 @@ class TestTextNode(unittest.TestCase):
             repr(node),
             "LeafNode(a, This is a paragraph, {'href': 'https://example.com'})",
         )
+
+    def test_slots(self):
+        node = TextNode("This is a text node", "bold")
+        self.assertFalse(hasattr(node, "__dict__"))
@@ -0,0 +1,65 @@
+"""
+Unit tests for the Watcher class.
+
+"""
+
+import os
+
+from fixtures import TempDirTestCase
+from watch import Watcher
+
+
+class TestWatcher(TempDirTestCase):
+    """Tests for the Watcher class."""
+
+    def setUp(self):
+        super().setUp()
+        self.page = self.write("content/index.md", "# Home")
+        self.template = self.write("template.html", "{{ Content }}")
+        self.watcher = Watcher(
+            [os.path.join(self.tmp.name, "content"), self.template],
+            interval=0.001,
+            debounce=0.001,
+        )
+
+    def test_no_changes(self):
+        self.assertEqual(self.watcher.poll(), set())
+
+    def test_changes(self):
+        self.write("content/index.md", "# Home page")
+        added = self.write("content/blog/first.md", "# First")
+        os.remove(self.template)
+        self.assertEqual(self.watcher.poll(), {self.page, added, self.template})
+        self.assertEqual(self.watcher.poll(), set())
+
+    def test_quick_polls_between_full_polls(self):
+        content = os.path.join(self.tmp.name, "content")
+        cold = self.write("content/cold.md", "# Cold")
+        os.utime(content, ns=(0, 0))
+        watcher = Watcher([content], max_load=1e-9)
+
+        self.write("content/index.md", "# Home page")
+        self.assertEqual(watcher.poll(), set())
+
+        added = self.write("content/new.md", "# New")
+        self.assertEqual(watcher.poll(), {self.page, added})
+
+        os.utime(content, ns=(0, 0))
+        self.assertEqual(watcher.poll(), set())
+        self.write("content/index.md", "# Hot")
+        self.assertEqual(watcher.poll(), {self.page})
+
+        self.write("content/cold.md", "# Cold edit")
+        self.assertEqual(watcher.poll(), set())
+        self.assertEqual(watcher.scan(full=True), {cold})
+
+    def test_removed_folder(self):
+        added = self.write("content/blog/first.md", "# First")
+        self.watcher.poll()
+        os.remove(added)
+        os.rmdir(os.path.dirname(added))
+        self.assertEqual(self.watcher.poll(), {added})
+
+    def test_wait(self):
+        self.write("content/index.md", "# Home page")
+        self.assertEqual(self.watcher.wait(), {self.page})
@@ -5,7 +5,9 @@ TextNode class represents a node in the AST that contains text content.
 
 from typing import Self, TypeAlias, Literal
 from types import NotImplementedType
+from fingerprint import asset_url
 from htmlnode import LeafNode
+from images import image_props
 
 TextType: TypeAlias = Literal["text", "bold", "italic", "code", "link", "image"]
 SplittableTextType: TypeAlias = Literal["bold", "italic", "code"]
@@ -22,6 +24,8 @@ class TextNode:
         url: The URL of the link or image, if the text is a link. Default to None
     """
 
+    __slots__ = ("text", "text_type", "url")
+
     def __init__(self, text, text_type, url=None):
         self.text: str = text
         self.text_type: TextType = text_type
@@ -59,18 +63,39 @@ def text_node_to_html_node(text_node: TextNode) -> LeafNode:
     Returns:
 
     """
-    match text_node.text_type:
+    return text_to_html_node(text_node.text, text_node.text_type, text_node.url)
+
+
+def text_to_html_node(text: str, text_type: TextType, url: Url = None) -> LeafNode:
+    """
+        Transforms a piece of inline text of the given type to a LeafNode.
+        Links and images of fingerprinted assets get the fingerprinted url.
+        Images carry their alt text, their dimensions when they are known,
+        and are loaded lazily.
+
+    Args:
+        text: text content of the node
+        text_type: type of the text
+        url: URL of the link or image
+
+    Raises:
+        ValueError: if text type does not match values defined in TextType alias
+
+    Returns:
+
+    """
+    match text_type:
         case "text":
-            return LeafNode(None, text_node.text)
+            return LeafNode(None, text)
         case "bold":
-            return LeafNode("b", text_node.text)
+            return LeafNode("b", text)
         case "italic":
-            return LeafNode("i", text_node.text)
+            return LeafNode("i", text)
         case "code":
-            return LeafNode("code", text_node.text)
+            return LeafNode("code", text)
         case "link":
-            return LeafNode("a", text_node.text, {"href": text_node.url})
+            return LeafNode("a", text, {"href": asset_url(url)})
         case "image":
-            return LeafNode("img", "", {"src": text_node.url})
+            return LeafNode("img", "", {"src": asset_url(url)} | image_props(url, text))
         case _:
             raise ValueError("TextNode has an invalid text type")
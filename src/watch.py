@@ -0,0 +1,191 @@
+"""
+Watcher class polls files and folders for changes.
+
+"""
+
+import os
+import time
+from typing import Iterable, Self, TypeAlias
+
+Snapshot: TypeAlias = dict[str, tuple[int, int]]
+Listing: TypeAlias = tuple[int, int, list[str], list[str]]
+
+RACY_NS = 10**9
+HOT_FILES = 256
+
+
+class Watcher:
+    """
+    Polls the watched paths and reports bursts of changes once they settle.
+
+    Most polls are quick: they stat the folders, list again the folders
+    whose mtime changed, which happens when entries are added, removed or
+    renamed, and stat their files and the recently changed files. Files
+    edited in place elsewhere are found by full polls, which stat every file
+    and are spaced out so they take no more than max_load of the time.
+
+    Attributes:
+        paths: files and folders being watched
+        interval: seconds between polls while waiting for a change
+        debounce: seconds without new changes before a burst is reported
+        max_load: largest fraction of the time spent in full polls
+        snapshot: (mtime ns, size) of every watched file at the last poll
+        cost: seconds the last full poll took
+    """
+
+    def __init__(
+        self,
+        paths: list[str],
+        interval: float = 0.05,
+        debounce: float = 0.03,
+        max_load: float = 0.1,
+    ) -> None:
+        self.paths: list[str] = paths
+        self.interval: float = interval
+        self.debounce: float = debounce
+        self.max_load: float = max_load
+        self.cost: float = 0.0
+        self.snapshot: Snapshot = {}
+        self._listings: dict[str, Listing] = {}
+        self._hot: dict[str, None] = {}
+        self._next_full: float = 0.0
+        self.scan()
+
+    def _list(self: Self, folder: str, mtime_ns: int) -> Listing:
+        """
+        Lists a folder again unless its mtime is unchanged since it was last
+        listed. A listing taken within RACY_NS of the folder mtime is never
+        reused, since a change in the same clock tick keeps the mtime.
+
+        Returns: (mtime ns, listing time ns, subfolders, files) of the folder
+
+        """
+        listing = self._listings.get(folder)
+        if listing and listing[0] == mtime_ns and listing[1] - mtime_ns > RACY_NS:
+            return listing
+
+        listed_at = time.time_ns()
+        folders: list[str] = []
+        files: list[str] = []
+
+        for entry in os.scandir(folder):
+            try:
+                (folders if entry.is_dir() else files).append(entry.path)
+            except FileNotFoundError:
+                continue
+
+        return mtime_ns, listed_at, folders, files
+
+    def _stat(self: Self, path: str, changed: set[str]) -> None:
+        """
+        Stats a file into the snapshot and adds it to changed when it was
+        added, modified or removed since the last scan.
+        """
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            if self.snapshot.pop(path, None) is not None:
+                changed.add(path)
+            return
+
+        state = (stat.st_mtime_ns, stat.st_size)
+        if self.snapshot.get(path) != state:
+            self.snapshot[path] = state
+            changed.add(path)
+
+    def _remove(self: Self, paths: Iterable[str], changed: set[str]) -> None:
+        for path in paths:
+            if self.snapshot.pop(path, None) is not None:
+                changed.add(path)
+
+    def scan(self: Self, full: bool = True) -> set[str]:
+        """
+        Updates the snapshot of the watched files. A quick scan keeps the
+        previous stat of the files in unchanged folders, except for recently
+        changed files.
+
+        Args:
+            full: stat every watched file
+
+        Returns: paths that were added, modified or removed
+
+        """
+        changed: set[str] = set()
+        listings: dict[str, Listing] = {}
+        folders: list[str] = []
+        started = time.perf_counter()
+
+        for path in self.paths:
+            if os.path.isdir(path):
+                folders.append(path)
+            else:
+                self._stat(path, changed)
+
+        while folders:
+            folder = folders.pop()
+            previous = self._listings.get(folder)
+            try:
+                listing = self._list(folder, os.stat(folder).st_mtime_ns)
+            except (FileNotFoundError, NotADirectoryError):
+                continue
+
+            listings[folder] = listing
+            folders.extend(listing[2])
+            if listing is previous and not full:
+                continue
+
+            for path in listing[3]:
+                self._stat(path, changed)
+            if previous and previous is not listing:
+                self._remove(set(previous[3]).difference(listing[3]), changed)
+
+        for folder in self._listings.keys() - listings.keys():
+            self._remove(self._listings[folder][3], changed)
+        if not full:
+            for path in [path for path in self._hot if path in self.snapshot]:
+                self._stat(path, changed)
+
+        self._listings = listings
+        if full:
+            self.cost = time.perf_counter() - started
+            self._next_full = started + self.cost / self.max_load
+        return changed
+
+    def poll(self: Self) -> set[str]:
+        """
+        Scans the watched paths once and compares them to the last scan. The
+        scan is a full one when enough time has passed since the last one.
+
+        Returns: paths that were added, modified or removed
+
+        """
+        changed = self.scan(time.perf_counter() >= self._next_full)
+
+        for path in changed:
+            self._hot.pop(path, None)
+            self._hot[path] = None
+        while len(self._hot) > HOT_FILES:
+            del self._hot[next(iter(self._hot))]
+
+        return changed
+
+    def wait(self: Self) -> set[str]:
+        """
+        Blocks until something changes and keeps collecting changes until no
+        new change has been seen for the debounce period.
+
+        Returns: paths that were added, modified or removed
+
+        """
+        changed: set[str] = set()
+
+        while not changed:
+            time.sleep(self.interval)
+            changed = self.poll()
+
+        while True:
+            time.sleep(self.debounce)
+            more = self.poll()
+            if not more:
+                return changed
+            changed |= more